@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Settings are read at import time; give the required ones harmless values so
+# modules import without a .env (tests never reach the real database or Groq)
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """File-backed SQLite engine with the user tables (the app engine uses NullPool, so sqlite:// would be empty per connection)"""
+    from app.core.database import Base
+    from app.models import user
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[user.User.__table__, user.UserProfile.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    session = sessionmaker(bind=db_engine)()
+    yield session
+    session.close()
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.admission import ANONYMOUS, AUTHENTICATED, BATCH, AdmissionGate, request_priority
+from app.core.deadline import Deadline
+from app.core.security import create_access_token
+
+
+def gate(max_concurrent=1, max_queue=2, timeout=1.0):
+    return AdmissionGate(max_concurrent, max_queue, {AUTHENTICATED: timeout, ANONYMOUS: timeout, BATCH: timeout})
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def request(headers=None, query=b""):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw, "query_string": query})
+
+
+def test_request_priority():
+    token = create_access_token({"sub": "alice"})
+    assert request_priority(request({"Authorization": f"Bearer {token}"})) == AUTHENTICATED
+    assert request_priority(request(query=f"access_token={token}".encode())) == AUTHENTICATED
+    assert request_priority(request({"Authorization": "Bearer forged"})) == ANONYMOUS
+    assert request_priority(request({"X-Chat-Priority": "batch", "Authorization": f"Bearer {token}"})) == BATCH
+
+
+def test_waiters_are_admitted_best_priority_first():
+    async def scenario():
+        admission = gate(max_queue=3)
+        order = []
+        await admission.acquire(ANONYMOUS)
+
+        async def worker(name, priority):
+            async with admission.slot(priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(worker(name, priority)) for name, priority in
+                 [("batch", BATCH), ("anonymous", ANONYMOUS), ("authenticated", AUTHENTICATED)]]
+        await asyncio.sleep(0.01)
+        admission.release()
+        await asyncio.gather(*tasks)
+        return order, admission.stats()
+
+    order, stats = run(scenario())
+    assert order == ["authenticated", "anonymous", "batch"]
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
+
+
+def test_full_queue_sheds_lower_priority_or_rejects():
+    async def scenario():
+        admission = gate(max_queue=1)
+        await admission.acquire(ANONYMOUS)
+        batch = asyncio.create_task(admission.acquire(BATCH))
+        await asyncio.sleep(0.01)
+        # Outranks the queued batch request, which is shed to make room
+        authenticated = asyncio.create_task(admission.acquire(AUTHENTICATED))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as shed:
+            await batch
+        # Doesn't outrank anyone: rejected outright
+        with pytest.raises(HTTPException) as full:
+            await admission.acquire(ANONYMOUS)
+        admission.release()
+        await authenticated
+        return shed.value, full.value, admission.stats()
+
+    shed, full, stats = run(scenario())
+    assert shed.status_code == full.status_code == 503
+    assert full.headers["Retry-After"] == "1"
+    assert stats["rejected"]["shed"] == 1 and stats["rejected"]["queue_full"] == 1
+    assert stats["active"] == 1
+
+
+def test_queue_timeout_and_deadline():
+    async def scenario():
+        admission = gate(timeout=0.05)
+        await admission.acquire(ANONYMOUS)
+        with pytest.raises(HTTPException) as timed_out:
+            await admission.acquire(ANONYMOUS)
+        with pytest.raises(HTTPException) as deadline:
+            await admission.acquire(ANONYMOUS, Deadline(0.01))
+        with pytest.raises(HTTPException) as expired:
+            await admission.acquire(ANONYMOUS, Deadline(0))
+        return timed_out.value, deadline.value, expired.value, admission.stats()
+
+    timed_out, deadline, expired, stats = run(scenario())
+    assert timed_out.status_code == 503
+    assert deadline.status_code == expired.status_code == 504
+    assert stats["rejected"]["queue_timeout"] == 1 and stats["rejected"]["deadline"] == 2
+    assert stats["queue_depth"] == 0
+
+
+def test_cancelled_waiter_gives_back_its_place():
+    async def scenario():
+        admission = gate()
+        await admission.acquire(ANONYMOUS)
+        waiter = asyncio.create_task(admission.acquire(ANONYMOUS))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        admission.release()
+        return admission.stats()
+
+    stats = run(scenario())
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
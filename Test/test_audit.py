@@ -0,0 +1,151 @@
+import asyncio
+import uuid
+from contextlib import nullcontext
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.core.logging import client_ip_var, request_id_var
+from app.models.audit import AuthAuditEvent
+from app.models.user import User
+from app.routes.admin import list_audit_events
+from app.services import audit
+from app.services.audit import AuditBuffer
+
+# Points at a directory that doesn't exist, so every connection attempt fails
+BROKEN_URL = "sqlite:////nonexistent/dir/db.sqlite"
+
+
+@pytest.fixture
+def user_id(db_session):
+    user = User(id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+
+@pytest.fixture
+def audit_engine(db_engine, monkeypatch):
+    AuthAuditEvent.__table__.create(db_engine)
+    monkeypatch.setattr(audit, "engine", db_engine)
+    return db_engine
+
+
+def test_audit_events_carry_request_context(audit_engine, user_id):
+    buffer = AuditBuffer(flush_interval=60, flush_size=100, max_size=100)
+    ip_token, request_token = client_ip_var.set("198.51.100.7"), request_id_var.set("req-1")
+    try:
+        buffer.record(audit.LOGIN_SUCCEEDED, user_id=str(user_id), identifier="alice")
+    finally:
+        client_ip_var.reset(ip_token)
+        request_id_var.reset(request_token)
+    buffer.record(audit.LOGIN_FAILED, identifier="x" * 500)
+
+    assert buffer.flush() == 2
+    with audit_engine.connect() as connection:
+        rows = connection.execute(select(AuthAuditEvent.__table__).order_by(AuthAuditEvent.occurred_at)).all()
+    assert [row.event_type for row in rows] == [audit.LOGIN_SUCCEEDED, audit.LOGIN_FAILED]
+    assert rows[0].user_id == user_id and rows[0].ip == "198.51.100.7" and rows[0].request_id == "req-1"
+    assert len(rows[1].identifier) == 100
+
+
+def test_audit_buffer_drops_beyond_max_size_and_on_requeue_overflow(monkeypatch):
+    monkeypatch.setattr(audit, "engine", create_engine(BROKEN_URL))
+    buffer = AuditBuffer(flush_interval=60, flush_size=100, max_size=3)
+    for _ in range(5):
+        buffer.record(audit.LOGIN_FAILED)
+    assert buffer.stats()["pending"] == 3 and buffer.stats()["dropped_total"] == 2
+
+    # A failed flush puts the batch back in front of events queued meanwhile
+    assert buffer.flush() == 0
+    assert buffer.stats()["pending"] == 3 and buffer.stats()["failed_flushes"] == 1
+    batch = list(buffer._pending)
+    buffer._pending.clear()
+    buffer.record(audit.LOGOUT)
+    buffer._requeue(batch)
+    assert [event["event_type"] for event in buffer._pending] == [audit.LOGIN_FAILED] * 2 + [audit.LOGOUT]
+    assert buffer.stats()["dropped_total"] == 3
+
+
+def test_flush_writes_everything_queued_in_one_batch(audit_engine):
+    buffer = AuditBuffer(flush_interval=60, flush_size=100, max_size=100)
+    for _ in range(3):
+        buffer.record(audit.LOGIN_FAILED, identifier="alice")
+    assert buffer.flush() == 3
+    assert buffer.flush() == 0
+    assert buffer.stats() == {"pending": 0, "written_total": 3, "dropped_total": 0, "failed_flushes": 0}
+
+
+def test_admin_listing_pages_through_a_time_range(audit_engine, db_session):
+    buffer = AuditBuffer(flush_interval=60, flush_size=100, max_size=100)
+    for _ in range(3):
+        buffer.record(audit.LOGIN_FAILED, identifier="alice")
+    buffer.record(audit.LOGIN_FAILED, identifier="bob")
+    buffer.flush()
+
+    query = dict(since=None, until=None, event_type=None, user_id=None, identifier="alice", limit=2, db=db_session)
+    first = list_audit_events(cursor=None, **query)
+    second = list_audit_events(cursor=first.next_cursor, **query)
+    assert len(first.items) == 2 and len(second.items) == 1 and second.next_cursor is None
+    assert {item.identifier for item in first.items + second.items} == {"alice"}
+
+
+def test_partition_months_roll_over_the_year():
+    assert audit.partition_months(date(2030, 11, 17), 2) == [date(2030, 11, 1), date(2030, 12, 1), date(2031, 1, 1)]
+
+
+def test_partitions_follow_the_utc_month(monkeypatch):
+    executed = []
+    connection = SimpleNamespace(execute=lambda statement: executed.append(str(statement)))
+    engine = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), begin=lambda: nullcontext(connection))
+
+    class UtcNewYear(datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls(2031, 1, 1, 0, 30)
+
+    monkeypatch.setattr(audit, "engine", engine)
+    monkeypatch.setattr(audit, "datetime", UtcNewYear)
+    assert audit.ensure_partitions(1)
+    assert len(executed) == 2
+    assert "auth_audit_events_2031_01" in executed[0] and "auth_audit_events_2031_02" in executed[1]
+
+
+def test_partitions_are_maintained_periodically_and_retried_after_failure(monkeypatch):
+    results, calls = [False, True, True], []
+
+    def ensure(months_ahead):
+        calls.append(months_ahead)
+        return results[len(calls) - 1]
+
+    monkeypatch.setattr(audit, "ensure_partitions", ensure)
+    clock = [1000.0]
+    monkeypatch.setattr(audit.time, "monotonic", lambda: clock[0])
+    buffer = AuditBuffer(flush_interval=60, flush_size=100, max_size=100, partition_months_ahead=2, partition_check_interval=3600)
+
+    buffer.maintain_partitions()
+    buffer.maintain_partitions()  # The first attempt failed, so this one retries
+    buffer.maintain_partitions()
+    assert calls == [2, 2]
+    clock[0] += 3600
+    buffer.maintain_partitions()
+    assert calls == [2, 2, 2]
+
+
+def test_flush_task_maintains_partitions(audit_engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(audit, "ensure_partitions", lambda months_ahead: calls.append(months_ahead) or True)
+
+    async def scenario():
+        buffer = AuditBuffer(flush_interval=0.01, flush_size=100, max_size=100, partition_months_ahead=1, partition_check_interval=0)
+        buffer.start()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(calls) >= 2:
+                break
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert len(calls) >= 2 and set(calls) == {1}
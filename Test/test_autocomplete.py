@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from app.services import autocomplete
+from app.services.autocomplete import PrefixIndex, build_arrays, fold, save_arrays
+
+
+@pytest.fixture
+def places():
+    return {
+        "name": np.array(["Bir Hospital", "Café Soma", "Himalayan Java Coffee", "Civil Hospital", "Soaltee Hotel"]),
+        "category": np.array(["hospital", "cafe", "cafe", "hospital", "hotel"]),
+        "lat": np.array([27.70, 27.72, 27.71, 27.69, 27.70]),
+        "lon": np.array([85.31, 85.32, 85.31, 85.34, 85.28]),
+        "popularity": np.array([5.0, 3.0, 4.0, 9.0, 1.0]),
+    }
+
+
+@pytest.fixture
+def index(places):
+    return PrefixIndex(build_arrays(places))
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_fold():
+    assert fold("Café  Soma!") == "cafe soma"
+
+
+def test_matches_any_word_ranked_by_popularity(index):
+    assert names(index.complete("hosp")) == ["Civil Hospital", "Bir Hospital"]
+    assert names(index.complete("CAFE so")) == ["Café Soma"]
+    assert names(index.complete("java")) == ["Himalayan Java Coffee"]
+    assert index.complete("zzz") == []
+
+
+def test_category_filter_and_k(index):
+    assert names(index.complete("s", category="Hotel")) == ["Soaltee Hotel"]
+    assert len(index.complete("h", k=1)) == 1
+
+
+def test_unknown_categories_are_not_cached(index):
+    for i in range(100):
+        assert index.complete("h", category=f"junk-{i}") == []
+    assert index.stats()["cached_prefixes"] == 0
+
+
+def test_cache_is_bounded_lru(index, monkeypatch):
+    monkeypatch.setattr(autocomplete, "CACHE_MAX_ENTRIES", 2)
+    index.complete("b")
+    index.complete("c")
+    index.complete("b")  # Now most recently used
+    index.complete("s")
+    assert list(index._cache) == [("b", None), ("s", None)]
+
+
+def test_long_prefixes_beyond_key_bytes(places):
+    long_name = "Soaltee " + "x" * 40 + " Hotel"
+    places["name"] = np.array(list(places["name"][:4]) + [long_name])
+    index = PrefixIndex(build_arrays(places))
+    assert names(index.complete("soaltee " + "x" * 40)) == [long_name]
+    assert index.complete("soaltee " + "x" * 40 + "y") == []
+
+
+def test_memory_mapped_index_matches(index, places, tmp_path):
+    save_arrays(build_arrays(places), str(tmp_path))
+    mapped = PrefixIndex.load(str(tmp_path))
+    assert mapped.mmapped
+    assert names(mapped.complete("h")) == names(index.complete("h"))
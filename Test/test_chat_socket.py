@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.chatbot import endpoints
+
+QUESTION = "Which bus goes from Kathmandu to Pokhara in the morning?"
+
+
+class FakeGroq:
+    """Streams `deltas`; with `hold`, then waits until the generation is cancelled"""
+
+    def __init__(self, deltas, hold=False):
+        self.deltas = deltas
+        self.hold = hold
+        self.cancelled = threading.Event()
+
+    def stream_response(self, user_input, location=None, token=None, deadline=None):
+        yield from self.deltas
+        while self.hold and not token.cancelled:
+            time.sleep(0.01)
+        if token.cancelled:
+            self.cancelled.set()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_message_streams_deltas_then_done(client, monkeypatch):
+    monkeypatch.setattr(endpoints, "groq_service", FakeGroq(["Take the ", "tourist bus."]))
+    with client.websocket_connect("/api/chatbot/chatbot/ws") as socket:
+        socket.send_json({"type": "message", "conversation_id": "a", "message": QUESTION})
+        frames = [socket.receive_json() for _ in range(3)]
+
+    assert frames == [
+        {"type": "delta", "conversation_id": "a", "content": "Take the "},
+        {"type": "delta", "conversation_id": "a", "content": "tourist bus."},
+        {"type": "done", "conversation_id": "a", "response": "Take the tourist bus."},
+    ]
+
+
+def test_cancel_stops_the_generation(client, monkeypatch):
+    groq = FakeGroq(["Take the "], hold=True)
+    monkeypatch.setattr(endpoints, "groq_service", groq)
+    with client.websocket_connect("/api/chatbot/chatbot/ws") as socket:
+        socket.send_json({"type": "message", "conversation_id": "a", "message": QUESTION})
+        assert socket.receive_json()["type"] == "delta"
+        socket.send_json({"type": "cancel", "conversation_id": "a"})
+        assert socket.receive_json() == {"type": "cancelled", "conversation_id": "a"}
+    assert groq.cancelled.wait(1)
+
+
+def test_disconnect_cancels_running_generations(client, monkeypatch):
+    groq = FakeGroq(["Take the "], hold=True)
+    monkeypatch.setattr(endpoints, "groq_service", groq)
+    with client.websocket_connect("/api/chatbot/chatbot/ws") as socket:
+        socket.send_json({"type": "message", "conversation_id": "a", "message": QUESTION})
+        assert socket.receive_json()["type"] == "delta"
+    assert groq.cancelled.wait(1)
+
+
+def test_failed_send_closes_the_socket_and_cancels_generations(client, monkeypatch):
+    groq = FakeGroq(["Take the "], hold=True)
+    monkeypatch.setattr(endpoints, "groq_service", groq)
+    send_json = endpoints.WebSocket.send_json
+
+    async def failing_send_json(self, data, mode="text"):
+        if data.get("type") == "delta":
+            raise RuntimeError("send failed")
+        await send_json(self, data, mode)
+
+    monkeypatch.setattr(endpoints.WebSocket, "send_json", failing_send_json)
+    with client.websocket_connect("/api/chatbot/chatbot/ws") as socket:
+        socket.send_json({"type": "message", "conversation_id": "a", "message": QUESTION})
+        message = socket.receive()
+    assert message == {"type": "websocket.close", "code": 1011, "reason": ""}
+    assert groq.cancelled.wait(1)
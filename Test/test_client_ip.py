@@ -0,0 +1,55 @@
+import ipaddress
+
+import pytest
+from starlette.requests import Request
+
+from app.core import client_ip as module
+from app.core.client_ip import client_ip
+
+
+def make_request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", value.encode()) for value in ([forwarded] if forwarded else [])]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234) if peer else None})
+
+
+@pytest.fixture
+def trust(monkeypatch):
+    def configure(*entries):
+        monkeypatch.setattr(module, "TRUST_ANY_PEER", "*" in entries)
+        monkeypatch.setattr(
+            module, "TRUSTED_NETWORKS", [ipaddress.ip_network(entry, strict=False) for entry in entries if entry != "*"]
+        )
+
+    configure()
+    return configure
+
+
+def test_header_ignored_without_trusted_proxies(trust):
+    assert client_ip(make_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_trusted_peer_uses_forwarded_client(trust):
+    trust("10.0.0.0/8")
+    assert client_ip(make_request("10.0.0.2", "198.51.100.7")) == "198.51.100.7"
+
+
+def test_untrusted_peer_cannot_spoof(trust):
+    trust("10.0.0.0/8")
+    assert client_ip(make_request("203.0.113.9", "198.51.100.7")) == "203.0.113.9"
+
+
+def test_skips_trusted_hops_and_ignores_client_written_entries(trust):
+    trust("10.0.0.0/8")
+    request = make_request("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.5")
+    assert client_ip(request) == "198.51.100.7"
+
+
+def test_any_peer_takes_the_rightmost_hop(trust):
+    trust("*")
+    assert client_ip(make_request("169.254.1.1", "1.2.3.4, 198.51.100.7")) == "198.51.100.7"
+    assert client_ip(make_request(None, "198.51.100.7")) == "198.51.100.7"
+
+
+def test_garbage_hop_falls_back_to_last_vouched_address(trust):
+    trust("10.0.0.0/8")
+    assert client_ip(make_request("10.0.0.2", "not-an-ip")) == "10.0.0.2"
@@ -0,0 +1,115 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import groq_integration
+from app.core.config import settings
+from app.core.deadline import Deadline, request_deadline
+from app.core.groq_integration import GroqService
+from app.schemas.chatbot.chat import UserInput
+
+DEFAULT_SECONDS = settings.CHATBOT_DEADLINE_MS / 1000
+
+
+@pytest.mark.parametrize("budget", [None, "abc", "nan", "NaN", "inf", "-inf", "-5", float("nan"), [1]])
+def test_invalid_budgets_get_the_default(budget):
+    remaining = Deadline.from_budget_ms(budget).remaining()
+    assert DEFAULT_SECONDS - 1 < remaining <= DEFAULT_SECONDS
+
+
+def test_budget_is_capped_at_the_default():
+    assert Deadline.from_budget_ms(settings.CHATBOT_DEADLINE_MS * 10).remaining() <= DEFAULT_SECONDS
+
+
+def test_zero_budget_is_already_expired():
+    deadline = Deadline.from_budget_ms("0")
+    assert deadline.expired
+    with pytest.raises(HTTPException) as raised:
+        deadline.check()
+    assert raised.value.status_code == 504
+
+
+def test_timeout_is_the_smaller_of_cap_and_remaining():
+    deadline = Deadline(0.2)
+    assert deadline.timeout(10) <= 0.2
+    assert deadline.timeout(0.05) == 0.05
+    time.sleep(0.25)
+    assert deadline.expired and deadline.remaining() == 0.0 and deadline.timeout(10) == 0.0
+
+
+def test_request_deadline_reads_the_header():
+    request = Request({"type": "http", "headers": [(b"x-request-timeout-ms", b"500")]})
+    assert 0.4 < request_deadline(request).remaining() <= 0.5
+
+
+class TricklingStream:
+    """Fake Groq stream: one token every 50 ms, far longer than any test deadline"""
+
+    def __init__(self):
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(200):
+            if self.closed:
+                raise RuntimeError("stream closed")
+            time.sleep(0.05)
+            yield SimpleNamespace(choices=[SimpleNamespace(
+                delta=SimpleNamespace(content=f"{i} ", tool_calls=None), finish_reason=None,
+            )])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def groq_service():
+    streams, timeouts = [], []
+
+    def create(timeout=None, **kwargs):
+        timeouts.append(timeout)
+        streams.append(TricklingStream())
+        return streams[-1]
+
+    service = GroqService.__new__(GroqService)
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service.max_retries = 3
+    return service, streams, timeouts
+
+
+def test_get_response_stops_upstream_at_the_deadline(groq_service):
+    service, streams, timeouts = groq_service
+    started = time.monotonic()
+    with pytest.raises(HTTPException) as raised:
+        service.get_response(UserInput(role="user", message="how do I get to the airport"), deadline=Deadline(0.3))
+    assert raised.value.status_code == 504
+    assert time.monotonic() - started < 0.5
+    assert len(streams) == 1 and streams[0].closed
+    assert 0 < timeouts[0] <= 0.3
+
+
+def test_stream_response_stops_upstream_at_the_deadline(groq_service):
+    service, streams, _ = groq_service
+    deltas = []
+    with pytest.raises(HTTPException) as raised:
+        for delta in service.stream_response(UserInput(role="user", message="route to pokhara"), deadline=Deadline(0.3)):
+            deltas.append(delta)
+    assert raised.value.status_code == 504
+    assert 0 < len(deltas) < 10
+    assert streams[0].closed
+
+
+def test_stream_is_closed_when_waiting_for_the_first_chunk_fails(groq_service, monkeypatch):
+    service, streams, _ = groq_service
+    monkeypatch.setattr(groq_integration.hedge_policy, "enabled", False)
+
+    def first_chunk(stream, started):
+        raise TimeoutError("no first chunk")
+
+    monkeypatch.setattr(service, "_first_chunk", first_chunk)
+    decision = groq_integration.model_router.choose("route to pokhara")
+    with pytest.raises(TimeoutError):
+        service._call_groq_api("route to pokhara", None, decision, Deadline(1))
+    assert streams[0].closed
@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.user import User
+from app.services import email_filter as module
+from app.services.email_filter import RegisteredEmailFilter
+from app.utils.bloom import BloomFilter
+
+
+def add_user(session, email, created_at=None):
+    user = User(id=uuid.uuid4(), username=email.split("@")[0], email=email, hashed_password="x")
+    session.add(user)
+    session.commit()
+    if created_at is not None:
+        session.execute(update(User).where(User.id == user.id).values(created_at=created_at))
+        session.commit()
+
+
+@pytest.fixture
+def email_filter(db_engine, monkeypatch):
+    monkeypatch.setattr(module, "engine", db_engine)
+    return RegisteredEmailFilter(error_rate=0.001, refresh_interval=30)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    emails = [f"user{i}@example.com" for i in range(1000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+    misses = sum(f"other{i}@example.com" in bloom for i in range(10000))
+    assert misses / 10000 < 0.03
+
+
+def test_build_is_case_insensitive(email_filter, db_session):
+    add_user(db_session, "Alice@Example.com")
+    assert email_filter.might_contain("alice@example.com") is None  # Not built yet
+    email_filter.build()
+    assert email_filter.might_contain("ALICE@example.com") is True
+    assert email_filter.might_contain("bob@example.com") is False
+
+
+def test_refresh_picks_up_signups_from_other_workers(email_filter, db_session):
+    add_user(db_session, "alice@example.com")
+    email_filter.build()
+    # Another worker's signup: in the database, never passed to this filter's add()
+    add_user(db_session, "carol@example.com")
+    # ...and one whose transaction started before the build but committed after it
+    add_user(db_session, "dave@example.com", created_at=datetime.utcnow() - timedelta(minutes=1))
+    assert email_filter.might_contain("carol@example.com") is False
+
+    email_filter.refresh()
+    assert email_filter.might_contain("carol@example.com") is True
+    assert email_filter.might_contain("dave@example.com") is True
+    assert email_filter.stats()["refreshed_emails"] == 2
+
+    # The overlap re-reads known emails without counting them again
+    email_filter.refresh()
+    assert email_filter.stats()["emails"] == 3
+
+
+def test_local_add_is_visible_immediately(email_filter):
+    email_filter.build()
+    email_filter.add("New@Example.com")
+    assert email_filter.might_contain("new@example.com") is True
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from app.services import geocoding
+from app.services.geocoding import RegionIndex, _ranges
+
+
+def square(min_lon, min_lat, size, hole=None):
+    rings = [[[min_lon, min_lat], [min_lon + size, min_lat], [min_lon + size, min_lat + size], [min_lon, min_lat + size]]]
+    if hole:
+        rings.append(hole)
+    return rings
+
+
+def feature(name, geometry_type, coordinates, level=None):
+    return {
+        "type": "Feature",
+        "properties": {"name": name, "level": level},
+        "geometry": {"type": geometry_type, "coordinates": coordinates},
+    }
+
+
+@pytest.fixture
+def index():
+    index = RegionIndex(cell_degrees=0.25, max_centroid_km=25)
+    index.build([
+        feature("Bagmati", "Polygon", square(84.0, 27.0, 2.0), "province"),
+        # City with a hole (an enclave that belongs to no city)
+        feature("Kathmandu", "Polygon", square(85.2, 27.6, 0.2, hole=[[85.25, 27.65], [85.27, 27.65], [85.27, 27.67], [85.25, 27.67]]), "city"),
+        # Two-part region
+        feature("Islands", "MultiPolygon", [square(90.0, 10.0, 0.1), square(91.0, 10.0, 0.1)], "district"),
+        feature("Lonely Village", "Point", [100.0, 20.0], "village"),
+        feature("", "Point", [0.0, 0.0]),
+    ])
+    return index
+
+
+def test_ranges():
+    assert _ranges(np.array([5, 0, 10]), np.array([2, 0, 3])).tolist() == [5, 6, 10, 11, 12]
+
+
+def test_smallest_region_wins_with_hierarchy(index):
+    result = index.reverse(27.70, 85.30)
+    assert result["name"] == "Kathmandu"
+    assert result["hierarchy"] == ["Kathmandu", "Bagmati"]
+    assert result["match"] == "polygon"
+
+
+def test_holes_are_excluded(index):
+    assert index.reverse(27.66, 85.26)["name"] == "Bagmati"
+
+
+def test_multipolygon_parts_and_centroid_fallback(index):
+    assert index.reverse(10.05, 91.05)["name"] == "Islands"
+    near_village = index.reverse(20.05, 100.0)
+    assert near_village["name"] == "Lonely Village"
+    assert near_village["match"] == "centroid"
+    assert 5 < near_village["distance_km"] < 6
+    assert index.reverse(-45.0, -120.0) is None
+
+
+def test_batch_matches_single_lookups_across_chunks(index, monkeypatch):
+    monkeypatch.setattr(geocoding, "BATCH_CHUNK", 7)
+    rng = np.random.default_rng(3)
+    lats, lons = rng.uniform(26.5, 29.5, 50), rng.uniform(83.5, 86.5, 50)
+    batch = index.reverse_many(lats, lons)
+    assert batch == [index.reverse(lat, lon) for lat, lon in zip(lats, lons)]
+
+
+def test_edge_chunks_match_a_single_pass(index, monkeypatch):
+    rng = np.random.default_rng(5)
+    lats, lons = rng.uniform(26.5, 29.5, 200), rng.uniform(83.5, 86.5, 200)
+    expected = index.reverse_many(lats, lons)
+    # Smaller than one polygon's edge count, so every pair gets its own pass
+    monkeypatch.setattr(geocoding, "EDGE_CHUNK", 3)
+    assert index.reverse_many(lats, lons) == expected
+    monkeypatch.setattr(geocoding, "EDGE_CHUNK", 20)
+    assert index.reverse_many(lats, lons) == expected
+
+
+def test_ray_casting_matches_a_reference_on_a_concave_polygon():
+    # U shape: the notch (x in 1..2, y in 1..3) is outside
+    u_shape = [[[0, 0], [3, 0], [3, 3], [2, 3], [2, 1], [1, 1], [1, 3], [0, 3]]]
+    index = RegionIndex(cell_degrees=0.5, max_centroid_km=0)
+    index.build([feature("U", "Polygon", u_shape)])
+    assert index.reverse(2.0, 0.5)["name"] == "U"
+    assert index.reverse(2.0, 1.5) is None
+    assert index.reverse(2.0, 2.5)["name"] == "U"
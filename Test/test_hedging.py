@@ -0,0 +1,145 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import groq_integration
+from app.core.deadline import Deadline
+from app.core.groq_integration import GroqService
+from app.schemas.chatbot.chat import UserInput
+from app.services.hedging import HedgePolicy
+from app.services.model_router import ModelRouter
+
+
+@pytest.fixture
+def policy():
+    return HedgePolicy(enabled=True, budget_percent=10, min_delay=0.25, min_samples=5, burst=2)
+
+
+def test_no_delay_until_enough_samples(policy):
+    for _ in range(4):
+        policy.observe_ttft(1.0)
+    assert policy.delay() is None
+    policy.observe_ttft(1.0)
+    assert policy.delay() == pytest.approx(1.0)
+
+
+def test_delay_is_p95_with_a_floor(policy):
+    for seconds in [0.01] * 19 + [2.0]:
+        policy.observe_ttft(seconds)
+    assert 0.25 <= policy.delay() < 2.0
+    fast = HedgePolicy(enabled=True, budget_percent=10, min_delay=0.25, min_samples=5)
+    for _ in range(5):
+        fast.observe_ttft(0.01)
+    assert fast.delay() == 0.25
+
+
+def test_disabled_never_hedges():
+    policy = HedgePolicy(enabled=False, budget_percent=100, min_delay=0.0, min_samples=0)
+    policy.observe_ttft(1.0)
+    assert policy.delay() is None
+
+
+def test_budget_limits_hedges_to_a_share_of_requests(policy):
+    for _ in range(5):
+        policy.observe_ttft(1.0)
+    hedges = 0
+    for _ in range(1000):
+        policy.delay()
+        hedges += policy.try_hedge()
+    # Burst of 2 plus 10% of 1000 requests
+    assert hedges == pytest.approx(102, abs=1)
+    assert policy.stats()["denied_by_budget"] == 1000 - hedges
+
+
+class SlowStream:
+    """Fake Groq stream: `text` after `first_after` seconds, or `error` raised then instead"""
+
+    def __init__(self, text="", first_after=0.0, error=None):
+        self.text = text
+        self.first_after = first_after
+        self.error = error
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.first_after):
+            raise RuntimeError("stream closed")
+        if self.error is not None:
+            raise self.error
+        yield SimpleNamespace(choices=[SimpleNamespace(
+            delta=SimpleNamespace(content=self.text, tool_calls=None), finish_reason="stop",
+        )])
+
+    def close(self):
+        self.closed.set()
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """A service whose streams come from `streams[model]`, hedging after 50 ms"""
+    policy = HedgePolicy(enabled=True, budget_percent=100, min_delay=0.05, min_samples=1)
+    policy.observe_ttft(0.05)
+    router = ModelRouter(
+        models=["light", "heavy"], threshold=0.5, alpha=0.3, explore_seconds=300,
+        tokens_floor=64, tokens_cap=1024, failure_penalty_seconds=10,
+    )
+    monkeypatch.setattr(groq_integration, "hedge_policy", policy)
+    monkeypatch.setattr(groq_integration, "model_router", router)
+    streams, opened = {}, []
+
+    def create_stream(message, location, decision, deadline):
+        opened.append(decision.model)
+        return streams[decision.model]
+
+    service = GroqService.__new__(GroqService)
+    service._create_stream = create_stream
+
+    def call():
+        return service._call_groq_api("bus to pokhara", None, router.choose("bus to pokhara"), Deadline(5))
+
+    return SimpleNamespace(call=call, streams=streams, opened=opened, policy=policy)
+
+
+def test_fast_primary_sends_no_hedge(hedging):
+    hedging.streams.update(light=SlowStream("primary"), heavy=SlowStream("hedge"))
+    assert hedging.call() == "primary"
+    assert hedging.opened == ["light"]
+    assert hedging.policy.hedged_total == 0
+
+
+def test_slow_primary_loses_to_the_hedge(hedging):
+    hedging.streams.update(light=SlowStream("primary", first_after=5), heavy=SlowStream("hedge"))
+    assert hedging.call() == "hedge"
+    assert hedging.opened == ["light", "heavy"]
+    assert hedging.streams["light"].closed.is_set()
+    assert hedging.policy.hedge_wins == 1
+
+
+def test_failed_primary_waits_for_the_hedge(hedging):
+    hedging.streams.update(
+        light=SlowStream(first_after=0.1, error=ValueError("primary failed")),
+        heavy=SlowStream("hedge", first_after=0.2),
+    )
+    assert hedging.call() == "hedge"
+    assert hedging.policy.hedge_wins == 1
+
+
+def test_both_failing_raises(hedging):
+    hedging.streams.update(
+        light=SlowStream(first_after=0.1, error=ValueError("primary failed")),
+        heavy=SlowStream(first_after=0.1, error=ValueError("hedge failed")),
+    )
+    with pytest.raises(ValueError, match="failed"):
+        hedging.call()
+    assert hedging.opened == ["light", "heavy"]
+
+
+def test_streaming_and_buffered_calls_record_one_ttft_sample_each(hedging):
+    hedging.streams.update(light=SlowStream("primary"))
+    hedging.policy.enabled = False
+    hedging.call()
+    service = GroqService.__new__(GroqService)
+    service._create_stream = lambda *args: SlowStream("streamed")
+    service.max_retries = 1
+    assert list(service.stream_response(UserInput(role="user", message="bus to pokhara"))) == ["streamed"]
+    assert len(hedging.policy._ttft) == 3
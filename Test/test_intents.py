@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.intents import GREETING, NAVIGATION, NEAREST, OFF_TOPIC, THANKS, BagOfWordsModel, IntentRouter
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(threshold=0.6)
+
+
+@pytest.mark.parametrize("message", ["hi", "Hello!", "hey tripo", "good morning", "namaste, friend!"])
+def test_greetings(router, message):
+    assert router.classify(message) == GREETING
+
+
+@pytest.mark.parametrize("message", ["thanks", "Thank you so much!", "ty", "cheers mate"])
+def test_thanks(router, message):
+    assert router.classify(message) == THANKS
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "hey where is kathmandu",
+        "hi route to pokhara",
+        "hello how far is lumbini",
+        "thanks where is the atm",
+        "ty how far to pokhara",
+        "hi, which temples should I see?",
+    ],
+)
+def test_questions_behind_small_talk_are_not_templated(router, message):
+    assert router.classify(message) not in (GREETING, THANKS)
+
+
+def test_navigation_wins_over_greeting(router):
+    assert router.classify("hey where is kathmandu") == NAVIGATION
+    assert router.classify("thanks, nearest atm?") == NEAREST
+
+
+def test_off_topic_unless_about_travel(router):
+    assert router.classify("write me a poem about rain") == OFF_TOPIC
+    assert router.classify("translate the street sign near the museum") == NAVIGATION
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "best beaches in Java",
+        "translate 'thank you' into Nepali",
+        "what's the capital of Bhutan",
+    ],
+)
+def test_travel_questions_are_not_off_topic(router, message):
+    assert router.classify(message) == NAVIGATION
+
+
+def test_unrecognised_goes_to_model(router):
+    assert router.classify("what should I know about monsoon season") == NAVIGATION
+
+
+def test_bag_of_words_model_round_trip(router, tmp_path):
+    model = BagOfWordsModel.train(
+        ["best momo spot", "momo places to eat", "tell me a riddle", "riddle please"],
+        [NAVIGATION, NAVIGATION, OFF_TOPIC, OFF_TOPIC],
+    )
+    path = tmp_path / "intents.npz"
+    model.save(str(path))
+    router.model = BagOfWordsModel.load(str(path))
+
+    assert router.model.predict("unknown words only") is None
+    assert router.classify("a riddle") == OFF_TOPIC
+    assert router.stats()["model_decisions"] == 1
@@ -0,0 +1,47 @@
+import logging
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.models.user import User
+
+
+@pytest.fixture
+def client(db_session):
+    db_session.add(User(id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="x", is_active=True))
+    db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def request_reset(client, db_session, caplog) -> str:
+    with caplog.at_level(logging.INFO, logger="app.routes.auth"):
+        assert client.post("/api/auth/forgot-password", json={"email": "alice@example.com"}).status_code == 200
+    db_session.expire_all()
+    return db_session.query(User).filter(User.username == "alice").one().reset_password_otp
+
+
+def test_reset_otp_is_logged_in_development(client, db_session, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+    otp = request_reset(client, db_session, caplog)
+    assert any(otp in record.getMessage() for record in caplog.records)
+
+
+def test_reset_otp_is_never_logged_elsewhere(client, db_session, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    otp = request_reset(client, db_session, caplog)
+    assert "Password reset OTP issued" in caplog.text
+    assert all(otp not in record.getMessage() and otp not in str(record.__dict__) for record in caplog.records)
+
+
+def test_reset_completes_with_the_issued_otp(client, db_session, caplog):
+    otp = request_reset(client, db_session, caplog)
+    response = client.post("/api/auth/reset-password", json={
+        "email": "alice@example.com", "otp": otp, "new_password": "N3w!password", "confirm_password": "N3w!password",
+    })
+    assert response.status_code == 200 and response.json()["next_step"] == "login"
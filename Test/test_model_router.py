@@ -0,0 +1,71 @@
+import pytest
+
+from app.services.model_router import COMPLEX, SIMPLE, ModelRouter, RouteDecision, estimate_complexity
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(
+        models=["small", "medium", "large", "huge"],
+        threshold=0.5,
+        alpha=0.5,
+        explore_seconds=3600,
+        tokens_floor=64,
+        tokens_cap=1024,
+        failure_penalty_seconds=10,
+    )
+
+
+def warm(router):
+    """Measure every model once so nothing is left to explore"""
+    for model in router.models:
+        decision = router.choose("plan a 5 day itinerary and compare several routes, why?" if model in ("large", "huge") else "hi")
+        router.observe_latency(decision, 1.0)
+
+
+def test_complexity_score():
+    assert estimate_complexity("where is thamel") < 0.5
+    assert estimate_complexity("Plan a 3 day itinerary, compare bus vs taxi and explain the budget? Why?") >= 0.5
+
+
+def test_buckets_use_their_half_of_the_pool(router):
+    simple = router.choose("where is thamel")
+    complex_ = router.choose("plan a 5 day itinerary and compare several routes, why? which is best?")
+    assert simple.bucket == SIMPLE and simple.model in ("small", "medium")
+    assert complex_.bucket == COMPLEX and complex_.model in ("large", "huge")
+
+
+def test_fastest_model_wins_and_failures_shift_traffic(router):
+    warm(router)
+    router.observe_latency(RouteDecision("small", 64, 0.0, SIMPLE), 0.2)
+    router.observe_latency(RouteDecision("medium", 64, 0.0, SIMPLE), 0.5)
+    assert router.choose("where is thamel").model == "small"
+
+    router.observe_failure(router.choose("where is thamel"))
+    assert router.choose("where is thamel").model == "medium"
+
+
+def test_exclude_falls_back_to_other_models(router):
+    warm(router)
+    assert router.choose("where is thamel", exclude="small").model == "medium"
+    single = ModelRouter(["only"], 0.5, 0.5, 3600, 64, 1024, 10)
+    assert single.choose("hi", exclude="only").model == "only"
+
+
+def test_unmeasured_models_are_explored_once_each(router):
+    first = router.choose("where is thamel").model
+    second = router.choose("where is thamel").model
+    assert {first, second} == {"small", "medium"}
+
+
+def test_max_tokens_follow_answers_and_double_on_truncation(router):
+    decision = router.choose("where is thamel")
+    assert decision.max_tokens == 64
+    for _ in range(10):
+        router.observe(decision, 1.0, "x" * 4 * 200)
+    grown = router.choose("where is thamel").max_tokens
+    assert 64 < grown <= 400
+
+    router.observe(router.choose("where is thamel"), 1.0, "x", truncated=True)
+    assert router.choose("where is thamel").max_tokens == 1024
+    assert router.stats()["truncated_total"] == 1
@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.user import User
+from app.routes.admin import list_users
+from app.utils.pagination import decode_cursor, encode_cursor, like_prefix
+
+
+def page(db, cursor=None, limit=4, q=None):
+    return list_users(
+        limit=limit, cursor=cursor, role=None, is_active=None, is_verified=None,
+        q=q, estimate_total=False, db=db,
+    )
+
+
+@pytest.fixture
+def users(db_session):
+    start = datetime(2030, 1, 1)
+    created = []
+    for i in range(11):
+        # Pairs share a timestamp so the id tiebreak matters
+        user = User(
+            id=uuid.uuid4(), username=f"user_{i}", email=f"user{i}@example.com",
+            hashed_password="x", created_at=start + timedelta(minutes=i // 2),
+        )
+        db_session.add(user)
+        created.append(user)
+    db_session.add(User(id=uuid.uuid4(), username="userX1", email="other@example.com", hashed_password="x", created_at=start))
+    db_session.commit()
+    return created
+
+
+def test_cursor_round_trip():
+    row_id = uuid.uuid4()
+    created_at = datetime(2030, 1, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_like_prefix_escapes_wildcards():
+    assert like_prefix("50%_off/") == "50/%/_off//%"
+
+
+def test_pages_cover_every_row_once_newest_first(db_session, users):
+    seen, cursor = [], None
+    while True:
+        result = page(db_session, cursor)
+        seen.extend(item.id for item in result.items)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 12
+
+    rows = {str(user.id): user for user in db_session.query(User).all()}
+    keys = [(rows[row_id].created_at, row_id) for row_id in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_prefix_search_treats_underscore_literally(db_session, users):
+    result = page(db_session, q="user_1", limit=50)
+    assert sorted(item.username for item in result.items) == ["user_1", "user_10"]
+
+
+def test_prefix_search_folds_emails(db_session, users):
+    assert [item.username for item in page(db_session, q="OTHER@").items] == ["userX1"]
+
+
+def test_invalid_cursor_is_a_400(db_session):
+    with pytest.raises(HTTPException) as raised:
+        page(db_session, cursor="garbage")
+    assert raised.value.status_code == 400
@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import argon2, bcrypt
+from sqlalchemy.orm import sessionmaker
+
+from app.core import hash_calibration, security
+from app.core.database import get_db
+from app.main import app
+from app.models.user import User
+
+PASSWORD = "Str0ng!pass"
+
+
+@pytest.fixture
+def context(db_engine, monkeypatch):
+    """Cheap bcrypt cost (5 rounds) configured; rehashes are written to the test database"""
+    monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(security, "pwd_context", security._build_pwd_context())
+    monkeypatch.setattr(security, "SessionLocal", sessionmaker(bind=db_engine))
+    return security.pwd_context
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def add_user(db_session, hashed_password) -> User:
+    user = User(
+        id=uuid.uuid4(), username=f"user{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password=hashed_password, is_active=True, is_verified=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def login(client, user):
+    return client.post("/api/auth/login", data={"username": user.username, "password": PASSWORD})
+
+
+def stored_hash(db_session, user) -> str:
+    db_session.expire_all()
+    return db_session.get(User, user.id).hashed_password
+
+
+@pytest.mark.parametrize("old_hash", [
+    pytest.param(lambda: bcrypt.using(rounds=4).hash(PASSWORD), id="weaker-bcrypt"),
+    pytest.param(lambda: argon2.using(time_cost=1, memory_cost=1024, parallelism=1).hash(PASSWORD), id="other-scheme"),
+])
+def test_login_upgrades_an_outdated_hash(context, client, db_session, old_hash):
+    user = add_user(db_session, old_hash())
+    assert security.password_needs_rehash(user.hashed_password)
+
+    assert login(client, user).status_code == 200
+    new_hash = stored_hash(db_session, user)
+    assert new_hash.startswith("$2b$05$")
+    assert not security.password_needs_rehash(new_hash)
+
+    # The upgraded hash still verifies, and isn't rewritten again
+    assert login(client, user).status_code == 200
+    assert stored_hash(db_session, user) == new_hash
+
+
+def test_current_hash_is_left_alone(context, client, db_session):
+    user = add_user(db_session, bcrypt.using(rounds=5).hash(PASSWORD))
+    assert login(client, user).status_code == 200
+    assert stored_hash(db_session, user) == user.hashed_password
+
+
+def test_rehash_skips_a_password_changed_meanwhile(context, db_session):
+    user = add_user(db_session, bcrypt.using(rounds=4).hash("0ld!password1"))
+    security.rehash_password(user.id, "0ld!password1", "not-the-stored-hash")
+    assert stored_hash(db_session, user) == user.hashed_password
+
+
+def test_rehash_leaves_updated_at_alone(context, db_session):
+    user = add_user(db_session, bcrypt.using(rounds=4).hash(PASSWORD))
+    user.updated_at = datetime(2024, 1, 1)
+    db_session.commit()
+    old_hash = user.hashed_password
+    security.rehash_password(user.id, PASSWORD, old_hash)
+    assert stored_hash(db_session, user) != old_hash
+    assert user.updated_at == datetime(2024, 1, 1)
+
+
+def test_calibration_recommends_the_highest_cost_within_target():
+    assert hash_calibration.recommend([(10, 0.05), (11, 0.1), (12, 0.2), (13, 0.4)], target=0.25) == 12
+    assert hash_calibration.recommend([(10, 0.5), (11, 1.0)], target=0.25) == 10
+
+
+def test_bcrypt_calibration_stops_past_the_target():
+    results = hash_calibration.calibrate_bcrypt(target=0.0, samples=1, min_rounds=4, max_rounds=6)
+    assert [rounds for rounds, _ in results] == [4]
+    results = hash_calibration.calibrate_bcrypt(target=10.0, samples=1, min_rounds=4, max_rounds=5)
+    assert [rounds for rounds, _ in results] == [4, 5]
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.core.profiling import MemoryTracker, SamplingProfiler
+
+
+def get(stop: threading.Event) -> int:
+    """CPU-bound, and named like an idle frame (queue.get) to check it isn't filtered out"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+@pytest.fixture
+def threads():
+    stop, parked = threading.Event(), threading.Event()
+    busy = threading.Thread(target=get, args=(stop,), name="busy-worker")
+    idle = threading.Thread(target=parked.wait, name="parked-worker")
+    busy.start()
+    idle.start()
+    yield
+    stop.set()
+    parked.set()
+    busy.join()
+    idle.join()
+
+
+def test_busy_thread_shows_up_and_parked_ones_do_not(threads):
+    stacks = SamplingProfiler().profile(seconds=0.3, interval=0.005)
+    busy = [line for line in stacks.splitlines() if line.startswith("busy-worker;")]
+    assert busy and all(";test_profiling:get" in line for line in busy)
+    assert "parked-worker" not in stacks
+
+
+def test_include_idle_keeps_parked_threads(threads):
+    stacks = SamplingProfiler().profile(seconds=0.1, interval=0.005, include_idle=True)
+    assert any(line.startswith("parked-worker;") and "threading:Condition.wait" in line for line in stacks.splitlines())
+
+
+def test_one_profile_at_a_time():
+    profiler = SamplingProfiler()
+    profiler._lock.acquire()
+    try:
+        assert profiler.profile(seconds=0.01) is None
+    finally:
+        profiler._lock.release()
+
+
+def test_memory_diff_reports_growth():
+    tracker = MemoryTracker()
+    tracker.start()
+    try:
+        retained = [bytearray(1024) for _ in range(1000)]
+        diff = tracker.diff(limit=5)
+        assert diff["top"][0]["size_diff_kb"] >= 1000
+        assert any("test_profiling.py" in location for location in diff["top"][0]["location"])
+    finally:
+        tracker.stop()
+    assert tracker.diff() is None
+    assert len(retained) == 1000
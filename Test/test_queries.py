@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+
+from app.models import queries
+from app.models.user import User, UserProfile
+
+
+@pytest.fixture
+def users(db_session):
+    """Two users with every looked-up column distinct, so a stale bound value returns the wrong row"""
+    rows = []
+    for name, phone, otp in (("alice", "+9771111111", "111111"), ("bob", "+9772222222", "222222")):
+        user = User(
+            id=uuid.uuid4(), username=name, email=f"{name.title()}@Example.com", hashed_password="x",
+            phone=phone, reset_password_otp=otp,
+        )
+        db_session.add(user)
+        db_session.add(UserProfile(id=uuid.uuid4(), user_id=user.id, profile_image=f"{name}.png"))
+        rows.append(user)
+    db_session.commit()
+    return rows
+
+
+def first(db_session, statement):
+    return db_session.execute(statement).scalars().first()
+
+
+def test_each_lookup_binds_its_own_parameters(db_session, users):
+    alice, bob = users
+    for user in (alice, bob, alice):
+        name = user.username
+        assert first(db_session, queries.user_by_username(name)) is user
+        assert first(db_session, queries.user_by_login_identifier(name)) is user
+        assert first(db_session, queries.user_by_login_identifier(user.email.upper())) is user
+        assert first(db_session, queries.user_by_phone(user.phone)) is user
+        assert first(db_session, queries.user_by_id(user.id)) is user
+        assert first(db_session, queries.profile_by_user_id(user.id)).profile_image == f"{name}.png"
+        assert first(db_session, queries.user_by_reset_otp(user.email.lower(), user.reset_password_otp)) is user
+
+
+def test_lookups_miss_cleanly(db_session, users):
+    alice, bob = users
+    assert first(db_session, queries.user_by_username("carol")) is None
+    assert first(db_session, queries.user_by_phone("+9779999999")) is None
+    assert first(db_session, queries.user_by_id(uuid.uuid4())) is None
+    # Right email with the other user's OTP
+    assert first(db_session, queries.user_by_reset_otp(alice.email, bob.reset_password_otp)) is None
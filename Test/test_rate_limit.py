@@ -0,0 +1,77 @@
+import pytest
+
+from app.core.rate_limit import LoginThrottle, SlidingWindowCounter
+
+
+def test_sliding_count_weights_the_previous_window():
+    counter = SlidingWindowCounter(window=10, max_keys=100)
+    for _ in range(10):
+        counter.add("k", now=100.0)
+    assert counter.count("k", now=105.0) == 10
+    # Halfway through the next window half of the previous one still counts
+    assert counter.count("k", now=115.0) == pytest.approx(5)
+    assert counter.add("k", now=115.0) == pytest.approx(6)
+    # Two windows later everything has slid out
+    assert counter.count("k", now=131.0) == 0
+
+
+def test_an_explicit_zero_timestamp_is_used():
+    counter = SlidingWindowCounter(window=10, max_keys=100)
+    for _ in range(3):
+        counter.add("k", now=0.0)
+    assert counter.count("k", now=0.0) == 3
+    assert counter.count("k", now=25.0) == 0
+
+
+def test_counter_evicts_least_recently_used_keys():
+    counter = SlidingWindowCounter(window=10, max_keys=2)
+    counter.add("a", now=1.0)
+    counter.add("b", now=1.0)
+    counter.add("a", now=2.0)
+    counter.add("c", now=3.0)
+    assert len(counter) == 2
+    assert counter.count("b", now=3.0) == 0
+    assert counter.count("a", now=3.0) == 2
+
+
+@pytest.fixture
+def throttle():
+    return LoginThrottle(
+        max_identifier_failures=5, max_ip_failures=8, window=60,
+        free_failures=2, base_delay=0.5, max_delay=4, max_keys=1000,
+    )
+
+
+def test_throttle_rejects_per_identifier_and_ip_case_insensitively(throttle):
+    for _ in range(5):
+        assert throttle.check("Alice", "198.51.100.1") is None
+        throttle.record_failure("alice ", "198.51.100.1")
+    assert throttle.check("ALICE", "198.51.100.1") == 60
+    assert throttle.check("bob", "198.51.100.1") is None
+
+
+def test_failures_from_one_ip_dont_lock_the_account_for_others(throttle):
+    for _ in range(5):
+        throttle.record_failure("alice", "198.51.100.1")
+    assert throttle.check("alice", "203.0.113.9") is None
+    # The progressive delay still applies to the identifier from anywhere
+    assert throttle.delay_for("alice") > 0
+
+
+def test_throttle_rejects_per_ip(throttle):
+    for i in range(8):
+        throttle.record_failure(f"user{i}", "198.51.100.1")
+    assert throttle.check("fresh", "198.51.100.1") == 60
+    assert throttle.check("fresh", "198.51.100.2") is None
+
+
+def test_delay_grows_and_success_resets(throttle):
+    delays = []
+    for _ in range(5):
+        delays.append(throttle.delay_for("alice"))
+        throttle.record_failure("alice", "198.51.100.1")
+    assert delays == [0.0, 0.0, 0.5, 1.0, 2.0]
+    throttle.record_failure("alice", "198.51.100.1")
+    assert throttle.delay_for("alice") == 4
+    throttle.record_success("alice", "198.51.100.1")
+    assert throttle.delay_for("alice") == 0.0
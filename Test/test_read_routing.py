@@ -0,0 +1,117 @@
+import time
+import uuid
+
+import pytest
+from fastapi import Depends, Request
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db, get_read_db
+from app.core.security import create_access_token, get_current_user_for_read
+from app.main import app
+from app.models.user import User
+
+
+def unavailable():
+    raise RuntimeError("this session must not be used")
+    yield
+
+
+@pytest.fixture
+def client():
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def dependency_calls(path):
+    route = next(route for route in app.routes if getattr(route, "path", None) == path)
+    pending, calls = [route.dependant], set()
+    while pending:
+        dependant = pending.pop()
+        calls.add(dependant.call)
+        pending.extend(dependant.dependencies)
+    return calls
+
+
+def test_me_reads_only_from_the_read_session():
+    calls = dependency_calls("/api/auth/me")
+    assert get_read_db in calls
+    assert get_db not in calls
+
+
+def test_current_user_for_read_loads_through_the_given_session(db_session):
+    db_session.add(User(id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="x", is_active=True))
+    db_session.commit()
+
+    user = get_current_user_for_read(create_access_token({"sub": "alice"}), db_session)
+    assert user.username == "alice"
+
+
+def test_health_checks_the_primary(client, db_session):
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = unavailable
+
+    body = client.get("/api/health").json()
+    assert body["database_connected"] is True
+    assert "healthy_replicas" in body["database_routing"]
+
+
+@pytest.fixture
+def primary(db_engine, monkeypatch):
+    """SessionLocal (whose commit hooks set the pin) bound to the test database, with a replica 'configured'"""
+    from app.core import database
+
+    monkeypatch.setattr(database.ReplicaRouter, "has_replicas", True)
+    bind = database.SessionLocal.kw["bind"]
+    database.SessionLocal.configure(bind=db_engine)
+    yield database
+    database.SessionLocal.configure(bind=bind)
+
+
+def test_a_write_pins_the_next_read_to_the_primary(client, primary):
+    @app.post("/_test/write")
+    def write(db: Session = Depends(get_db)):
+        db.add(User(id=uuid.uuid4(), username="bob", email="bob@example.com", hashed_password="x"))
+        db.commit()
+        return {}
+
+    @app.get("/_test/read")
+    def read(connection: Request, db: Session = Depends(get_db)):
+        db.query(User).count()
+        db.commit()
+        return {"pinned": primary.replica_router.is_pinned(connection)}
+
+    try:
+        response = client.get("/_test/read")
+        assert response.json() == {"pinned": False}
+        assert primary.PRIMARY_PIN_HEADER not in response.headers  # Reads don't pin
+
+        response = client.post("/_test/write")
+        token = response.headers[primary.PRIMARY_PIN_HEADER]
+        assert response.cookies.get(primary.PRIMARY_PIN_COOKIE) == token
+
+        # Any worker sees the pin, since the client carries it: as the cookie or as the header
+        assert client.get("/_test/read").json() == {"pinned": True}
+        fresh = TestClient(app)
+        assert fresh.get("/_test/read").json() == {"pinned": False}
+        assert fresh.get("/_test/read", headers={primary.PRIMARY_PIN_HEADER: token}).json() == {"pinned": True}
+        assert fresh.get("/_test/read", headers={primary.PRIMARY_PIN_HEADER: "forged"}).json() == {"pinned": False}
+    finally:
+        app.router.routes[:] = [r for r in app.router.routes if not getattr(r, "path", "").startswith("/_test/")]
+
+
+def test_pins_expire(monkeypatch):
+    from app.core import database
+
+    router = database.ReplicaRouter([], health_check_interval=10, sticky_seconds=5)
+    now = time.time()
+
+    def pinned_by_token_issued(seconds_ago: float) -> bool:
+        monkeypatch.setattr(database.time, "time", lambda: now - seconds_ago)
+        token = router.pin_token()
+        request = Request({"type": "http", "headers": [(database.PRIMARY_PIN_HEADER.lower().encode(), token.encode())]})
+        return router.is_pinned(request)
+
+    # Expiry is rounded up to the next whole second, hence the 2 s margins around sticky_seconds
+    assert pinned_by_token_issued(5 - 2) is True
+    assert pinned_by_token_issued(5 + 2) is False
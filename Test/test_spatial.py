@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from app.services.places import PlaceIndex
+from app.utils.spatial import KDTree, chord_to_km, haversine_km, km_to_chord, to_unit_vectors
+
+
+@pytest.fixture
+def random_points():
+    rng = np.random.default_rng(7)
+    return rng.uniform(-80, 80, 2000), rng.uniform(-180, 180, 2000)
+
+
+def test_chord_and_haversine_agree():
+    # Kathmandu -> Pokhara, about 140 km
+    km = haversine_km(27.7172, 85.3240, 28.2096, 83.9856)
+    assert 135 < km < 145
+    chord = np.linalg.norm(to_unit_vectors([27.7172], [85.3240])[0] - to_unit_vectors([28.2096], [83.9856])[0])
+    assert chord_to_km(chord) == pytest.approx(km, rel=1e-6)
+    assert chord_to_km(km_to_chord(500)) == pytest.approx(500)
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_kd_tree_matches_brute_force(random_points, k):
+    vectors = to_unit_vectors(*random_points)
+    tree = KDTree(vectors, leaf_size=8)
+    rng = np.random.default_rng(1)
+    for query in to_unit_vectors(rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50)):
+        distances_sq, indices = tree.query(query, k)
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1), kind="stable")[:k]
+        assert np.allclose(distances_sq, ((vectors[expected] - query) ** 2).sum(axis=1))
+        assert np.all(np.diff(distances_sq) >= 0)
+
+
+def test_kd_tree_radius_limit(random_points):
+    vectors = to_unit_vectors(*random_points)
+    tree = KDTree(vectors)
+    query = vectors[0]
+    max_distance_sq = km_to_chord(300) ** 2
+    _, indices = tree.query(query, 1000, max_distance_sq)
+    within = np.flatnonzero(((vectors - query) ** 2).sum(axis=1) <= max_distance_sq)
+    assert sorted(indices.tolist()) == sorted(within.tolist())
+
+
+def test_kd_tree_batched_nearest_matches_brute_force(random_points):
+    vectors = to_unit_vectors(*random_points)
+    tree = KDTree(vectors, leaf_size=8)
+    rng = np.random.default_rng(2)
+    queries = to_unit_vectors(rng.uniform(-90, 90, 300), rng.uniform(-180, 180, 300))
+    max_distance_sq = km_to_chord(150) ** 2
+    distances_sq, indices = tree.nearest(queries, max_distance_sq)
+    brute = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    in_range = brute.min(axis=1) <= max_distance_sq
+    assert 0 < in_range.sum() < len(queries)
+    assert np.array_equal(indices >= 0, in_range)
+    assert np.allclose(distances_sq[in_range], brute.min(axis=1)[in_range])
+    assert np.all(np.isinf(distances_sq[~in_range]))
+    assert KDTree(np.empty((0, 3))).nearest(queries[:2])[1].tolist() == [-1, -1]
+
+
+def test_kd_tree_across_the_antimeridian():
+    tree = KDTree(to_unit_vectors([0.0, 0.0], [179.9, 170.0]))
+    _, indices = tree.query(to_unit_vectors([0.0], [-179.9])[0], 1)
+    assert indices.tolist() == [0]
+
+
+def test_place_index_nearby_by_category(tmp_path):
+    path = tmp_path / "places.csv"
+    path.write_text(
+        "name,category,lat,lon\n"
+        "Bir Hospital,Hospital,27.7050,85.3130\n"
+        "Teaching Hospital,hospital,27.7360,85.3300\n"
+        "Himalayan Java,cafe,27.7150,85.3120\n"
+        "Broken row,cafe,not-a-number,85\n"
+    )
+    index = PlaceIndex()
+    index.load(str(path))
+
+    assert index.categories == ["cafe", "hospital"]
+    nearest = index.nearby(27.7040, 85.3140, category="HOSPITAL", k=5)
+    assert [place["name"] for place in nearest] == ["Bir Hospital", "Teaching Hospital"]
+    assert nearest[0]["distance_km"] < 0.2
+    assert index.nearby(27.7040, 85.3140, radius_km=1.5, k=5)[-1]["name"] == "Himalayan Java"
+    assert index.nearby(27.7040, 85.3140, category="museum") == []
@@ -0,0 +1,22 @@
+import asyncio
+import gc
+import logging
+
+from app import main
+
+
+def test_background_tasks_are_kept_until_done_and_failures_logged(caplog):
+    def broken_loader():
+        raise ValueError("bad dataset")
+
+    async def scenario():
+        main._run_in_background(broken_loader)
+        assert len(main._background_tasks) == 1
+        gc.collect()
+        await asyncio.gather(*main._background_tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        return len(main._background_tasks)
+
+    with caplog.at_level(logging.ERROR):
+        assert asyncio.run(scenario()) == 0
+    assert "bad dataset" in caplog.text
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_read_db
+from app.core.security import create_access_token, get_current_user_for_read
+from app.main import app
+from app.models.user import User, UserProfile
+from app.routes.auth import SYNC_PROFILE_FIELDS, SYNC_USER_FIELDS, _row_version
+
+
+def version_of(when: datetime) -> int:
+    return (when - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
+
+@pytest.fixture
+def account(db_session):
+    user = User(
+        id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="secret-hash",
+        is_active=True, verification_code="123456", reset_password_otp="654321",
+        created_at=datetime(2030, 1, 1), updated_at=datetime(2030, 1, 5),
+    )
+    profile = UserProfile(id=uuid.uuid4(), user_id=user.id, profile_image="a.png", created_at=datetime(2030, 1, 3))
+    db_session.add_all([user, profile])
+    db_session.commit()
+    return user, profile
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def get_sync(client, **params):
+    token = create_access_token({"sub": "alice"})
+    return client.get("/api/auth/sync", params=params, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_sync_uses_the_shared_read_dependency():
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/api/auth/sync")
+    assert get_current_user_for_read in [dependency.call for dependency in route.dependant.dependencies]
+
+
+def test_version_is_the_latest_change_across_both_rows(account):
+    user, profile = account
+    assert _row_version(user) == version_of(datetime(2030, 1, 5))  # updated_at wins over created_at
+    assert _row_version(profile) == version_of(datetime(2030, 1, 3))  # created_at when never updated
+
+
+def test_full_sync_returns_only_cacheable_fields(client, account):
+    body = get_sync(client).json()
+    assert body["changed"] is True
+    assert body["version"] == version_of(datetime(2030, 1, 5))
+    assert sorted(body["user"]) == sorted(SYNC_USER_FIELDS)
+    assert sorted(body["profile"]) == sorted(SYNC_PROFILE_FIELDS)
+    assert body["user"]["id"] == str(account[0].id)
+    for secret in ("hashed_password", "verification_code", "reset_password_otp"):
+        assert secret not in body["user"]
+
+
+def test_up_to_date_client_gets_not_modified(client, account):
+    version = get_sync(client).json()["version"]
+    assert get_sync(client, since=version).json() == {"version": version, "changed": False, "user": None, "profile": None}
+
+
+def test_only_rows_changed_since_are_returned(client, account, db_session):
+    between = version_of(datetime(2030, 1, 4))
+    body = get_sync(client, since=between).json()
+    assert body["changed"] is True and body["user"] is not None and body["profile"] is None
+
+    _, profile = account
+    profile.updated_at = datetime(2030, 2, 1)
+    db_session.commit()
+    body = get_sync(client, since=version_of(datetime(2030, 1, 5))).json()
+    assert body["version"] == version_of(datetime(2030, 2, 1))
+    assert body["user"] is None and body["profile"]["profile_image"] == "a.png"
+
+
+def test_inactive_or_missing_token_is_rejected(client, account, db_session):
+    assert client.get("/api/auth/sync").status_code == 401
+    account[0].is_active = False
+    db_session.commit()
+    assert get_sync(client).status_code == 401
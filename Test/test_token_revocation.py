@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from jose import JWTError
+
+from app.core import token_revocation
+from app.core.security import consume_refresh_token, create_token_pair, decode_token, verify_refresh_token
+from app.core.token_revocation import InMemoryRevocationBackend, RevocationBackend, _load_backend
+from app.models.user import User
+from app.routes.auth import refresh_tokens
+from app.schemas.auth import RefreshTokenRequest
+
+
+class PartialBackend(RevocationBackend):
+    def revoke(self, token_id, expires_at):
+        pass
+
+    def is_revoked(self, token_id):
+        return False
+
+
+class NotABackend:
+    def revoke(self, token_id, expires_at):
+        pass
+
+    def is_revoked(self, token_id):
+        return False
+
+
+@pytest.mark.parametrize("use_bloom_filter", [True, False])
+def test_revoked_until_expiry(use_bloom_filter):
+    backend = InMemoryRevocationBackend(use_bloom_filter=use_bloom_filter)
+    backend.revoke("a", time.time() + 60)
+    backend.revoke("b", time.time() - 1)
+    assert backend.is_revoked("a")
+    assert not backend.is_revoked("b")
+    assert not backend.is_revoked("c")
+
+
+def test_purge_drops_expired_entries_and_keeps_live_ones():
+    backend = InMemoryRevocationBackend()
+    backend.revoke("old", time.time() + 1)
+    backend.revoke("live", time.time() + 600)
+    backend.purge(time.time() + 5)
+    assert len(backend) == 1
+    assert backend.is_revoked("live")
+
+
+def test_bloom_filter_grows_past_its_capacity():
+    backend = InMemoryRevocationBackend()
+    ids = [f"jti-{i}" for i in range(3000)]
+    for token_id in ids:
+        backend.revoke(token_id, time.time() + 60)
+    assert all(backend.is_revoked(token_id) for token_id in ids)
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RevocationBackend()
+
+
+@pytest.mark.parametrize("class_name", ["PartialBackend", "NotABackend"])
+def test_misconfigured_backend_fails_at_load(monkeypatch, class_name):
+    monkeypatch.setattr(token_revocation.settings, "TOKEN_REVOCATION_BACKEND", f"{__name__}:{class_name}")
+    with pytest.raises(TypeError):
+        _load_backend()
+
+
+@pytest.mark.parametrize("use_bloom_filter", [True, False])
+def test_consume_succeeds_once(use_bloom_filter):
+    backend = InMemoryRevocationBackend(use_bloom_filter=use_bloom_filter)
+    assert backend.consume("a", time.time() + 60) is True
+    assert backend.consume("a", time.time() + 60) is False
+    assert backend.is_revoked("a")
+    # An entry that outlived its token doesn't block a (hypothetical) reissue
+    backend.revoke("b", time.time() - 1)
+    assert backend.consume("b", time.time() + 60) is True
+
+
+def test_concurrent_consumes_have_one_winner():
+    backend = InMemoryRevocationBackend()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def consume():
+        barrier.wait()
+        results.append(backend.consume("jti", time.time() + 60))
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+
+
+@pytest.fixture
+def user(db_session):
+    user = User(id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="x", is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def fresh_backend(monkeypatch):
+    backend = InMemoryRevocationBackend()
+    monkeypatch.setattr(token_revocation, "revocation_backend", backend)
+    return backend
+
+
+def test_a_refresh_token_that_lost_the_race_revokes_its_family(db_session, user, fresh_backend):
+    _, refresh_token = create_token_pair(user)
+    # The second request passes verification before the first one consumes the token
+    payload = verify_refresh_token(refresh_token)
+    first = asyncio.run(refresh_tokens(RefreshTokenRequest(refresh_token=refresh_token), db_session))
+    with pytest.raises(JWTError):
+        consume_refresh_token(refresh_token, payload)
+    assert fresh_backend.is_revoked(payload["fam"])
+    with pytest.raises(JWTError):
+        decode_token(first.access_token)
+
+
+def test_refresh_rotates_and_rejects_reuse(db_session, user, fresh_backend):
+    _, refresh_token = create_token_pair(user)
+    rotated = asyncio.run(refresh_tokens(RefreshTokenRequest(refresh_token=refresh_token), db_session))
+    assert rotated.refresh_token != refresh_token
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(refresh_tokens(RefreshTokenRequest(refresh_token=refresh_token), db_session))
+    assert error.value.status_code == 401
+    # Reuse revokes the whole chain, including the pair that was just issued
+    with pytest.raises(HTTPException):
+        asyncio.run(refresh_tokens(RefreshTokenRequest(refresh_token=rotated.refresh_token), db_session))
@@ -0,0 +1,46 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.trips import distance_matrix, nearest_neighbour_order, plan_trip, two_opt
+
+
+def tour_length(order, matrix, round_trip):
+    path = list(order) + ([order[0]] if round_trip else [])
+    return sum(matrix[a, b] for a, b in zip(path, path[1:]))
+
+
+def brute_force(matrix, round_trip):
+    rest = range(1, len(matrix))
+    return min(tour_length([0, *perm], matrix, round_trip) for perm in itertools.permutations(rest))
+
+
+@pytest.mark.parametrize("round_trip", [False, True])
+@pytest.mark.parametrize("seed", range(8))
+def test_two_opt_is_close_to_optimal(seed, round_trip):
+    rng = np.random.default_rng(seed)
+    matrix = distance_matrix(rng.uniform(27, 28, 8), rng.uniform(84, 86, 8))
+    greedy = nearest_neighbour_order(matrix)
+    improved = two_opt(greedy, matrix, round_trip=round_trip)
+
+    assert improved[0] == 0
+    assert sorted(improved.tolist()) == list(range(8))
+    assert tour_length(improved, matrix, round_trip) <= tour_length(greedy, matrix, round_trip) + 1e-9
+    assert tour_length(improved, matrix, round_trip) <= brute_force(matrix, round_trip) * 1.1
+
+
+def test_two_opt_untangles_a_crossing():
+    # Visiting the corners of a square diagonally crosses itself; 2-opt fixes it
+    lats, lons = [0.0, 0.0, 0.1, 0.1], [0.0, 0.1, 0.0, 0.1]
+    matrix = distance_matrix(lats, lons)
+    order = two_opt(np.array([0, 3, 1, 2]), matrix, round_trip=True)
+    assert tour_length(order, matrix, True) == pytest.approx(4 * matrix[0, 1])
+
+
+def test_plan_trip_result_shape():
+    plan = plan_trip([27.70, 28.21, 27.71], [85.32, 83.99, 85.31])
+    assert plan["order"] == [0, 2, 1]
+    assert len(plan["legs_km"]) == 2
+    assert plan["total_km"] == pytest.approx(sum(plan["legs_km"]), abs=0.01)
+    assert len(plan_trip([27.7, 28.2], [85.3, 84.0], round_trip=True)["legs_km"]) == 2
@@ -0,0 +1,139 @@
+import io
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.user import User
+from app.services import user_import
+from app.services.user_import import UserImporter
+
+PASSWORD = "Str0ng!pass"
+
+
+class InlinePool:
+    """Stands in for the hash process pool; `before` runs first, like a signup racing the import"""
+
+    def __init__(self, before=None):
+        self.before = before
+
+    def map(self, function, items, chunksize=1):
+        if self.before:
+            self.before()
+        return map(function, items)
+
+
+@pytest.fixture
+def importer_env(db_engine, monkeypatch):
+    monkeypatch.setattr(user_import, "engine", db_engine)
+    monkeypatch.setattr(user_import, "get_password_hash", lambda password: f"hashed:{password}")
+    monkeypatch.setattr(user_import, "_get_hash_pool", lambda: InlinePool())
+    return db_engine
+
+
+def ndjson(*rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def row(email, first_name="Test", last_name="User", password=PASSWORD):
+    return {"email": email, "password": password, "first_name": first_name, "last_name": last_name}
+
+
+def stored_users(db_session):
+    return {user.email: user for user in db_session.execute(select(User)).scalars()}
+
+
+def test_csv_import_writes_batches_with_executemany(importer_env, db_session):
+    stream = io.StringIO(
+        "email,password,first_name,last_name\n"
+        + "".join(f"user{i}@example.com,{PASSWORD},First,Last\n" for i in range(5))
+    )
+    result = UserImporter(batch_size=2).run(stream, "csv")
+
+    assert result["inserted"] == 5 and result["rejected"] == 0
+    users = stored_users(db_session)
+    assert sorted(users) == [f"user{i}@example.com" for i in range(5)]
+    assert users["user0@example.com"].hashed_password == f"hashed:{PASSWORD}"
+    assert users["user0@example.com"].is_verified is False
+
+
+def test_invalid_rows_are_rejected_with_their_line(importer_env, db_session):
+    result = UserImporter(mark_verified=True).run(
+        io.StringIO(
+            json.dumps(row("good@example.com")) + "\n"
+            + json.dumps(row("weak@example.com", password="password")) + "\n"
+            + json.dumps(row("not-an-email")) + "\n"
+            + json.dumps(row("short@example.com", first_name="A")) + "\n"
+            + "{broken\n"
+            + json.dumps(row("GOOD@example.com")) + "\n"
+        ),
+        "ndjson",
+    )
+
+    assert result["inserted"] == 1 and result["rejected"] == 5
+    rejects = {reject["line"]: reject for reject in result["rejects"]}
+    assert sorted(rejects) == [2, 3, 4, 5, 6]
+    assert "password" in rejects[2]["error"]
+    assert "email" in rejects[3]["error"]
+    assert "first_name" in rejects[4]["error"]
+    assert rejects[5]["error"].startswith("Invalid JSON")
+    assert rejects[6]["error"] == "Duplicate email in import"
+    assert stored_users(db_session)["good@example.com"].is_verified is True
+
+
+def test_rows_without_a_password_are_rejected(importer_env, db_session):
+    stream = io.StringIO(
+        "email,password,first_name,last_name\n"
+        "blank@example.com,,First,Last\n"
+        f"good@example.com,{PASSWORD},First,Last\n"
+    )
+    result = UserImporter().run(stream, "csv")
+    assert result["inserted"] == 1
+    assert result["rejects"] == [{"line": 2, "email": "blank@example.com", "error": "password: Field required"}]
+
+    no_password = {key: value for key, value in row("missing@example.com").items() if key != "password"}
+    result = UserImporter().run(ndjson(no_password), "ndjson")
+    assert result["rejects"] == [{"line": 1, "email": "missing@example.com", "error": "password: Field required"}]
+
+
+def test_hash_pool_spawns_its_workers(monkeypatch):
+    monkeypatch.setattr(user_import, "_hash_pool", None)
+    pool = user_import._get_hash_pool()
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        user_import.shutdown_hash_pool()
+
+
+def test_existing_emails_are_rejected_and_usernames_get_a_suffix(importer_env, db_session):
+    db_session.add(User(id=uuid.uuid4(), username="taken", email="Taken@example.com", hashed_password="x"))
+    db_session.commit()
+
+    result = UserImporter().run(ndjson(row("taken@example.com"), row("taken@other.example")), "ndjson")
+
+    assert result["inserted"] == 1
+    assert result["rejects"] == [{"line": 1, "email": "taken@example.com", "error": "Email already registered"}]
+    assert stored_users(db_session)["taken@other.example"].username == "taken1"
+
+
+def test_conflicts_from_concurrent_signups_are_retried_row_by_row(importer_env, db_session, monkeypatch):
+    def concurrent_signups():
+        # Both land after the import's existence and username checks
+        db_session.add(User(id=uuid.uuid4(), username="carol9", email="carol@example.com", hashed_password="x"))
+        db_session.add(User(id=uuid.uuid4(), username="dave", email="dave@elsewhere.example", hashed_password="x"))
+        db_session.commit()
+
+    monkeypatch.setattr(user_import, "_get_hash_pool", lambda: InlinePool(before=concurrent_signups))
+    result = UserImporter().run(
+        ndjson(row("carol@example.com"), row("dave@example.com"), row("erin@example.com")), "ndjson"
+    )
+
+    assert result["inserted"] == 1 and result["rejected"] == 2
+    assert [(reject["line"], reject["error"]) for reject in result["rejects"]] == [
+        (1, "Email or username already registered"),
+        (2, "Email or username already registered"),
+    ]
+    users = stored_users(db_session)
+    assert users["erin@example.com"].hashed_password == f"hashed:{PASSWORD}"
+    assert users["carol@example.com"].hashed_password == "x"
@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.models.user import User
+from app.services import last_login
+from app.services.last_login import LastLoginBuffer
+
+# Points at a directory that doesn't exist, so every connection attempt fails
+BROKEN_URL = "sqlite:////nonexistent/dir/db.sqlite"
+
+
+@pytest.fixture
+def user_id(db_session):
+    user = User(id=uuid.uuid4(), username="alice", email="alice@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+
+def test_last_login_keeps_the_newest_and_writes_in_bulk(db_engine, db_session, user_id, monkeypatch):
+    monkeypatch.setattr(last_login, "engine", db_engine)
+    buffer = LastLoginBuffer(flush_interval=60, max_size=100)
+    newest = datetime(2030, 1, 2)
+    buffer.record(user_id, newest)
+    buffer.record(user_id, newest - timedelta(hours=1))
+    assert buffer.pending_count() == 1
+
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+    user = db_session.execute(select(User).where(User.id == user_id)).scalar_one()
+    assert user.last_login == newest
+    assert user.updated_at is None  # A login is not a profile change
+
+
+def test_failed_flush_requeues_without_overwriting_newer_logins(user_id, monkeypatch):
+    monkeypatch.setattr(last_login, "engine", create_engine(BROKEN_URL))
+    buffer = LastLoginBuffer(flush_interval=60, max_size=100)
+    buffer.record(user_id, datetime(2030, 1, 1))
+    assert buffer.flush() == 0
+    assert buffer.stats()["failed_flushes"] == 1
+
+    buffer.record(user_id, datetime(2030, 1, 3))
+    buffer._requeue({user_id: datetime(2030, 1, 2)})
+    assert buffer._pending[user_id] == datetime(2030, 1, 3)
+
+
+def test_reaching_max_size_flushes_early(db_engine, user_id, monkeypatch):
+    monkeypatch.setattr(last_login, "engine", db_engine)
+
+    async def scenario():
+        buffer = LastLoginBuffer(flush_interval=60, max_size=1)
+        buffer.start()
+        buffer.record(user_id)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if buffer.flushed_total:
+                break
+        await buffer.stop()
+        return buffer.flushed_total
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,186 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from jose import JWTError
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.security import decode_token
+
+# Priority classes, best first
+AUTHENTICATED = 0
+ANONYMOUS = 1
+BATCH = 2
+PRIORITY_NAMES = {AUTHENTICATED: "authenticated", ANONYMOUS: "anonymous", BATCH: "batch"}
+
+
+def request_priority(connection: HTTPConnection) -> int:
+    """
+    Priority class of a chatbot request.
+
+    Callers that mark themselves `X-Chat-Priority: batch` (bulk jobs, prefetch)
+    go last; otherwise a valid access token outranks anonymous traffic. The
+    token is verified so a forged one can't jump the queue.
+    """
+    if connection.headers.get("x-chat-priority", "").lower() == "batch":
+        return BATCH
+    authorization = connection.headers.get("authorization", "")
+    # Browser WebSocket clients can't set headers, so the token may come as a query parameter
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else connection.query_params.get("access_token")
+    if token:
+        try:
+            decode_token(token)
+            return AUTHENTICATED
+        except JWTError:
+            pass
+    return ANONYMOUS
+
+
+class _Waiter:
+    __slots__ = ("priority", "future", "enqueued")
+
+    def __init__(self, priority: int, future: asyncio.Future):
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class AdmissionGate:
+    """
+    Bounded concurrency with a short priority queue in front.
+
+    At most `max_concurrent` requests hold a slot; up to `max_queue` more
+    wait, best priority first (FIFO within a class). A waiter that isn't
+    admitted within its class's queue timeout fails with 503, as does a
+    request arriving to a full queue -- unless it outranks the worst waiter,
+    which is then shed instead. Slots are handed directly to the next waiter
+    on release, so a new arrival can't overtake the queue. A request with a
+    deadline waits no longer than its remaining budget and fails with 504
+    when that runs out first.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeouts: Dict[int, float]):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeouts = queue_timeouts
+        self._active = 0
+        self._heap: List[tuple] = []  # (priority, sequence, waiter)
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._waits = deque(maxlen=1000)
+        self.admitted: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "shed": 0, "deadline": 0}
+
+    def _reject(self, reason: str, detail: str, status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE) -> HTTPException:
+        self.rejected[reason] += 1
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+    def _admit(self, priority: int, waited: float):
+        self._active += 1
+        self.admitted[PRIORITY_NAMES[priority]] += 1
+        self._waits.append(waited)
+
+    def _worst_waiter(self) -> Optional[tuple]:
+        live = [entry for entry in self._heap if not entry[2].future.done()]
+        return max(live, key=lambda entry: (entry[0], entry[1])) if live else None
+
+    async def acquire(self, priority: int, deadline: Optional[Deadline] = None):
+        if deadline is not None and deadline.expired:
+            raise self._reject("deadline", "Request deadline exceeded", status.HTTP_504_GATEWAY_TIMEOUT)
+        if self._active < self.max_concurrent and not self._queued:
+            self._admit(priority, 0.0)
+            return
+
+        if self._queued >= self.max_queue:
+            worst = self._worst_waiter()
+            if worst is None or worst[0] <= priority:
+                raise self._reject("queue_full", "Chatbot is busy, please retry shortly")
+            # Make room by shedding the lowest-priority, most recent waiter
+            worst[2].future.set_exception(self._reject("shed", "Chatbot is busy, please retry shortly"))
+            self._queued -= 1
+
+        if len(self._heap) > 2 * self.max_queue:
+            # Drop entries of waiters that timed out or left; release() only skips those at the top
+            self._heap = [entry for entry in self._heap if not entry[2].future.done()]
+            heapq.heapify(self._heap)
+        waiter = _Waiter(priority, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, (priority, next(self._sequence), waiter))
+        self._queued += 1
+        timeout = self.queue_timeouts[priority]
+        deadline_bound = deadline is not None and deadline.remaining() < timeout
+        if deadline_bound:
+            timeout = deadline.remaining()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queued -= 1
+            elif waiter.future.exception() is None:
+                return  # Admitted at the last moment
+            if deadline_bound:
+                raise self._reject("deadline", "Request deadline exceeded", status.HTTP_504_GATEWAY_TIMEOUT)
+            raise self._reject("queue_timeout", "Chatbot queue wait exceeded, please retry shortly")
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot handed to us meanwhile
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queued -= 1
+            elif waiter.future.exception() is None:
+                self.release()
+            raise
+
+    def release(self):
+        self._active -= 1
+        while self._heap:
+            priority, _, waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue  # Timed out, cancelled or shed
+            self._queued -= 1
+            self._admit(priority, time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+            return
+
+    @asynccontextmanager
+    async def slot(self, priority: int, deadline: Optional[Deadline] = None):
+        await self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        waits = list(self._waits)
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "wait_p50_ms": round(float(np.percentile(waits, 50)) * 1000, 1) if waits else None,
+            "wait_p95_ms": round(float(np.percentile(waits, 95)) * 1000, 1) if waits else None,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+        }
+
+
+chatbot_gate = AdmissionGate(
+    max_concurrent=settings.CHATBOT_MAX_CONCURRENCY,
+    max_queue=settings.CHATBOT_MAX_QUEUE,
+    queue_timeouts={
+        AUTHENTICATED: settings.CHATBOT_QUEUE_TIMEOUT_MS / 1000,
+        ANONYMOUS: settings.CHATBOT_QUEUE_TIMEOUT_MS / 1000,
+        BATCH: settings.CHATBOT_BATCH_QUEUE_TIMEOUT_MS / 1000,
+    },
+)
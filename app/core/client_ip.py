@@ -0,0 +1,44 @@
+import ipaddress
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+TRUST_ANY_PEER = "*" in settings.TRUSTED_PROXIES
+TRUSTED_NETWORKS = [
+    ipaddress.ip_network(entry, strict=False) for entry in settings.TRUSTED_PROXIES if entry != "*"
+]
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_NETWORKS)
+
+
+def client_ip(connection: HTTPConnection) -> Optional[str]:
+    """
+    Address of the client behind any trusted proxies (None when unknown).
+
+    X-Forwarded-For is only believed when the direct peer is a trusted proxy.
+    It is then read right to left, skipping trusted proxies; the first other
+    address is the client. Entries further left were written by the client
+    itself and could be forged, so they are never used.
+    """
+    peer = connection.client.host if connection.client else None
+    if not (TRUST_ANY_PEER or (peer and _is_trusted(peer))):
+        return peer
+    hops = [hop.strip() for header in connection.headers.getlist("x-forwarded-for") for hop in header.split(",")]
+    address = peer
+    for hop in reversed([hop for hop in hops if hop]):
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            break  # Garbage from an untrusted hop; keep the last address a proxy vouched for
+        address = hop
+        if not _is_trusted(hop):
+            break
+    return address
@@ -10,7 +10,39 @@ class Settings:
     API_V1_STR: str = "/api"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))  # Short-lived; renewed via refresh tokens
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+    # Password hashing (run `python -m app.core.hash_calibration` to pick costs for this hardware)
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")  # "bcrypt" or "argon2"
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+    # Token revocation
+    # "package.module:ClassName", empty = in-memory. The in-memory backend is per-process: logout and
+    # refresh-family revocation don't reach other workers, so use a shared backend with more than one
+    TOKEN_REVOCATION_BACKEND: str = os.getenv("TOKEN_REVOCATION_BACKEND", "")
+    TOKEN_REVOCATION_BLOOM_FILTER: bool = os.getenv("TOKEN_REVOCATION_BLOOM_FILTER", "true").lower() == "true"
+
+    # Registered-email Bloom filter for /auth/check-email
+    EMAIL_FILTER_ENABLED: bool = os.getenv("EMAIL_FILTER_ENABLED", "true").lower() == "true"
+    EMAIL_FILTER_ERROR_RATE: float = float(os.getenv("EMAIL_FILTER_ERROR_RATE", "0.001"))  # Target false positive rate
+    EMAIL_FILTER_REFRESH_SECONDS: float = float(os.getenv("EMAIL_FILTER_REFRESH_SECONDS", "30"))  # Max staleness across workers
+
+    # Login throttling (checked before password verification)
+    LOGIN_MAX_FAILURES_PER_IDENTIFIER: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IDENTIFIER", "10"))  # From one IP
+    LOGIN_MAX_FAILURES_PER_IP: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "100"))
+    LOGIN_FAILURE_WINDOW_SECONDS: float = float(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "900"))
+    LOGIN_DELAY_FREE_FAILURES: int = int(os.getenv("LOGIN_DELAY_FREE_FAILURES", "3"))  # Failures before delays start
+    LOGIN_DELAY_BASE_SECONDS: float = float(os.getenv("LOGIN_DELAY_BASE_SECONDS", "0.5"))
+    LOGIN_DELAY_MAX_SECONDS: float = float(os.getenv("LOGIN_DELAY_MAX_SECONDS", "8"))
+    LOGIN_THROTTLE_MAX_KEYS: int = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+
+    # Proxies whose X-Forwarded-For is believed: comma-separated IPs/CIDRs, or "*" to trust
+    # whatever connects directly (a platform edge such as Vercel's). Empty = use the socket peer
+    TRUSTED_PROXIES: list = [entry.strip() for entry in os.getenv("TRUSTED_PROXIES", "").split(",") if entry.strip()]
     
     # CORS settings
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:8000").split(",")
@@ -20,12 +52,69 @@ class Settings:
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    DATABASE_REPLICA_URLS: list = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))  # Reads stay on the primary after a write
+    DB_PREPARE_THRESHOLD: int = int(os.getenv("DB_PREPARE_THRESHOLD", "5"))  # psycopg 3 (postgresql+psycopg://) only
+
+    # Last-login write-behind buffer
+    LAST_LOGIN_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("LAST_LOGIN_FLUSH_INTERVAL_SECONDS", "30"))  # Max staleness
+    LAST_LOGIN_BUFFER_MAX_SIZE: int = int(os.getenv("LAST_LOGIN_BUFFER_MAX_SIZE", "5000"))  # Flush early when reached
+
+    # Auth audit trail (buffered, written in bulk)
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "5"))
+    AUDIT_FLUSH_SIZE: int = int(os.getenv("AUDIT_FLUSH_SIZE", "500"))  # Flush early when this many are queued
+    AUDIT_BUFFER_MAX_SIZE: int = int(os.getenv("AUDIT_BUFFER_MAX_SIZE", "20000"))  # Events beyond this are dropped
+    AUDIT_PARTITION_MONTHS_AHEAD: int = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "2"))
+    AUDIT_PARTITION_CHECK_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_PARTITION_CHECK_INTERVAL_SECONDS", "3600"))
+
+    # Incremental user export: the watermark is moved back by the longest expected write transaction
+    EXPORT_WATERMARK_MARGIN_SECONDS: float = float(os.getenv("EXPORT_WATERMARK_MARGIN_SECONDS", "300"))
+
+    # Bulk user import
+    IMPORT_HASH_WORKERS: int = int(os.getenv("IMPORT_HASH_WORKERS", "0"))  # 0 = one process per CPU
+
+    # Points of interest (CSV or GeoJSON) for /places and local chatbot answers; empty = disabled
+    PLACES_DATASET_PATH: str = os.getenv("PLACES_DATASET_PATH", "")
+    # Directory of .npy files from `python -m app.services.autocomplete`; empty = build from PLACES_DATASET_PATH
+    AUTOCOMPLETE_INDEX_DIR: str = os.getenv("AUTOCOMPLETE_INDEX_DIR", "")
+    # GeoJSON of city/district polygons (or Point centroids) for reverse geocoding; empty = disabled
+    REGIONS_DATASET_PATH: str = os.getenv("REGIONS_DATASET_PATH", "")
+    REVERSE_GEOCODE_CELL_DEGREES: float = float(os.getenv("REVERSE_GEOCODE_CELL_DEGREES", "0.25"))  # Grid bucket size
+    REVERSE_GEOCODE_MAX_CENTROID_KM: float = float(os.getenv("REVERSE_GEOCODE_MAX_CENTROID_KM", "25"))  # Fallback reach
 
     # Groq AI Settings
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY")
     GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama3-8b-8192")  # Default model
     GROQ_MAX_TOKENS: int = int(os.getenv("GROQ_MAX_TOKENS", "1024"))
     GROQ_TEMPERATURE: float = float(os.getenv("GROQ_TEMPERATURE", "1.0"))
+    GROQ_TIMEOUT_SECONDS: float = float(os.getenv("GROQ_TIMEOUT_SECONDS", "10"))
+    # Offer local tools (trip planning) to the model; turn off for models without tool use
+    GROQ_TOOLS_ENABLED: bool = os.getenv("GROQ_TOOLS_ENABLED", "true").lower() == "true"
+    # Models to route between, lightest to heaviest; empty = GROQ_MODEL only
+    GROQ_MODELS: list = [m.strip() for m in os.getenv("GROQ_MODELS", "").split(",") if m.strip()] or [GROQ_MODEL]
+    GROQ_COMPLEXITY_THRESHOLD: float = float(os.getenv("GROQ_COMPLEXITY_THRESHOLD", "0.5"))  # At/above: heavier models
+    GROQ_LATENCY_EWMA_ALPHA: float = float(os.getenv("GROQ_LATENCY_EWMA_ALPHA", "0.2"))
+    GROQ_EXPLORE_SECONDS: float = float(os.getenv("GROQ_EXPLORE_SECONDS", "60"))  # Re-measure idle models this often
+    GROQ_MIN_MAX_TOKENS: int = int(os.getenv("GROQ_MIN_MAX_TOKENS", "96"))  # max_tokens floor; GROQ_MAX_TOKENS is the cap
+    # Hedging: resend if no token arrives within the observed p95 time-to-first-token
+    GROQ_HEDGING_ENABLED: bool = os.getenv("GROQ_HEDGING_ENABLED", "false").lower() == "true"
+    GROQ_HEDGE_BUDGET_PERCENT: float = float(os.getenv("GROQ_HEDGE_BUDGET_PERCENT", "5"))  # Max share of requests hedged
+    GROQ_HEDGE_MIN_DELAY_MS: float = float(os.getenv("GROQ_HEDGE_MIN_DELAY_MS", "250"))
+    GROQ_HEDGE_MIN_SAMPLES: int = int(os.getenv("GROQ_HEDGE_MIN_SAMPLES", "20"))  # TTFT samples before hedging starts
+
+    # Chatbot admission control: concurrent upstream calls, waiters beyond that, and how long they may wait
+    CHATBOT_MAX_CONCURRENCY: int = int(os.getenv("CHATBOT_MAX_CONCURRENCY", "16"))
+    CHATBOT_MAX_QUEUE: int = int(os.getenv("CHATBOT_MAX_QUEUE", "32"))
+    CHATBOT_QUEUE_TIMEOUT_MS: float = float(os.getenv("CHATBOT_QUEUE_TIMEOUT_MS", "2000"))
+    CHATBOT_BATCH_QUEUE_TIMEOUT_MS: float = float(os.getenv("CHATBOT_BATCH_QUEUE_TIMEOUT_MS", "10000"))  # X-Chat-Priority: batch
+    CHATBOT_DEADLINE_MS: float = float(os.getenv("CHATBOT_DEADLINE_MS", "15000"))  # Default and maximum per-request budget
+    CHATBOT_WS_MAX_STREAMS: int = int(os.getenv("CHATBOT_WS_MAX_STREAMS", "4"))  # Concurrent conversations per socket
+    CHATBOT_WS_SEND_QUEUE: int = int(os.getenv("CHATBOT_WS_SEND_QUEUE", "32"))  # Outbound frames buffered per socket
+
+    # Local intent routing: greetings/off-topic/nearest questions are answered without a Groq call
+    INTENT_MODEL_PATH: str = os.getenv("INTENT_MODEL_PATH", "")  # Optional .npz from `python -m app.services.intents`
+    INTENT_MODEL_THRESHOLD: float = float(os.getenv("INTENT_MODEL_THRESHOLD", "0.8"))  # Min model confidence
 
     @property
     def groq_config(self) -> dict:
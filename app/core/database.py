@@ -1,15 +1,38 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import math
+import time
+from typing import List, Optional
+
+from fastapi import Response
+from fastapi.requests import HTTPConnection
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
-# Use NullPool to disable connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=NullPool,  # Disable connection pooling
-    connect_args={"sslmode": "require"}  # Ensure SSL is used
-)
+logger = logging.getLogger(__name__)
+
+
+def make_engine(url: str):
+    """Engine with pooling disabled; SSL is required for PostgreSQL only"""
+    connect_args = {"sslmode": "require"} if url.startswith("postgres") else {}
+    if url.startswith("postgresql+psycopg://"):
+        # psycopg 3 prepares a statement server-side after it runs this many times on one
+        # connection; psycopg2 has no server-side prepares. With NullPool a connection lives
+        # for one request, so this only pays off once connections are pooled.
+        connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD
+    return create_engine(
+        url,
+        poolclass=NullPool,  # Disable connection pooling
+        connect_args=connect_args,
+    )
+
+
+engine = make_engine(settings.DATABASE_URL)
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,18 +40,191 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+
+PRIMARY_PIN_COOKIE = "tripo_primary_pin"
+PRIMARY_PIN_HEADER = "X-Primary-Pin"
+
+
+class ReplicaRouter:
+    """
+    Sends read-only sessions to replicas, round-robin over the healthy ones.
+
+    A background task pings every replica each `health_check_interval`
+    seconds. After a client commits a write, the response carries a signed
+    pin (a cookie, also sent as the `X-Primary-Pin` header for clients that
+    don't keep cookies) that expires after `sticky_seconds`; while a request
+    presents it, its reads go to the primary so it never reads a replica that
+    hasn't caught up yet. The pin travels with the client, so this holds
+    whichever worker or serverless instance serves the read.
+    With no replica configured, every session is a primary session.
+    """
+
+    def __init__(self, urls: List[str], health_check_interval: float, sticky_seconds: float):
+        self.health_check_interval = health_check_interval
+        self.sticky_seconds = sticky_seconds
+        self._engines = [make_engine(url) for url in urls]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self._engines]
+        self._healthy = [True] * len(self._engines)
+        self._cursor = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self._engines)
+
+    def pin_token(self) -> str:
+        """Signed token that keeps the holder's reads on the primary for `sticky_seconds`"""
+        expires = math.ceil(time.time() + self.sticky_seconds)
+        return jwt.encode({"type": "primary_pin", "exp": expires}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    def is_pinned(self, connection: HTTPConnection) -> bool:
+        token = connection.cookies.get(PRIMARY_PIN_COOKIE) or connection.headers.get(PRIMARY_PIN_HEADER)
+        if not token:
+            return False
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            # Expired or forged: read from a replica as usual
+            return False
+        return payload.get("type") == "primary_pin"
+
+    def _next_replica(self) -> Optional[int]:
+        count = len(self._engines)
+        for _ in range(count):
+            index = next(self._cursor) % count
+            if self._healthy[index]:
+                return index
+        return None
+
+    def read_session(self, pinned: bool = False) -> Session:
+        if self._engines:
+            if pinned:
+                self.sticky_reads += 1
+            else:
+                index = self._next_replica()
+                if index is not None:
+                    self.replica_reads += 1
+                    return self._sessions[index]()
+        self.primary_reads += 1
+        return SessionLocal()
+
+    def check_health(self):
+        for index, replica in enumerate(self._engines):
+            try:
+                with replica.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as e:
+                healthy = False
+                if self._healthy[index]:
+                    logger.warning(f"Replica {index} failed its health check: {str(e)}")
+            if healthy and not self._healthy[index]:
+                logger.info(f"Replica {index} is healthy again")
+            self._healthy[index] = healthy
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self._engines),
+            "healthy_replicas": sum(self._healthy),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.to_thread(self.check_health)
+
+    def start(self):
+        """Start the periodic health check on the running event loop"""
+        if self._task is not None or not self._engines:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+replica_router = ReplicaRouter(
+    urls=settings.DATABASE_REPLICA_URLS,
+    health_check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flag_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_to_primary(session):
+    # Picked up by set_primary_pin once the handler returns
+    if session.info.pop("wrote", False) and session.info.get("request_state") is not None:
+        session.info["request_state"].wrote_to_primary = True
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_write_flag(session):
+    session.info.pop("wrote", None)
+
+
 # Dependency to get a database session
-def get_db():
-    """Provide a database session for dependency injection."""
+def get_db(connection: HTTPConnection):
+    """Provide a primary database session for dependency injection."""
     db = SessionLocal()
+    # Commits made through this session pin the client's reads to the primary
+    db.info["request_state"] = connection.state
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(connection: HTTPConnection):
+    """Provide a session for read-only handlers: a replica unless the client just wrote."""
+    db = replica_router.read_session(replica_router.is_pinned(connection))
     try:
         yield db
     finally:
         db.close()
 
+
+def set_primary_pin(request: HTTPConnection, response: Response):
+    """Hand the client a primary pin if this request committed a write"""
+    if not getattr(request.state, "wrote_to_primary", False) or not replica_router.has_replicas:
+        return
+    token = replica_router.pin_token()
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        token,
+        max_age=math.ceil(replica_router.sticky_seconds),
+        httponly=True,
+        secure=settings.ENVIRONMENT != "development",
+        samesite="lax",
+    )
+    response.headers[PRIMARY_PIN_HEADER] = token
+
+
 # Test the database connection
 try:
     with engine.connect() as connection:
         print("Database connection successful!")
 except Exception as e:
-    print(f"Database connection failed: {e}")
\ No newline at end of file
+    print(f"Database connection failed: {e}")
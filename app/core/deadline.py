@@ -0,0 +1,66 @@
+import math
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+# Remaining time budget the caller (usually the gateway) gives this request, in milliseconds
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+
+def deadline_exceeded() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request deadline exceeded")
+
+
+class Deadline:
+    """
+    The point in time (monotonic clock) by which a request's work must be done.
+
+    Created once per request and passed down, so the admission queue, the
+    retry loop and every upstream call all spend the same budget instead of
+    each applying its own timeout.
+    """
+
+    def __init__(self, seconds: float):
+        self.at = time.monotonic() + seconds
+
+    @classmethod
+    def from_budget_ms(cls, budget_ms: Optional[object]) -> "Deadline":
+        """
+        Deadline from a caller-supplied budget, never longer than CHATBOT_DEADLINE_MS.
+
+        Missing, malformed, negative or non-finite (nan, inf) budgets get the
+        configured default.
+        """
+        default = settings.CHATBOT_DEADLINE_MS
+        try:
+            budget = float(budget_ms) if budget_ms is not None else default
+        except (TypeError, ValueError):
+            budget = default
+        if not math.isfinite(budget) or budget < 0:
+            budget = default
+        return cls(min(budget, default) / 1000)
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for one blocking step: the remaining budget, at most `cap`"""
+        return min(cap, self.remaining())
+
+    def check(self):
+        """Raise 504 if the deadline has passed"""
+        if self.expired:
+            raise deadline_exceeded()
+
+
+def request_deadline(connection: HTTPConnection) -> Deadline:
+    """Deadline for an HTTP request from its X-Request-Timeout-Ms header or the default"""
+    return Deadline.from_budget_ms(connection.headers.get(DEADLINE_HEADER))
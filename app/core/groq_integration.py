@@ -1,34 +1,124 @@
+import itertools
+import json
 import logging
+import queue
+import threading
 import time  # Add this import
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 from groq import Groq, APIStatusError
 from app.models.chatbot.conversation import Conversation
 from app.core.config import settings
+from app.core.deadline import Deadline, deadline_exceeded
 from app.schemas.chatbot.chat import UserInput
+from app.services.hedging import hedge_policy
+from app.services.model_router import RouteDecision, model_router
+from app.services.trips import plan_named_trip
+from app.utils.chat_helpers import OFF_TOPIC_REPLY, format_trip_answer
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Threads that open hedged streams and wait for their first chunk
+_stream_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="groq-stream")
+
+
+def _close_stream(stream):
+    """Abort an in-flight completion stream (closes its HTTP response)"""
+    try:
+        stream.close()
+    except Exception:
+        pass
+
+
+class CancelToken:
+    """Lets another thread abort an in-flight completion stream by closing it"""
+
+    def __init__(self):
+        self._stream = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def attach(self, stream) -> bool:
+        """Keep the stream so cancel() can close it; False if already cancelled"""
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._stream = stream
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            stream = self._stream
+        if stream is not None:
+            _close_stream(stream)
+
+
+class _StreamAttempt(CancelToken):
+    """One upstream request of a possibly hedged call, up to its first chunk"""
+
+    def __init__(self, decision: RouteDecision):
+        super().__init__()
+        self.decision = decision
+        self.started = time.monotonic()
+        self.chunks: Optional[Iterator] = None
+        self.error: Optional[Exception] = None
+
+
 class GroqService:
     SYSTEM_PROMPT = {
         "role": "system",
         "content": (
             "You're a helpful map and navigation assistant for Tripo. "
             "Provide concise answers (2 sentences max) with emojis when appropriate. "
-            "For non-map questions, politely respond: "
-            "'I specialize in location assistance. For other queries, please contact Tripo support.' 🗺️"
+            f"For non-map questions, politely respond: '{OFF_TOPIC_REPLY}'"
         )
     }
 
+    # Local tools the model may call instead of generating an answer itself
+    TOOLS = [
+        {
+            "type": "function",
+            "function": {
+                "name": "plan_trip",
+                "description": (
+                    "Order the places of a multi-stop trip to minimise total travel distance. "
+                    "Use whenever the user wants to visit several places and asks for an order or route."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "stops": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Place names to visit; the first is the starting point",
+                        },
+                        "round_trip": {
+                            "type": "boolean",
+                            "description": "Whether to return to the starting point",
+                        },
+                    },
+                    "required": ["stops"],
+                },
+            },
+        }
+    ]
+
     def __init__(self):
         self._validate_config()
         self.client = Groq(
             api_key=settings.GROQ_API_KEY,
-            timeout=10.0
+            timeout=settings.GROQ_TIMEOUT_SECONDS,
+            max_retries=0,  # Retries happen in get_response, within the request deadline
         )
         self.model = settings.GROQ_MODEL
         self.max_retries = 3
-        logger.info("GroqService initialized with model: %s", self.model)
+        logger.info("GroqService initialized with models: %s", ", ".join(model_router.models))
 
     def _validate_config(self):
         """Validate required configuration"""
@@ -40,32 +130,50 @@ class GroqService:
             logger.warning("Using default Groq model")
             settings.GROQ_MODEL = "llama3-8b-8192"
 
-    def _initialize_conversation(self, user_message: str) -> List[Dict[str, str]]:
+    def _initialize_conversation(self, user_message: str, location: Optional[str] = None) -> List[Dict[str, str]]:
         """Create conversation context with system prompt"""
-        return [
-            self.SYSTEM_PROMPT,
-            {"role": "user", "content": user_message}
-        ]
+        messages = [self.SYSTEM_PROMPT]
+        if location:
+            messages.append({"role": "system", "content": f"The user is currently in {location}."})
+        messages.append({"role": "user", "content": user_message})
+        return messages
 
-    def get_response(self, user_input: UserInput) -> str:
+    def get_response(
+        self, user_input: UserInput, location: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Get AI response with error handling and retries
         Args:
             user_input: Validated user input containing message
+            location: Optional reverse-geocoded place name added to the prompt
+            deadline: Request deadline; every attempt, backoff and upstream
+                timeout fits inside it (default CHATBOT_DEADLINE_MS from now)
         Returns:
             str: Generated response
         Raises:
-            HTTPException: For client-facing errors
+            HTTPException: For client-facing errors (504 once the deadline passes)
         """
+        deadline = deadline or Deadline.from_budget_ms(None)
+        failed_model = None
         for attempt in range(self.max_retries):
+            deadline.check()
+            # Re-routed on every attempt; a retry avoids the model that just failed when it can
+            decision = model_router.choose(user_input.message, exclude=failed_model)
             try:
-                response = self._call_groq_api(user_input.message)
+                response = self._call_groq_api(user_input.message, location, decision, deadline)
                 logger.debug("Successfully generated response")
                 return response
-                
+
+            except HTTPException:
+                raise
             except APIStatusError as e:
+                model_router.observe_failure(decision)
+                failed_model = decision.model
                 if e.status_code == 429:  # Rate limit
                     wait_time = 2 ** attempt
+                    if wait_time >= deadline.remaining():
+                        # The retry couldn't finish in time; stop now rather than after the sleep
+                        raise deadline_exceeded()
                     logger.warning(f"Rate limited. Retry {attempt+1} in {wait_time}s")
                     time.sleep(wait_time)
                     continue
@@ -75,6 +183,9 @@ class GroqService:
                     detail="AI service temporarily unavailable"
                 )
             except Exception as e:
+                model_router.observe_failure(decision)
+                if deadline.expired:
+                    raise deadline_exceeded()
                 logger.error(f"Unexpected error: {str(e)}")
                 raise HTTPException(
                     status_code=500,
@@ -86,26 +197,246 @@ class GroqService:
             detail="AI service overloaded. Please try again later"
         )
 
-    def _call_groq_api(self, message: str) -> str:
-        """Make actual API call with streaming"""
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            messages=self._initialize_conversation(message),
+    def stream_response(
+        self,
+        user_input: UserInput,
+        location: Optional[str] = None,
+        token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """
+        Yield the answer as it streams from the model (blocking; run it in a thread).
+
+        Routing, retries and the deadline work as in get_response, but a retry
+        only happens before anything was yielded. Cancelling `token` closes
+        the upstream stream and ends the iteration quietly.
+        Raises:
+            HTTPException: For client-facing errors (504 once the deadline passes)
+        """
+        token = token or CancelToken()
+        deadline = deadline or Deadline.from_budget_ms(None)
+        failed_model = None
+        for attempt in range(self.max_retries):
+            deadline.check()
+            decision = model_router.choose(user_input.message, exclude=failed_model)
+            started = time.monotonic()
+            emitted = False
+            try:
+                stream = self._create_stream(user_input.message, location, decision, deadline)
+                if not token.attach(stream):
+                    _close_stream(stream)
+                    return
+                outcome: Dict[str, Optional[str]] = {}
+                parts = []
+                for delta in self._iter_stream(self._first_chunk(stream, started), outcome, deadline):
+                    emitted = True
+                    parts.append(delta)
+                    yield delta
+                    if token.cancelled:
+                        return
+                answer = outcome.get("tool_answer") or "".join(parts)
+                model_router.observe(decision, time.monotonic() - started, answer, truncated=outcome.get("finish_reason") == "length")
+                return
+            except HTTPException:
+                token.cancel()
+                raise
+            except Exception as e:
+                if token.cancelled:
+                    return  # Closing the stream made the pending read fail
+                model_router.observe_failure(decision)
+                failed_model = decision.model
+                if deadline.expired:
+                    raise deadline_exceeded()
+                if isinstance(e, APIStatusError) and e.status_code == 429 and not emitted:
+                    wait_time = 2 ** attempt
+                    if wait_time >= deadline.remaining():
+                        raise deadline_exceeded()
+                    logger.warning(f"Rate limited. Retry {attempt+1} in {wait_time}s")
+                    time.sleep(wait_time)
+                    continue
+                logger.error(f"Groq streaming error: {str(e)}")
+                if isinstance(e, APIStatusError):
+                    raise HTTPException(status_code=502, detail="AI service temporarily unavailable")
+                raise HTTPException(status_code=500, detail="Failed to generate response")
+
+        raise HTTPException(
+            status_code=503,
+            detail="AI service overloaded. Please try again later"
+        )
+
+    def _call_groq_api(self, message: str, location: Optional[str], decision: RouteDecision, deadline: Deadline) -> str:
+        """
+        Make actual API call with streaming on the routed model; its latency feeds back into routing.
+
+        With hedging on, a second request goes out if no token has arrived
+        within the p95 time-to-first-token (budget permitting), and whichever
+        streams first is used. The upstream stream is closed as soon as the
+        deadline passes.
+        """
+        delay = hedge_policy.delay()
+        if delay is not None and delay >= deadline.remaining():
+            delay = None  # A hedge couldn't start before the deadline
+        handle = CancelToken()
+        try:
+            if delay is None:
+                started = time.monotonic()
+                stream = self._create_stream(message, location, decision, deadline)
+                handle.attach(stream)
+                chunks = self._first_chunk(stream, started)
+            else:
+                # Cancels its own attempts if it fails; the winner's stream is ours to close from here
+                handle = self._hedged_stream(message, location, decision, delay, deadline)
+                decision, started, chunks = handle.decision, handle.started, handle.chunks
+            response, finish_reason = self._process_stream(chunks, deadline)
+        except BaseException:
+            handle.cancel()
+            raise
+        model_router.observe(decision, time.monotonic() - started, response, truncated=finish_reason == "length")
+        return response
+
+    def _create_stream(self, message: str, location: Optional[str], decision: RouteDecision, deadline: Deadline):
+        deadline.check()
+        return self.client.chat.completions.create(
+            model=decision.model,
+            messages=self._initialize_conversation(message, location),
             temperature=settings.GROQ_TEMPERATURE,
-            max_tokens=settings.GROQ_MAX_TOKENS,
+            max_tokens=decision.max_tokens,
             top_p=1,
             stream=True,
             stop=None,
+            **({"tools": self.TOOLS, "tool_choice": "auto"} if settings.GROQ_TOOLS_ENABLED else {}),
+            # Connect/read timeout for this attempt: whatever is left of the request's budget
+            timeout=deadline.timeout(settings.GROQ_TIMEOUT_SECONDS),
         )
-        return self._process_stream(completion)
 
-    def _process_stream(self, completion) -> str:
-        """Process streaming response efficiently"""
-        response = []
+    def _first_chunk(self, stream, started: float) -> Iterator:
+        """
+        Wait for the first chunk and return an iterator over all of them.
+
+        Time-to-first-token is recorded here, at the first raw chunk (which
+        may carry a tool call rather than text), for every request path, so
+        the hedge delay is built from one kind of sample.
+        """
+        iterator = iter(stream)
+        first = next(iterator, None)
+        hedge_policy.observe_ttft(time.monotonic() - started)
+        return iterator if first is None else itertools.chain([first], iterator)
+
+    def _run_attempt(
+        self, attempt: _StreamAttempt, message: str, location: Optional[str], deadline: Deadline, ready: queue.Queue
+    ):
+        try:
+            stream = self._create_stream(message, location, attempt.decision, deadline)
+            if not attempt.attach(stream):
+                _close_stream(stream)
+                return
+            attempt.chunks = self._first_chunk(stream, attempt.started)
+        except Exception as e:
+            if attempt.cancelled:
+                return  # Closing the stream makes the pending read fail; nobody is waiting for it
+            attempt.error = e
+        ready.put(attempt)
+
+    def _hedged_stream(
+        self, message: str, location: Optional[str], decision: RouteDecision, delay: float, deadline: Deadline
+    ) -> _StreamAttempt:
+        """The attempt that streamed first; the other one, if any, is cancelled"""
+        ready: queue.Queue = queue.Queue()
+        attempts = [_StreamAttempt(decision)]
+        _stream_pool.submit(self._run_attempt, attempts[0], message, location, deadline, ready)
+        finished: List[_StreamAttempt] = []
+        try:
+            try:
+                finished.append(ready.get(timeout=delay))
+            except queue.Empty:
+                if hedge_policy.try_hedge():
+                    hedge = _StreamAttempt(model_router.choose(message, exclude=decision.model))
+                    logger.info(
+                        "Hedging chatbot request",
+                        extra={"primary_model": decision.model, "hedge_model": hedge.decision.model, "delay_ms": round(delay * 1000)},
+                    )
+                    attempts.append(hedge)
+                    _stream_pool.submit(self._run_attempt, hedge, message, location, deadline, ready)
+
+            # An attempt that failed outright doesn't win while the other may still answer
+            while not any(attempt.error is None for attempt in finished):
+                if len(finished) == len(attempts):
+                    raise finished[0].error
+                try:
+                    finished.append(ready.get(timeout=deadline.timeout(settings.GROQ_TIMEOUT_SECONDS)))
+                except queue.Empty:
+                    if deadline.expired:
+                        raise deadline_exceeded() from None
+                    raise TimeoutError("No response from the AI service") from None
+        except BaseException:
+            for attempt in attempts:
+                attempt.cancel()
+            raise
+
+        winner = next(attempt for attempt in finished if attempt.error is None)
+        for attempt in attempts:
+            if attempt is winner:
+                continue
+            attempt.cancel()
+            if attempt not in finished:
+                # Censored sample: the loser had produced nothing by now, so it was at least this slow
+                waited = time.monotonic() - attempt.started
+                hedge_policy.observe_ttft(waited)
+                model_router.observe_latency(attempt.decision, waited)
+        if winner is not attempts[0]:
+            hedge_policy.record_hedge_win()
+        return winner
+
+    def _process_stream(self, completion, deadline: Optional[Deadline] = None) -> Tuple[str, Optional[str]]:
+        """Process streaming response efficiently; a tool call is answered locally. Returns (text, finish reason)"""
+        outcome: Dict[str, Optional[str]] = {}
+        response = list(self._iter_stream(completion, outcome, deadline))
+        if outcome.get("tool_answer") is not None:
+            return outcome["tool_answer"], outcome.get("finish_reason")
+        return "".join(response), outcome.get("finish_reason")
+
+    def _iter_stream(
+        self, completion, outcome: Dict[str, Optional[str]], deadline: Optional[Deadline] = None
+    ) -> Iterator[str]:
+        """
+        Yield text deltas as they arrive; a tool call's local answer comes last.
+
+        Fills outcome["finish_reason"] and, after a tool call, outcome["tool_answer"].
+        Raises a 504 HTTPException between chunks once `deadline` passes (the
+        read timeout alone can't stop a stream that keeps trickling).
+        """
+        tool_calls: Dict[int, Dict[str, str]] = {}
         for chunk in completion:
-            if content := chunk.choices[0].delta.content:
-                response.append(content)
-        return "".join(response)
+            if deadline is not None and deadline.expired:
+                raise deadline_exceeded()
+            choice = chunk.choices[0]
+            delta = choice.delta
+            outcome["finish_reason"] = getattr(choice, "finish_reason", None) or outcome.get("finish_reason")
+            if content := delta.content:
+                yield content
+            # Tool call name/arguments may arrive split across chunks
+            for call in getattr(delta, "tool_calls", None) or []:
+                pending = tool_calls.setdefault(call.index, {"name": "", "arguments": ""})
+                if call.function.name:
+                    pending["name"] += call.function.name
+                if call.function.arguments:
+                    pending["arguments"] += call.function.arguments
+        if tool_calls:
+            outcome["tool_answer"] = self._run_tool(**tool_calls[min(tool_calls)])
+            yield outcome["tool_answer"]
+
+    def _run_tool(self, name: str, arguments: str) -> str:
+        """Execute a tool call from the model and phrase its result"""
+        try:
+            args = json.loads(arguments or "{}")
+        except json.JSONDecodeError:
+            args = {}
+        if name == "plan_trip":
+            stops = [str(stop) for stop in args.get("stops") or []]
+            logger.info("Answering with local tool", extra={"tool": name, "stops": len(stops)})
+            return format_trip_answer(plan_named_trip(stops, bool(args.get("round_trip"))))
+        logger.warning(f"Model called unknown tool {name!r}")
+        raise ValueError(f"Unknown tool {name}")
 
     def health_check(self) -> bool:
         """Check if service is operational"""
@@ -0,0 +1,94 @@
+"""
+Benchmark password hashing on this machine and recommend a cost for a target latency.
+
+Usage:
+    python -m app.core.hash_calibration --target-ms 250
+    python -m app.core.hash_calibration --scheme argon2 --target-ms 300 --memory-cost 65536 --parallelism 4
+
+Prints the settings to put in .env (BCRYPT_ROUNDS, or ARGON2_TIME_COST with
+the given memory/parallelism). Run it on the hardware you deploy to; the right
+cost depends on the CPU and on how many logins a worker must serve.
+"""
+import argparse
+import statistics
+import time
+
+from passlib.hash import argon2, bcrypt
+
+SAMPLE_PASSWORD = "Calibrat1on!password"
+
+
+def time_hash(handler, samples: int) -> float:
+    """Median seconds per hash; the first call is a warm-up"""
+    handler.hash(SAMPLE_PASSWORD)
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash(SAMPLE_PASSWORD)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def calibrate_bcrypt(target: float, samples: int, min_rounds: int = 10, max_rounds: int = 16):
+    """Each extra round doubles the cost; stop at the first setting above the target"""
+    results = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        duration = time_hash(bcrypt.using(rounds=rounds), samples)
+        results.append((rounds, duration))
+        if duration > target:
+            break
+    return results
+
+
+def calibrate_argon2(target: float, samples: int, memory_cost: int, parallelism: int, max_time_cost: int = 10):
+    results = []
+    for time_cost in range(1, max_time_cost + 1):
+        duration = time_hash(
+            argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism), samples
+        )
+        results.append((time_cost, duration))
+        if duration > target:
+            break
+    return results
+
+
+def recommend(results, target: float):
+    """Highest cost within the target, or the cheapest measured one if none fits"""
+    within = [cost for cost, duration in results if duration <= target]
+    return max(within) if within else results[0][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250, help="Target time per hash in milliseconds")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per setting")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=4, help="argon2 lanes")
+    args = parser.parse_args()
+
+    target = args.target_ms / 1000
+    if args.scheme == "bcrypt":
+        results = calibrate_bcrypt(target, args.samples)
+        label = "rounds"
+    else:
+        results = calibrate_argon2(target, args.samples, args.memory_cost, args.parallelism)
+        label = "time_cost"
+
+    print(f"{label:>10}  {'ms/hash':>8}  {'hashes/s/core':>13}")
+    for cost, duration in results:
+        print(f"{cost:>10}  {duration * 1000:>8.1f}  {1 / duration:>13.1f}")
+
+    chosen = recommend(results, target)
+    print(f"\nRecommended for a {args.target_ms:.0f} ms target:")
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    if args.scheme == "bcrypt":
+        print(f"BCRYPT_ROUNDS={chosen}")
+    else:
+        print(f"ARGON2_TIME_COST={chosen}")
+        print(f"ARGON2_MEMORY_COST={args.memory_cost}")
+        print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,166 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Create logs directory if it doesn't exist
 logs_dir = Path("logs")
 logs_dir.mkdir(exist_ok=True)
 
+# Request id of the request being handled, set by the middleware in main.py
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+# Client address of the request being handled, set by the same middleware
+client_ip_var: ContextVar[Optional[str]] = ContextVar("client_ip", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request_id and extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request id on the record while still on the request's thread/task"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records; higher levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueue records for the listener thread instead of doing I/O inline.
+
+    The queue is bounded; when it is full the record is dropped and counted
+    rather than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render message and traceback now: args and exc_info may not survive the thread hop
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener = None
+_queue_handler: NonBlockingQueueHandler = None
+
+
 # Configure logging
 def setup_logging():
+    global _listener, _queue_handler
     log_level = os.getenv("LOG_LEVEL", "INFO").upper()  # Get log level from environment variable
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            RotatingFileHandler(
-                os.path.join("logs", "app.log"),
-                maxBytes=5 * 1024 * 1024,  # 5 MB
-                backupCount=5  # Keep 5 backup files
-            )
-        ]
+    log_format = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+    debug_sample_rate = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))  # Fraction of DEBUG records kept
+    queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler = RotatingFileHandler(
+        os.path.join("logs", "app.log"),
+        maxBytes=5 * 1024 * 1024,  # 5 MB
+        backupCount=5  # Keep 5 backup files
     )
-    
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    # Request threads only enqueue; the listener thread does the stdout/file I/O
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.setLevel(log_level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    _queue_handler = queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(queue_handler.queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
     # Setup specific loggers
     logger = logging.getLogger("tripo")  # Change to your project name
     logger.setLevel(logging.DEBUG)
-    
+
     return logger
 
+
+def stop_logging():
+    """Drain queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_log_records() -> int:
+    """Records discarded because the log queue was full"""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
 # Create logger instance
 logger = setup_logging()
 
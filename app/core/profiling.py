@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+
+# Leaf frames of threads that are parked rather than doing work, as (module, function).
+# Matched on the module too, so application code with the same function names still shows up
+IDLE_FRAMES = {
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"),
+    ("selectors", "select"),
+    ("socket", "accept"),
+    ("concurrent.futures.thread", "_worker"),
+    ("asyncio.base_events", "run_forever"),
+    ("asyncio.base_events", "_run_once"),
+}
+
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{module}:{name}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over all live threads.
+
+    A background thread snapshots every thread's stack via sys._current_frames()
+    at a fixed interval and aggregates them into collapsed stacks
+    ("thread;outer;...;inner count"), the input format of flamegraph.pl and
+    speedscope. Overhead is one stack walk per thread per interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> Optional[str]:
+        """Sample for `seconds` and return collapsed stacks, or None if a profile is already running"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self._collapse(self._sample(seconds, interval, include_idle))
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Counter:
+        stacks: Counter = Counter()
+        own_thread = threading.get_ident()
+        thread_names = {}
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            if len(thread_names) != threading.active_count():
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+
+            time.sleep(interval)
+        return stacks
+
+    @staticmethod
+    def _collapse(stacks: Counter) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+class MemoryTracker:
+    """Start/stop tracemalloc at runtime and diff snapshots against a baseline"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._take_snapshot()
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        # Leave out tracemalloc's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def diff(self, limit: int = 20, key_type: str = "lineno", reset_baseline: bool = False) -> Optional[dict]:
+        """Top allocation sites by growth since the baseline, or None when not tracing"""
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._baseline is None:
+                return None
+            snapshot = self._take_snapshot()
+            stats = snapshot.compare_to(self._baseline, key_type)
+            if reset_baseline:
+                self._baseline = snapshot
+            current, peak = tracemalloc.get_traced_memory()
+
+        return {
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size_kb": round(stat.size / 1024, 1),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+sampling_profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
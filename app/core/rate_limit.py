@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+class SlidingWindowCounter:
+    """
+    Approximate sliding-window event counter per key.
+
+    Each key keeps only (window start, current count, previous count); the
+    sliding count is current + previous weighted by how much of the previous
+    window still overlaps. Keys are kept in LRU order and the least recently
+    used ones are evicted beyond `max_keys`, so memory is bounded.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _roll(self, key: str, now: float) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        elapsed_windows = int((now - entry[0]) // self.window)
+        if elapsed_windows >= 1:
+            # Previous window is the one just finished, or empty if more than one passed
+            entry[2] = entry[1] if elapsed_windows == 1 else 0
+            entry[1] = 0
+            entry[0] += elapsed_windows * self.window
+        return entry
+
+    def _estimate(self, entry: list, now: float) -> float:
+        overlap = 1 - (now - entry[0]) / self.window
+        return entry[1] + entry[2] * max(0.0, overlap)
+
+    def add(self, key: str, now: Optional[float] = None) -> float:
+        """Count one event for key and return the sliding count including it"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            entry = self._roll(key, now)
+            if entry is None:
+                entry = [now, 0, 0]
+                self._entries[key] = entry
+                if len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            entry[1] += 1
+            return self._estimate(entry, now)
+
+    def count(self, key: str, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            entry = self._roll(key, now)
+            return self._estimate(entry, now) if entry else 0.0
+
+    def reset(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LoginThrottle:
+    """
+    Failed-login limiter consulted before any password hashing.
+
+    Failures are counted per (identifier, client IP) pair and per client IP.
+    Once either is over its limit, attempts are rejected outright. The hard
+    limit is per pair so that failures from one address can't lock the
+    account out for everyone else. Failures are also counted per bare
+    identifier (username/email/phone): they earn a growing delay that the
+    caller awaits without blocking the event loop, which still slows an
+    attack spread over many addresses.
+    """
+
+    def __init__(
+        self,
+        max_identifier_failures: int,
+        max_ip_failures: int,
+        window: float,
+        free_failures: int,
+        base_delay: float,
+        max_delay: float,
+        max_keys: int,
+    ):
+        self.max_identifier_failures = max_identifier_failures
+        self.max_ip_failures = max_ip_failures
+        self.free_failures = free_failures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self._identifiers = SlidingWindowCounter(window, max_keys)
+        self._pairs = SlidingWindowCounter(window, max_keys)
+        self._ips = SlidingWindowCounter(window, max_keys)
+        self.rejected_total = 0
+        self.delayed_total = 0
+        self.failures_total = 0
+
+    @staticmethod
+    def _identifier_key(identifier: str) -> str:
+        return identifier.strip().lower()
+
+    def _pair_key(self, identifier: str, ip: str) -> str:
+        return f"{self._identifier_key(identifier)}|{ip}"
+
+    def check(self, identifier: str, ip: str) -> Optional[int]:
+        """Seconds the client should wait if the attempt must be rejected, else None"""
+        if (self._pairs.count(self._pair_key(identifier, ip)) >= self.max_identifier_failures
+                or self._ips.count(ip) >= self.max_ip_failures):
+            self.rejected_total += 1
+            return int(self.window)
+        return None
+
+    def delay_for(self, identifier: str) -> float:
+        """Progressive delay: doubles with each failure past the free ones, capped at max_delay"""
+        failures = self._identifiers.count(self._identifier_key(identifier))
+        excess = int(failures) - self.free_failures
+        if excess < 0:
+            return 0.0
+        self.delayed_total += 1
+        return min(self.base_delay * (2 ** excess), self.max_delay)
+
+    def record_failure(self, identifier: str, ip: str):
+        self.failures_total += 1
+        self._identifiers.add(self._identifier_key(identifier))
+        self._pairs.add(self._pair_key(identifier, ip))
+        self._ips.add(ip)
+
+    def record_success(self, identifier: str, ip: str):
+        self._identifiers.reset(self._identifier_key(identifier))
+        self._pairs.reset(self._pair_key(identifier, ip))
+
+    def stats(self) -> dict:
+        return {
+            "rejected_total": self.rejected_total,
+            "delayed_total": self.delayed_total,
+            "failures_total": self.failures_total,
+            "tracked_identifiers": len(self._identifiers),
+            "tracked_identifier_ips": len(self._pairs),
+            "tracked_ips": len(self._ips),
+        }
+
+
+login_throttle = LoginThrottle(
+    max_identifier_failures=settings.LOGIN_MAX_FAILURES_PER_IDENTIFIER,
+    max_ip_failures=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+    free_failures=settings.LOGIN_DELAY_FREE_FAILURES,
+    base_delay=settings.LOGIN_DELAY_BASE_SECONDS,
+    max_delay=settings.LOGIN_DELAY_MAX_SECONDS,
+    max_keys=settings.LOGIN_THROTTLE_MAX_KEYS,
+)
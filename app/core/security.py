@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
+import logging
+import time
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,14 +10,42 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from .config import settings
 from ..models.user import User
-from ..core.database import get_db
+from ..models.queries import user_by_username
+from ..core.database import get_db, get_read_db, SessionLocal
+from .token_revocation import get_revocation_backend
+
+def _build_pwd_context() -> CryptContext:
+    """
+    The configured scheme hashes new passwords; the other one is kept only to
+    verify existing hashes and is marked deprecated, so needs_update() flags
+    those hashes (and bcrypt hashes below BCRYPT_ROUNDS) for rehashing.
+    """
+    schemes = [settings.PASSWORD_HASH_SCHEME]
+    other = "argon2" if settings.PASSWORD_HASH_SCHEME == "bcrypt" else "bcrypt"
+    if other == "bcrypt" or argon2_available():
+        schemes.append(other)
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+def argon2_available() -> bool:
+    """argon2 needs the optional argon2-cffi package"""
+    try:
+        import argon2  # noqa: F401
+        return True
+    except ImportError:
+        return False
 
 # Password hashing context
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+pwd_context = _build_pwd_context()
+
+logger = logging.getLogger(__name__)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -27,6 +58,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a stored password against a provided password."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash uses a deprecated scheme or weaker parameters than configured."""
+    return pwd_context.needs_update(hashed_password)
+
+def rehash_password(user_id, plain_password: str, old_hash: str):
+    """
+    Store a hash with the current scheme/cost. Runs as a background task after
+    the login response is sent; skipped if the password changed meanwhile.
+    """
+    new_hash = pwd_context.hash(plain_password)
+    db = SessionLocal()
+    try:
+        # updated_at is pinned so the onupdate hook doesn't treat a rehash as a profile change
+        db.query(User).filter(User.id == user_id, User.hashed_password == old_hash).update(
+            {User.hashed_password: new_hash, User.updated_at: User.updated_at}, synchronize_session=False
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Password rehash failed")
+    finally:
+        db.close()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new access token."""
     to_encode = data.copy()
@@ -36,11 +90,86 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
-    to_encode.update({"exp": expire})
+    # jti lets a single token be revoked
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+def create_refresh_token(data: dict, family: Optional[str] = None) -> str:
+    """
+    Create a refresh token.
+
+    Tokens rotated from the same login share a family id (`fam`), so reuse of
+    an already-rotated refresh token can revoke the whole chain.
+    """
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({
+        "exp": expire,
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+        "type": "refresh",
+    })
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def create_token_pair(user: User, family: Optional[str] = None) -> Tuple[str, str]:
+    """Access and refresh token for a user; the access token carries the refresh family."""
+    family = family or uuid.uuid4().hex
+    access_token = create_access_token(data={"sub": user.username, "email": user.email, "fam": family})
+    refresh_token = create_refresh_token({"sub": user.username}, family=family)
+    return access_token, refresh_token
+
+def decode_token(token: str, expected_type: str = "access") -> dict:
+    """Verify signature, expiry, token type and revocation. Raises JWTError if any check fails."""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    # Tokens issued before refresh support have no type and are access tokens
+    if payload.get("type", "access") != expected_type:
+        raise JWTError("Wrong token type")
+    if is_token_revoked(payload):
+        raise JWTError("Token revoked")
+    return payload
+
+def verify_refresh_token(token: str) -> dict:
+    """
+    Validate a refresh token for rotation. Presenting one that was already
+    rotated means it leaked, so its whole family is revoked. Raises JWTError.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("type") != "refresh":
+        raise JWTError("Wrong token type")
+
+    backend = get_revocation_backend()
+    if backend.is_revoked(payload["jti"]):
+        revoke_token(token, revoke_family=True)
+        raise JWTError("Refresh token reuse detected")
+    if backend.is_revoked(payload["fam"]):
+        raise JWTError("Token revoked")
+    return payload
+
+def consume_refresh_token(token: str, payload: dict):
+    """
+    Spend a verified refresh token. Check and revoke are one backend operation,
+    so of two concurrent refreshes with the same token only one succeeds; the
+    other is treated as reuse. Raises JWTError.
+    """
+    if not get_revocation_backend().consume(payload["jti"], payload["exp"]):
+        revoke_token(token, revoke_family=True)
+        raise JWTError("Refresh token reuse detected")
+
+def is_token_revoked(payload: dict) -> bool:
+    """O(1) denylist check on the token id and its refresh family"""
+    backend = get_revocation_backend()
+    jti, family = payload.get("jti"), payload.get("fam")
+    return bool((jti and backend.is_revoked(jti)) or (family and backend.is_revoked(family)))
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     """Decode JWT token and return current user."""
+    return _user_from_token(token, db)
+
+def get_current_user_for_read(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
+    """Like get_current_user, but loads the user through the read session (a replica unless the client just wrote)."""
+    return _user_from_token(token, db)
+
+def _user_from_token(token: str, db: Session) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -49,7 +178,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     
     try:
         # Decode JWT
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token, expected_type="access")
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -57,7 +186,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
 
     # Get user from database
-    user = db.query(User).filter(User.username == username).first()
+    user = db.execute(user_by_username(username)).scalars().first()
     if user is None:
         raise credentials_exception
     
@@ -70,7 +199,29 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         
     return user
 
-# Optional: Function to revoke tokens (implement as needed)
-def revoke_token(token: str):
-    # Logic to revoke the token
-    pass
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Return the current user if they have the admin role."""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+def revoke_token(token: str, revoke_family: bool = False) -> bool:
+    """
+    Revoke a token until it expires. With `revoke_family`, every token from the
+    same refresh chain is revoked too. Returns False for invalid or expired tokens.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return False
+
+    backend = get_revocation_backend()
+    if payload.get("jti"):
+        backend.revoke(payload["jti"], payload["exp"])
+    if revoke_family and payload.get("fam"):
+        # The family outlives any single token; keep it for a full refresh lifetime
+        backend.revoke(payload["fam"], time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+    return True
@@ -0,0 +1,146 @@
+import importlib
+from abc import ABC, abstractmethod
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationBackend(ABC):
+    """
+    Denylist of token ids (`jti`) and refresh-token families (`fam`).
+
+    Entries only need to live until the token they revoke expires. The default
+    backend is per-process: a logout or family revocation on one worker is not
+    seen by the others. Set TOKEN_REVOCATION_BACKEND to a shared
+    implementation (e.g. Redis-backed) when running several workers or on
+    serverless instances.
+    """
+
+    @abstractmethod
+    def revoke(self, token_id: str, expires_at: float):
+        ...
+
+    @abstractmethod
+    def consume(self, token_id: str, expires_at: float) -> bool:
+        """
+        Revoke token_id unless it already is, atomically (SETNX-style).
+
+        True if this call revoked it. Single-use refresh tokens rely on this:
+        of two concurrent refreshes with the same token only one gets True.
+        """
+        ...
+
+    @abstractmethod
+    def is_revoked(self, token_id: str) -> bool:
+        ...
+
+
+class InMemoryRevocationBackend(RevocationBackend):
+    """
+    Dict of token id -> expiry timestamp with lazy purging.
+
+    With `use_bloom_filter`, lookups first consult a Bloom filter of revoked
+    ids, so the common "not revoked" answer skips the dict entirely. The
+    filter is rebuilt whenever expired entries are purged.
+    """
+
+    def __init__(self, use_bloom_filter: bool = True, purge_interval: float = 60.0):
+        self.use_bloom_filter = use_bloom_filter
+        self.purge_interval = purge_interval
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._next_purge = time.time() + purge_interval
+        if use_bloom_filter:
+            self._bloom = BloomFilter(capacity=1024)
+
+    def revoke(self, token_id: str, expires_at: float):
+        with self._lock:
+            self._entries[token_id] = max(expires_at, self._entries.get(token_id, 0))
+            if self._bloom is not None:
+                if len(self._entries) > self._bloom.capacity:
+                    self._rebuild_bloom()
+                else:
+                    self._bloom.add(token_id)
+
+    def consume(self, token_id: str, expires_at: float) -> bool:
+        with self._lock:
+            if self._entries.get(token_id, 0) > time.time():
+                return False
+            self._entries[token_id] = expires_at
+            if self._bloom is not None:
+                if len(self._entries) > self._bloom.capacity:
+                    self._rebuild_bloom()
+                else:
+                    self._bloom.add(token_id)
+            return True
+
+    def is_revoked(self, token_id: str) -> bool:
+        now = time.time()
+        if now >= self._next_purge:
+            self.purge(now)
+
+        if self._bloom is not None and token_id not in self._bloom:
+            return False
+        expires_at = self._entries.get(token_id)
+        return expires_at is not None and expires_at > now
+
+    def purge(self, now: Optional[float] = None):
+        """Drop entries whose token has expired anyway"""
+        now = now or time.time()
+        with self._lock:
+            self._next_purge = now + self.purge_interval
+            expired = [token_id for token_id, expires_at in self._entries.items() if expires_at <= now]
+            for token_id in expired:
+                del self._entries[token_id]
+            if expired and self._bloom is not None:
+                self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        # Size for twice the current entries so the filter isn't rebuilt on every revoke
+        bloom = BloomFilter(capacity=max(1024, 2 * len(self._entries)))
+        for token_id in self._entries:
+            bloom.add(token_id)
+        self._bloom = bloom
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _load_backend() -> RevocationBackend:
+    """Instantiate TOKEN_REVOCATION_BACKEND ("package.module:ClassName") or the in-memory default"""
+    path = settings.TOKEN_REVOCATION_BACKEND
+    if not path:
+        if settings.ENVIRONMENT != "development":
+            logger.warning(
+                "Token revocation is per-process; set TOKEN_REVOCATION_BACKEND to a shared backend "
+                "if more than one worker or instance serves requests"
+            )
+        return InMemoryRevocationBackend(use_bloom_filter=settings.TOKEN_REVOCATION_BLOOM_FILTER)
+
+    module_name, _, class_name = path.partition(":")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    # Fail at startup, not on the first login: the class must implement the whole interface
+    if not (isinstance(backend_class, type) and issubclass(backend_class, RevocationBackend)):
+        raise TypeError(f"TOKEN_REVOCATION_BACKEND {path} is not a RevocationBackend subclass")
+    logger.info(f"Using token revocation backend {path}")
+    return backend_class()  # TypeError here if it leaves an abstract method unimplemented
+
+
+revocation_backend: RevocationBackend = _load_backend()
+
+
+def set_revocation_backend(backend: RevocationBackend):
+    """Swap the revocation backend at runtime (e.g. from a startup hook)"""
+    global revocation_backend
+    revocation_backend = backend
+
+
+def get_revocation_backend() -> RevocationBackend:
+    return revocation_backend
@@ -1,11 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .routes import auth, health
-from .core.logging import logger
-from .core.database import Base, engine
+from .core.client_ip import client_ip
+from .routes import auth, health, admin, debug, places
+from .core.logging import client_ip_var, logger, request_id_var
+from .core.database import Base, engine, replica_router, set_primary_pin
+from .services.audit import audit_buffer
+from .services.email_filter import email_filter
+from .services.geocoding import load_region_index
+from .services.intents import load_intent_model
+from .services.last_login import last_login_buffer
+from .services.autocomplete import load_autocomplete_index
+from .services.places import load_place_index
+from .services.user_import import shutdown_hash_pool
 from dotenv import load_dotenv
+import asyncio
 import os
+import uuid
 
 load_dotenv()
 
@@ -21,6 +32,10 @@ app = FastAPI(
         {
             "name": "Authentication",
             "description": "User registration and login endpoints",
+        },
+        {
+            "name": "Places",
+            "description": "Nearby points of interest and offline reverse geocoding",
         }
     ]
 )
@@ -34,9 +49,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request id correlation: every log record emitted while handling a request carries its id
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    ip_token = client_ip_var.set(client_ip(request))
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+        client_ip_var.reset(ip_token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+# Read-your-writes: a request that committed a write pins the client's next reads to the primary
+@app.middleware("http")
+async def primary_pin_middleware(request: Request, call_next):
+    response = await call_next(request)
+    set_primary_pin(request, response)
+    return response
+
 # Database setup
 Base.metadata.create_all(bind=engine)
 
+# Strong references to startup background tasks: the event loop only keeps weak ones
+_background_tasks: set = set()
+
+def _run_in_background(function):
+    """Run a blocking loader in a thread without holding up startup; failures are logged"""
+    task = asyncio.create_task(asyncio.to_thread(function))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+
+def _background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task failed: {task.exception()!r}")
+
 @app.get("/", include_in_schema=False)
 async def root():
     return {"message": "Tripo API Service - See /docs for API documentation"}
@@ -52,6 +102,9 @@ app.include_router(
 
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["Authentication"])
 app.include_router(health.router, prefix=settings.API_V1_STR, tags=["Health"])
+app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["Admin"])
+app.include_router(debug.router, prefix=settings.API_V1_STR, tags=["Admin"])
+app.include_router(places.router, prefix=settings.API_V1_STR, tags=["Places"])
 
 # Event handlers with error logging
 @app.on_event("startup")
@@ -61,6 +114,19 @@ async def startup_event():
         logger.info(f"Environment: {settings.ENVIRONMENT}")
         logger.info(f"Allowed Origins: {settings.ALLOWED_ORIGINS}")
         logger.info(f"Chatbot Model: {settings.GROQ_MODEL}")
+        last_login_buffer.start()
+        replica_router.start()
+        # Also creates the upcoming audit partitions, now and periodically
+        audit_buffer.start()
+        if settings.EMAIL_FILTER_ENABLED:
+            # Built off the event loop, then refreshed with other workers' signups;
+            # check-email queries the database until it is ready
+            email_filter.start()
+        # Place lookups answer 503 (and the chatbot defers to the model) until this finishes
+        _run_in_background(load_place_index)
+        _run_in_background(load_autocomplete_index)
+        _run_in_background(load_region_index)
+        await asyncio.to_thread(load_intent_model)
     except Exception as e:
         logger.error(f"Startup error: {str(e)}")
         raise
@@ -68,6 +134,12 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Gracefully shutting down Tripo API")
+    # Flush buffered last_login timestamps before the process exits
+    await last_login_buffer.stop()
+    await replica_router.stop()
+    await audit_buffer.stop()
+    await email_filter.stop()
+    shutdown_hash_pool()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,3 +1,3 @@
 from ..core.database import Base
 from .user import User, UserProfile
-
+from .audit import AuthAuditEvent
@@ -0,0 +1,52 @@
+import uuid
+from datetime import date
+from sqlalchemy import Column, String, DateTime, Index, DDL, event
+from sqlalchemy.dialects.postgresql import UUID
+from ..core.database import Base
+
+class AuthAuditEvent(Base):
+    """
+    Append-only trail of authentication events.
+
+    On PostgreSQL the table is range-partitioned by month on occurred_at, so
+    time-bounded queries only touch the matching partitions and old months can
+    be detached or dropped wholesale. The partition key has to be part of the
+    primary key, hence (occurred_at, id).
+    """
+    __tablename__ = "auth_audit_events"
+
+    occurred_at = Column(DateTime, primary_key=True, nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String(32), nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=True)  # No FK: the trail outlives the users it mentions
+    identifier = Column(String(100), nullable=True)  # What the client typed (username/email/phone)
+    ip = Column(String(45), nullable=True)
+    request_id = Column(String(64), nullable=True)
+    detail = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_auth_audit_events_user_id_occurred_at", "user_id", "occurred_at"),
+        Index("ix_auth_audit_events_event_type_occurred_at", "event_type", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+
+def month_partition_ddl(month: date) -> str:
+    """CREATE statement for the partition holding the calendar month of `month`"""
+    start = month.replace(day=1)
+    end = date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS auth_audit_events_{start:%Y_%m} PARTITION OF auth_audit_events "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+# A partitioned table accepts no rows without partitions; the default one catches
+# anything outside the monthly partitions created by migrations / ensure_partitions
+event.listen(
+    AuthAuditEvent.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS auth_audit_events_default PARTITION OF auth_audit_events DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,43 @@
+"""
+Hot lookups used on every login / authenticated request, as lambda statements.
+
+A lambda statement is analysed once: later calls reuse the cached statement
+and its compiled SQL, only substituting the closure variables as bound
+parameters, instead of rebuilding a Query and compiling it each time.
+Run them with `db.execute(...).scalars().first()`.
+"""
+from sqlalchemy import func, lambda_stmt, or_, select
+
+from .user import User, UserProfile
+
+
+def user_by_login_identifier(identifier: str):
+    """User whose username or (case-insensitive) email matches what was typed into login"""
+    email = identifier.lower()
+    return lambda_stmt(
+        lambda: select(User).where(or_(func.lower(User.email) == email, User.username == identifier)).limit(1)
+    )
+
+
+def user_by_phone(phone: str):
+    return lambda_stmt(lambda: select(User).where(User.phone == phone).limit(1))
+
+
+def user_by_username(username: str):
+    return lambda_stmt(lambda: select(User).where(User.username == username).limit(1))
+
+
+def user_by_id(user_id):
+    return lambda_stmt(lambda: select(User).where(User.id == user_id))
+
+
+def profile_by_user_id(user_id):
+    return lambda_stmt(lambda: select(UserProfile).where(UserProfile.user_id == user_id).limit(1))
+
+
+def user_by_reset_otp(email: str, otp: str):
+    email = email.lower()
+    return lambda_stmt(
+        lambda: select(User).where(func.lower(User.email) == email, User.reset_password_otp == otp).limit(1)
+    )
+
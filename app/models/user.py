@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -9,9 +9,11 @@ class User(Base):
     """Core user identity and authentication"""
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    username = Column(String(50), unique=True, index=True, nullable=False)
-    email = Column(String(100), unique=True, index=True, nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Uniqueness is enforced by ix_users_username_pattern below
+    username = Column(String(50), nullable=False)
+    # Uniqueness is enforced case-insensitively by ix_users_email_lower_pattern below
+    email = Column(String(100), nullable=False)
     hashed_password = Column(String(255), nullable=False)
     first_name = Column(String(50), nullable=True)
     last_name = Column(String(50), nullable=True)
@@ -19,10 +21,10 @@ class User(Base):
     # country = Column(String(100), nullable=True)
     phone = Column(String(20), unique=True, index=True, nullable=True)
     
-    # Status flags
-    is_active = Column(Boolean, default=False, index=True)
-    is_verified = Column(Boolean, default=False, index=True)
-    profile_completed = Column(Boolean, default=False, index=True)
+    # Status flags (low selectivity, deliberately not indexed)
+    is_active = Column(Boolean, default=False)
+    is_verified = Column(Boolean, default=False)
+    profile_completed = Column(Boolean, default=False)
     
     # Verification system
     verification_code = Column(String(6), nullable=True)
@@ -33,15 +35,41 @@ class User(Base):
     reset_password_otp_expires = Column(DateTime, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, server_default=func.now(), index=True)
-    updated_at = Column(DateTime, onupdate=func.now(), index=True)
-    last_login = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+    last_login = Column(DateTime, nullable=True)
     
     # Role management
-    role = Column(String(20), default='user', index=True)
+    role = Column(String(20), default='user')
     
     # Relationship to profile
     profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
+
+
+# Targeted indexes for the queries we actually run (see migrations 9c1f4e7a2b3d, e41b6d0c8a57).
+# The *_pattern_ops classes serve both equality lookups and LIKE 'prefix%' search.
+Index(
+    "ix_users_username_pattern",
+    User.username,
+    unique=True,
+    postgresql_ops={"username": "varchar_pattern_ops"},
+)
+Index(
+    "ix_users_email_lower_pattern",
+    func.lower(User.email).label("email_lower"),
+    unique=True,
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
+# Keyset pagination order for the admin user listing
+Index("ix_users_created_at_id", User.created_at, User.id)
+Index(
+    "ix_users_unverified_created_at",
+    User.created_at,
+    postgresql_where=text("NOT is_verified"),
+    sqlite_where=text("NOT is_verified"),
+)
+
+
 class UserProfile(Base):
     """Simplified user profile with only country information"""
     __tablename__ = "user_profiles"
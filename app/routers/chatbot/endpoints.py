@@ -1,8 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
+from starlette.websockets import WebSocketState
+from pydantic import ValidationError
 from app.schemas.chatbot.chat import UserInput
-from app.core.groq_integration import GroqService
-from typing import Optional
+from app.core.admission import chatbot_gate, request_priority
+from app.core.config import settings
+from app.core.deadline import Deadline, request_deadline
+from app.core.groq_integration import CancelToken, GroqService
+from app.services import intents
+from app.services.intents import intent_router
+from app.services.geocoding import region_index
+from app.services.places import place_index
+from app.services.trips import plan_trip
+from app.utils.chat_helpers import (
+    GREETING_REPLY, OFF_TOPIC_REPLY, THANKS_REPLY,
+    format_nearest_answer, format_trip_answer, parse_nearest_query,
+)
+from typing import Dict, Optional, Tuple
+import asyncio
+import concurrent.futures
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/chatbot",
@@ -10,12 +30,19 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# Intents answered with a fixed reply, never reaching the model
+TEMPLATE_REPLIES = {
+    intents.GREETING: GREETING_REPLY,
+    intents.THANKS: THANKS_REPLY,
+    intents.OFF_TOPIC: OFF_TOPIC_REPLY,
+}
+
 # Initialize service
 try:
     groq_service = GroqService()
-    print("✅ GroqService initialized successfully")  # Debug print
+    logger.info("GroqService initialized successfully")
 except Exception as e:
-    print(f"❌ GroqService init failed: {e}")  # Debug print
+    logger.error(f"GroqService init failed: {e}")
     groq_service = None
 
 @router.post(
@@ -49,21 +76,227 @@ except Exception as e:
         }
     }
 )
-async def get_chat_response(user_input: UserInput):
+async def get_chat_response(user_input: UserInput, request: Request):
     """
     Processes user queries and returns AI-generated responses.
     
     - **role**: Must be 'user'
     - **message**: Your location-related question
+    - **latitude** / **longitude**: Optional device location; "nearest X"
+      questions are then answered from the local place index without an AI call,
+      and other questions get the resolved city/district added to the prompt
+    - **stops** / **round_trip**: Optional trip stops (first = start); the
+      visiting order is computed locally and returned without an AI call
+
+    Greetings, thanks and off-topic requests are recognised locally and get
+    a fixed reply; only navigation questions reach the AI model. Those are
+    admitted through a bounded priority queue (signed-in users first,
+    `X-Chat-Priority: batch` last) and fail fast with 503 when it is full or
+    the wait is too long. An `X-Request-Timeout-Ms` header (capped at the
+    configured default) bounds the whole request -- queueing, retries and
+    upstream calls -- and a request past it fails with 504.
     """
+    local = await _local_answer(user_input)
+    if local is not None:
+        return local
+
     if not groq_service:
         raise HTTPException(
             status_code=503,
             detail="Chatbot service unavailable (check server logs)"
         )
-    
+
+    location = _location_hint(user_input)
+    intent_router.record("groq")
+    deadline = request_deadline(request)
+    # Bounded upstream concurrency; the blocking Groq call runs off the event loop
+    async with chatbot_gate.slot(request_priority(request), deadline):
+        try:
+            response = await asyncio.to_thread(groq_service.get_response, user_input, location=location, deadline=deadline)
+            return {"response": response}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _local_answer(user_input: UserInput) -> Optional[dict]:
+    """Answer without the AI model when possible: trip ordering, fixed replies, nearest place"""
+    if user_input.stops:
+        intent_router.record("trip")
+        plan = await asyncio.to_thread(
+            plan_trip,
+            [stop.latitude for stop in user_input.stops],
+            [stop.longitude for stop in user_input.stops],
+            user_input.round_trip,
+        )
+        plan["stops"] = [user_input.stops[index].model_dump() for index in plan["order"]]
+        return {"response": format_trip_answer(plan), "trip": plan}
+
+    intent = intent_router.classify(user_input.message)
+    if intent in TEMPLATE_REPLIES:
+        intent_router.record(intent)
+        return {"response": TEMPLATE_REPLIES[intent]}
+
+    if intent == intents.NEAREST and user_input.latitude is not None and user_input.longitude is not None and place_index.ready:
+        category = parse_nearest_query(user_input.message, place_index.categories)
+        if category:
+            intent_router.record(intents.NEAREST)
+            places = place_index.nearby(user_input.latitude, user_input.longitude, category=category, k=3)
+            return {"response": format_nearest_answer(category, places), "places": places}
+    return None
+
+
+def _location_hint(user_input: UserInput) -> Optional[str]:
+    """City/district of the sent coordinates, for the prompt"""
+    if user_input.latitude is None or user_input.longitude is None or not region_index.ready:
+        return None
+    region = region_index.reverse(user_input.latitude, user_input.longitude)
+    return ", ".join(region["hierarchy"]) if region else None
+
+
+def _put_from_thread(loop: asyncio.AbstractEventLoop, outbound: asyncio.Queue, frame: dict, token: CancelToken) -> bool:
+    """
+    Queue a frame from a worker thread, blocking while the socket's send queue
+    is full (a slow reader thereby stalls the upstream read). False if the
+    generation was cancelled meanwhile.
+    """
+    future = asyncio.run_coroutine_threadsafe(outbound.put(frame), loop)
+    while True:
+        try:
+            future.result(timeout=0.1)
+            return True
+        except concurrent.futures.TimeoutError:
+            if token.cancelled:
+                future.cancel()
+                return False
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """
+    Persistent chat channel: one connection, many concurrent conversations.
+
+    Client frames (JSON):
+    - `{"type": "message", "conversation_id": "a", "message": "...", ...}` with
+      the same optional fields as POST /response (latitude, longitude, stops)
+      and an optional `timeout_ms` deadline for that answer
+    - `{"type": "cancel", "conversation_id": "a"}` stops that generation upstream
+
+    Server frames carry the conversation_id: `delta` (`content`) while the
+    model streams, then one of `done` (`response`, plus `places`/`trip` for
+    local answers), `cancelled` or `error` (`status`, `detail`). Frames of
+    different conversations interleave. Signed-in priority needs the access
+    token in the Authorization header or an `access_token` query parameter.
+    When the client disconnects or a send fails, every generation is
+    cancelled and the socket is closed.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    priority = request_priority(websocket)
+    # Bounded: when the client reads slowly, producers block here instead of buffering
+    outbound: asyncio.Queue = asyncio.Queue(maxsize=settings.CHATBOT_WS_SEND_QUEUE)
+    conversations: Dict[str, Tuple[asyncio.Task, CancelToken]] = {}
+
+    async def send_frames():
+        while True:
+            await websocket.send_json(await outbound.get())
+
+    async def converse(conversation_id: str, user_input: UserInput, token: CancelToken, deadline: Deadline):
+        try:
+            local = await _local_answer(user_input)
+            if local is not None:
+                await outbound.put({"type": "done", "conversation_id": conversation_id, **local})
+                return
+            if not groq_service:
+                raise HTTPException(status_code=503, detail="Chatbot service unavailable (check server logs)")
+
+            location = _location_hint(user_input)
+            intent_router.record("groq")
+
+            def pump() -> str:
+                parts = []
+                for delta in groq_service.stream_response(user_input, location=location, token=token, deadline=deadline):
+                    parts.append(delta)
+                    frame = {"type": "delta", "conversation_id": conversation_id, "content": delta}
+                    if not _put_from_thread(loop, outbound, frame, token):
+                        token.cancel()
+                        break
+                return "".join(parts)
+
+            async with chatbot_gate.slot(priority, deadline):
+                response = await asyncio.to_thread(pump)
+            if token.cancelled:
+                await outbound.put({"type": "cancelled", "conversation_id": conversation_id})
+            else:
+                await outbound.put({"type": "done", "conversation_id": conversation_id, "response": response})
+        except HTTPException as e:
+            await outbound.put({"type": "error", "conversation_id": conversation_id, "status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Chat socket generation failed: {e}")
+            await outbound.put({"type": "error", "conversation_id": conversation_id, "status": 500, "detail": "Failed to generate response"})
+        finally:
+            conversations.pop(conversation_id, None)
+
+    async def send_error(conversation_id: Optional[str], status_code: int, detail):
+        await outbound.put({"type": "error", "conversation_id": conversation_id, "status": status_code, "detail": detail})
+
+    async def receive_frames():
+        try:
+            while True:
+                try:
+                    frame = json.loads(await websocket.receive_text())
+                    if not isinstance(frame, dict):
+                        raise ValueError
+                except ValueError:
+                    await send_error(None, 400, "Frames must be JSON objects")
+                    continue
+
+                conversation_id = str(frame.get("conversation_id") or "")
+                if not conversation_id:
+                    await send_error(None, 400, "conversation_id is required")
+                elif frame.get("type") == "cancel":
+                    if conversation_id in conversations:
+                        conversations[conversation_id][1].cancel()
+                elif frame.get("type") != "message":
+                    await send_error(conversation_id, 400, "Unknown frame type")
+                elif conversation_id in conversations:
+                    await send_error(conversation_id, 409, "This conversation is still answering")
+                elif len(conversations) >= settings.CHATBOT_WS_MAX_STREAMS:
+                    await send_error(conversation_id, 429, "Too many concurrent conversations on this connection")
+                else:
+                    try:
+                        user_input = UserInput.model_validate({"role": "user", **frame})
+                    except ValidationError as e:
+                        await send_error(conversation_id, 422, e.errors(include_url=False, include_context=False))
+                        continue
+                    token = CancelToken()
+                    # Started here so time spent queued counts against the budget
+                    deadline = Deadline.from_budget_ms(frame.get("timeout_ms"))
+                    conversations[conversation_id] = (
+                        asyncio.create_task(converse(conversation_id, user_input, token, deadline)),
+                        token,
+                    )
+        except WebSocketDisconnect:
+            pass
+
+    receiver = asyncio.create_task(receive_frames())
+    sender = asyncio.create_task(send_frames())
     try:
-        response = groq_service.get_response(user_input)
-        return {"response": response}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        # The sender only finishes by failing; either way the connection is done
+        done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Chat socket closed after a failure: {task.exception()!r}")
+    finally:
+        # Stop every upstream generation, then the receive and send loops
+        for task, token in list(conversations.values()):
+            token.cancel()
+            task.cancel()
+        receiver.cancel()
+        sender.cancel()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass  # The transport is already gone
@@ -0,0 +1,296 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import io
+import tempfile
+import uuid
+
+from ..core.admission import chatbot_gate
+from ..core.database import get_db, replica_router
+from ..core.logging import dropped_log_records
+from ..core.rate_limit import login_throttle
+from ..core.security import get_current_admin_user
+from ..models.audit import AuthAuditEvent
+from ..models.user import User
+from ..schemas.admin import AdminUserItem, AdminUserPage, AuditEventItem, AuditEventPage, UserImportResult
+from ..services import autocomplete
+from ..services.audit import audit_buffer
+from ..services.email_filter import email_filter
+from ..services.last_login import last_login_buffer
+from ..services.geocoding import region_index
+from ..services.hedging import hedge_policy
+from ..services.intents import intent_router
+from ..services.model_router import model_router
+from ..services.places import place_index
+from ..services.user_export import build_export_query, open_export, resolve_columns, stream_export
+from ..services.user_import import UserImporter
+from ..utils.pagination import LIKE_ESCAPE, decode_cursor, encode_cursor, estimate_row_count, like_prefix
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    responses={401: {"description": "Unauthorized"}, 403: {"description": "Forbidden"}},
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+
+@router.get("/metrics")
+async def metrics():
+    """In-process counters and gauges of this worker"""
+    return {
+        "login_throttle": login_throttle.stats(),
+        "last_login_buffer": last_login_buffer.stats(),
+        "email_filter": email_filter.stats(),
+        "database_routing": replica_router.stats(),
+        "audit": audit_buffer.stats(),
+        "places": place_index.stats(),
+        "autocomplete": autocomplete.autocomplete_index.stats() if autocomplete.autocomplete_index else None,
+        "regions": region_index.stats(),
+        "chat_intents": intent_router.stats(),
+        "model_routing": model_router.stats(),
+        "hedging": hedge_policy.stats(),
+        "chatbot_admission": chatbot_gate.stats(),
+        "logging": {"dropped_records": dropped_log_records()},
+    }
+
+
+@router.get("/users", response_model=AdminUserPage)
+def list_users(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=100,
+        description="Username prefix (case-sensitive) or email prefix (case-insensitive)",
+    ),
+    estimate_total: bool = Query(False, description="Include a planner-based estimate of matching rows"),
+    db: Session = Depends(get_db),
+):
+    """
+    List users newest first using keyset pagination on (created_at, id).
+
+    Each page is an index range scan from the cursor position, so page cost
+    doesn't grow with depth the way OFFSET does. A plain def: the queries
+    block, so FastAPI runs it in the threadpool.
+
+    `q` matches usernames as stored, like login does (usernames are unique
+    case-sensitively and ix_users_username_pattern indexes them unfolded),
+    and emails case-insensitively through ix_users_email_lower_pattern.
+    (SQLite's LIKE ignores ASCII case, so local runs fold usernames too.)
+    """
+    filters = []
+    if role is not None:
+        filters.append(User.role == role)
+    if is_active is not None:
+        filters.append(User.is_active == is_active)
+    if is_verified is not None:
+        filters.append(User.is_verified == is_verified)
+    if q:
+        filters.append(or_(
+            User.username.like(like_prefix(q), escape=LIKE_ESCAPE),
+            func.lower(User.email).like(like_prefix(q.lower()), escape=LIKE_ESCAPE),
+        ))
+
+    statement = select(User).where(*filters)
+
+    estimated_total = None
+    if estimate_total:
+        estimated_total = estimate_row_count(db, statement) if filters else estimate_row_count(db, table_name="users")
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        statement = statement.where(tuple_(User.created_at, User.id) < tuple_(cursor_created_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists
+    users = db.execute(
+        statement.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+
+    return AdminUserPage(
+        items=[
+            AdminUserItem(
+                id=str(user.id),
+                username=user.username,
+                email=user.email,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                phone=user.phone,
+                role=user.role,
+                is_active=user.is_active,
+                is_verified=user.is_verified,
+                profile_completed=user.profile_completed,
+                created_at=user.created_at,
+                last_login=user.last_login,
+            )
+            for user in users
+        ],
+        next_cursor=next_cursor,
+        estimated_total=estimated_total,
+    )
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Timestamp columns are naive UTC; normalise aware datetimes to match"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns; defaults to all exportable columns"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Only rows changed after this watermark (use X-Export-Watermark of the previous export)"
+    ),
+):
+    """
+    Stream users joined with their profiles as NDJSON or CSV.
+
+    Rows come from a server-side cursor in fixed-size batches, so memory stays
+    bounded regardless of table size. The X-Export-Watermark response header
+    is the export snapshot's database time minus a safety margin; pass it as
+    updated_since next time for an incremental export (rows near the boundary
+    may be exported twice, so upsert by id).
+    """
+    try:
+        selected_columns = resolve_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    statement = build_export_query(
+        selected_columns, _as_naive_utc(updated_since) if updated_since else None
+    )
+    # Watermark and rows share one snapshot; the header has to go out before the rows
+    connection, watermark = await run_in_threadpool(open_export)
+    watermark = _as_naive_utc(watermark)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_export(connection, statement, selected_columns, format),
+        media_type=media_type,
+        # Covers a client that leaves before the body starts (the generator never runs)
+        background=BackgroundTask(connection.close),
+        headers={
+            "X-Export-Watermark": watermark.isoformat(),
+            "Content-Disposition": f'attachment; filename="users.{format}"',
+        },
+    )
+
+
+@router.post("/users/import", response_model=UserImportResult)
+async def import_users(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    mark_verified: bool = Query(False, description="Import accounts as active and verified"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+):
+    """
+    Bulk-create users from a CSV (with header) or NDJSON request body.
+
+    Each row needs email, password, first_name and last_name and is validated
+    with the same rules as /auth/signup/initial. Passwords are hashed in a
+    process pool and rows are loaded with COPY on Postgres. Invalid or
+    duplicate rows are reported in `rejects` without failing the import.
+    """
+    # Spool the body (to disk past 8 MB) so parsing runs off the event loop with bounded memory
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        importer = UserImporter(mark_verified=mark_verified, batch_size=batch_size)
+        try:
+            result = await run_in_threadpool(importer.run, stream, format)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be UTF-8 encoded")
+        finally:
+            stream.detach()
+
+    return UserImportResult(**result)
+
+
+@router.get("/audit", response_model=AuditEventPage)
+def list_audit_events(
+    since: Optional[datetime] = Query(None, description="Start of the time range (default: 24 hours ago)"),
+    until: Optional[datetime] = Query(None, description="End of the time range (default: now)"),
+    event_type: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    identifier: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
+):
+    """
+    Auth audit events in a time range, newest first, keyset-paginated on (occurred_at, id).
+
+    The range is always bounded so PostgreSQL only scans the monthly
+    partitions it overlaps. Events are written in batches, so the last few
+    seconds may not be visible yet. A plain def so the query runs in the
+    threadpool, not on the event loop.
+    """
+    until = _as_naive_utc(until) if until else datetime.utcnow()
+    since = _as_naive_utc(since) if since else until - timedelta(hours=24)
+    if since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+
+    filters = [AuthAuditEvent.occurred_at >= since, AuthAuditEvent.occurred_at < until]
+    if event_type is not None:
+        filters.append(AuthAuditEvent.event_type == event_type)
+    if user_id is not None:
+        filters.append(AuthAuditEvent.user_id == user_id)
+    if identifier is not None:
+        filters.append(AuthAuditEvent.identifier == identifier)
+    if cursor:
+        try:
+            cursor_occurred_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        filters.append(
+            tuple_(AuthAuditEvent.occurred_at, AuthAuditEvent.id) < tuple_(cursor_occurred_at, cursor_id)
+        )
+
+    events = db.execute(
+        select(AuthAuditEvent)
+        .where(*filters)
+        .order_by(AuthAuditEvent.occurred_at.desc(), AuthAuditEvent.id.desc())
+        .limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].occurred_at, events[-1].id)
+
+    return AuditEventPage(
+        items=[
+            AuditEventItem(
+                id=str(event.id),
+                occurred_at=event.occurred_at,
+                event_type=event.event_type,
+                user_id=str(event.user_id) if event.user_id else None,
+                identifier=event.identifier,
+                ip=event.ip,
+                request_id=event.request_id,
+                detail=event.detail,
+            )
+            for event in events
+        ],
+        next_cursor=next_cursor,
+    )
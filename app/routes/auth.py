@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
 import random
 import string
 
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from ..core.security import get_password_hash
 from ..models.user import User
 from ..schemas.password import ForgotPasswordRequest, ResetPasswordRequest, StepCompletionResponse
@@ -13,10 +18,36 @@ from ..core.security import get_password_hash
 from ..models.user import User
 
 from ..core.database import get_db
-from ..core.security import verify_password, create_access_token, get_password_hash, get_current_user
+from ..core.security import (
+    verify_password,
+    consume_refresh_token,
+    create_token_pair,
+    get_password_hash,
+    get_current_user,
+    get_current_user_for_read,
+    oauth2_scheme,
+    password_needs_rehash,
+    rehash_password,
+    revoke_token,
+    verify_refresh_token,
+)
 from ..core.config import settings
+from ..core.client_ip import client_ip
+from ..core.rate_limit import login_throttle
 from ..models.user import User, UserProfile
-from ..schemas.auth import LoginResponse, TokenData
+from ..models.queries import (
+    profile_by_user_id,
+    user_by_id,
+    user_by_login_identifier,
+    user_by_phone,
+    user_by_reset_otp,
+    user_by_username,
+)
+from ..services import audit
+from ..services.audit import audit_buffer
+from ..services.email_filter import email_filter
+from ..services.last_login import last_login_buffer
+from ..schemas.auth import LoginResponse, TokenData, RefreshTokenRequest, SyncResponse
 from ..schemas.user import (
     UserResponseData, 
     UserResponse, 
@@ -30,6 +61,8 @@ from ..schemas.user import (
 )
 
 
+logger = logging.getLogger(__name__)
+
 # reset password added 
 
 router = APIRouter(
@@ -38,6 +71,17 @@ router = APIRouter(
     responses={401: {"description": "Unauthorized"}}
 )
 
+def _log_issued_code(event: str, user: User, code: str):
+    """
+    Codes are never logged in production: logs are readable by more people
+    than the inbox. Email sending is still disabled, so in development the
+    code is logged (in the message, so text logs show it too) to make signup
+    and password reset usable.
+    """
+    logger.info(event, extra={"email": user.email, "user_id": user.id})
+    if settings.ENVIRONMENT == "development":
+        logger.info(f"{event} (development only): {code} for {user.email}")
+
 @router.post(
     "/signup/initial", 
     response_model=StepCompletionResponse,
@@ -48,7 +92,7 @@ async def initial_signup(user_data: InitialSignup, db: Session = Depends(get_db)
     """First step: Create an account with email, name, and password"""
     try:
         # Check if email already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = db.query(User).filter(func.lower(User.email) == user_data.email.lower()).first()
         
         if existing_user:
             raise HTTPException(
@@ -88,9 +132,11 @@ async def initial_signup(user_data: InitialSignup, db: Session = Depends(get_db)
         db.add(user)
         db.commit()
         db.refresh(user)
+        email_filter.add(user.email)
+        audit_buffer.record(audit.SIGNUP, user.id, user.email)
         
         # Send verification email/SMS (mock implementation for now)
-        print(f"VERIFICATION CODE for {user.email}: {verification_code}")
+        _log_issued_code("Verification code issued", user, verification_code)
         
         return StepCompletionResponse(
             message="Account created. Please verify your email.",
@@ -101,9 +147,7 @@ async def initial_signup(user_data: InitialSignup, db: Session = Depends(get_db)
 
     except Exception as e:
         db.rollback()
-        print(f"Error in initial_signup: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in initial_signup")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -112,7 +156,7 @@ async def initial_signup(user_data: InitialSignup, db: Session = Depends(get_db)
 @router.post("/verify-email", response_model=StepCompletionResponse)
 async def verify_email(verification: VerifyEmail, db: Session = Depends(get_db)):
     """Verify user's email with OTP code"""
-    user = db.query(User).filter(User.id == verification.user_id).first()
+    user = db.execute(user_by_id(verification.user_id)).scalars().first()
     
     if not user:
         raise HTTPException(
@@ -139,12 +183,13 @@ async def verify_email(verification: VerifyEmail, db: Session = Depends(get_db))
     user.verification_code_expires = None
     
     # Create an empty profile record if one doesn't exist yet
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
+    profile = db.execute(profile_by_user_id(user.id)).scalars().first()
     if not profile:
         profile = UserProfile(user_id=user.id)
         db.add(profile)
     
     db.commit()
+    audit_buffer.record(audit.EMAIL_VERIFIED, user.id, user.email)
     
     return StepCompletionResponse(
         message="Email verified successfully.",
@@ -155,24 +200,40 @@ async def verify_email(verification: VerifyEmail, db: Session = Depends(get_db))
 
 @router.post("/login", response_model=LoginResponse)
 async def login(
+    request: Request,
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"Attempting login for username: {form_data.username}")
+        logger.debug("Attempting login", extra={"identifier": form_data.username})
+
+        # Shed brute-force load before the DB lookup and the bcrypt verify
+        ip = client_ip(request) or "unknown"
+        retry_after = login_throttle.check(form_data.username, ip)
+        if retry_after:
+            logger.warning("Login throttled", extra={"identifier": form_data.username, "ip": ip})
+            audit_buffer.record(audit.LOGIN_THROTTLED, identifier=form_data.username)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts. Please try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
+        delay = login_throttle.delay_for(form_data.username)
+        if delay:
+            await asyncio.sleep(delay)
         
         # Try to find user by username or email
-        user = db.query(User).filter(
-            (User.email == form_data.username) | 
-            (User.username == form_data.username)
-        ).first()
+        user = db.execute(user_by_login_identifier(form_data.username)).scalars().first()
         
         # If phone is provided, also check that
         if not user and form_data.username.replace('+', '').isdigit():
-            user = db.query(User).filter(User.phone == form_data.username).first()
+            user = db.execute(user_by_phone(form_data.username)).scalars().first()
         
         if not user:
-            print(f"User not found: {form_data.username}")
+            logger.info("Login failed: user not found", extra={"identifier": form_data.username})
+            login_throttle.record_failure(form_data.username, ip)
+            audit_buffer.record(audit.LOGIN_FAILED, identifier=form_data.username, detail="user not found")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -180,24 +241,27 @@ async def login(
             )
             
         if not verify_password(form_data.password, user.hashed_password):
-            print(f"Password verification failed for: {form_data.username}")
+            logger.info("Login failed: wrong password", extra={"identifier": form_data.username})
+            login_throttle.record_failure(form_data.username, ip)
+            audit_buffer.record(audit.LOGIN_FAILED, user.id, form_data.username, detail="wrong password")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Update last login time
-        user.last_login = datetime.utcnow()
-        db.commit()
+        login_throttle.record_success(form_data.username, ip)
+        audit_buffer.record(audit.LOGIN_SUCCEEDED, user.id, form_data.username)
+
+        # Upgrade outdated hashes (old scheme or cost) after the response is sent
+        if password_needs_rehash(user.hashed_password):
+            background_tasks.add_task(rehash_password, user.id, form_data.password, user.hashed_password)
+
+        # Record last login time; written to the database in bulk by the buffer
+        last_login_buffer.record(user.id)
         
-        # Create access token (without referencing role which doesn't exist in your model)
-        access_token = create_access_token(
-            data={
-                "sub": user.username,
-                "email": user.email
-            }
-        )
+        # Short-lived access token plus a rotating refresh token
+        access_token, refresh_token = create_token_pair(user)
         
         # Create full name from first and last name if both exist
         full_name = None
@@ -206,7 +270,7 @@ async def login(
             last_name = user.last_name or ""
             full_name = f"{first_name} {last_name}".strip() or None
         
-        print(f"Login successful for user: {user.username}")
+        logger.info("Login successful", extra={"username": user.username})
         
         # Return user information based on your actual model
         return LoginResponse(
@@ -214,7 +278,9 @@ async def login(
     token=TokenData(
         access_token=access_token,
         token_type="bearer",
-        username=user.username
+        username=user.username,
+        refresh_token=refresh_token,
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     ),
     user={
         "id": str(user.id),
@@ -234,18 +300,110 @@ async def login(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"Login error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during login"
         )
 
+@router.post("/refresh", response_model=TokenData)
+async def refresh_tokens(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access/refresh pair; the old refresh token is revoked"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = verify_refresh_token(request.refresh_token)
+    except JWTError:
+        raise credentials_exception
+
+    user = db.execute(user_by_username(payload.get("sub"))).scalars().first()
+    if user is None or not user.is_active:
+        raise credentials_exception
+
+    # Rotation: each refresh token is single use
+    try:
+        consume_refresh_token(request.refresh_token, payload)
+    except JWTError:
+        raise credentials_exception
+    access_token, refresh_token = create_token_pair(user, family=payload["fam"])
+
+    return TokenData(
+        access_token=access_token,
+        token_type="bearer",
+        username=user.username,
+        refresh_token=refresh_token,
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+@router.post("/logout", response_model=StepCompletionResponse)
+async def logout(token: str = Depends(oauth2_scheme), current_user: User = Depends(get_current_user)):
+    """Revoke the current access token and every refresh token issued with it"""
+    revoke_token(token, revoke_family=True)
+    audit_buffer.record(audit.LOGOUT, current_user.id, current_user.username)
+    return StepCompletionResponse(
+        message="Logged out successfully.",
+        success=True,
+        next_step="login",
+        user_id=str(current_user.id)
+    )
+
+# Fields a client may cache; secrets and OTPs are never synced
+SYNC_USER_FIELDS = [
+    "id", "username", "email", "first_name", "last_name", "phone", "role",
+    "is_active", "is_verified", "profile_completed", "created_at", "updated_at",
+]
+SYNC_PROFILE_FIELDS = ["id", "profile_image", "created_at", "updated_at"]
+_EPOCH = datetime(1970, 1, 1)
+
+def _row_version(row) -> int:
+    """Microseconds since the epoch of the row's last change (updated_at, else created_at)"""
+    changed_at = row.updated_at or row.created_at
+    return (changed_at - _EPOCH) // timedelta(microseconds=1) if changed_at else 0
+
+def _sync_fields(row, fields) -> dict:
+    data = {}
+    for field in fields:
+        value = getattr(row, field)
+        data[field] = str(value) if field == "id" and value is not None else value
+    return data
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync(
+    since: Optional[int] = Query(None, ge=0, description="version returned by the previous sync"),
+    user: User = Depends(get_current_user_for_read),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Delta sync of the caller's user and profile data.
+
+    The version is derived from the rows' updated_at columns, so a client
+    that is up to date gets `changed: false` and no data after two indexed
+    lookups. Otherwise only the rows changed after `since` are returned
+    (changes are tracked per row, not per field); omit `since` for a full
+    sync.
+    """
+    profile = db.execute(profile_by_user_id(user.id)).scalars().first()
+
+    user_version = _row_version(user)
+    profile_version = _row_version(profile) if profile else 0
+    version = max(user_version, profile_version)
+    if since is not None and since >= version:
+        return SyncResponse(version=version, changed=False)
+
+    return SyncResponse(
+        version=version,
+        changed=True,
+        user=_sync_fields(user, SYNC_USER_FIELDS) if since is None or user_version > since else None,
+        profile=_sync_fields(profile, SYNC_PROFILE_FIELDS) if profile and (since is None or profile_version > since) else None,
+    )
+
 @router.get("/me", response_model=dict)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_read),
+    db: Session = Depends(get_read_db)
 ):
     # Get profile data
     profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
@@ -316,10 +474,7 @@ async def resend_verification(resend_data: ResendVerification, db: Session = Dep
     
     db.commit()
     
-    # Print the verification code to terminal (for development purposes)
-    print("=" * 50)
-    print(f"RESENT VERIFICATION CODE for {user.email}: {verification_code}")
-    print("=" * 50)
+    _log_issued_code("Verification code resent", user, verification_code)
     
     # In a real implementation, you would send an email here
     # send_email(user.email, "Your verification code", f"Your code is {verification_code}")
@@ -332,12 +487,23 @@ async def resend_verification(resend_data: ResendVerification, db: Session = Dep
     )
 
 @router.post("/check-email", response_model=EmailExists)
-async def check_email_exists(data: EmailCheck, db: Session = Depends(get_db)):
+async def check_email_exists(data: EmailCheck, db: Session = Depends(get_read_db)):
     """Check if an email is already registered"""
     try:
+        # A Bloom filter miss means the email is definitely free; skip the query
+        probably_registered = email_filter.might_contain(data.email)
+        if probably_registered is False:
+            return EmailExists(
+                exists=False,
+                message="Email is available for registration."
+            )
+
         # Check if email already exists
-        existing_user = db.query(User).filter(User.email == data.email).first()
+        existing_user = db.query(User).filter(func.lower(User.email) == data.email.lower()).first()
         
+        if probably_registered and not existing_user:
+            email_filter.record_false_positive()
+
         if existing_user:
             return EmailExists(
                 exists=True,
@@ -349,9 +515,7 @@ async def check_email_exists(data: EmailCheck, db: Session = Depends(get_db)):
             message="Email is available for registration."
         )
     except Exception as e:
-        print(f"Error in check_email_exists: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in check_email_exists")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -365,7 +529,7 @@ def generate_otp():
 @router.post("/forgot-password", response_model=StepCompletionResponse)
 async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
     """Request a password reset by providing the email address"""
-    user = db.query(User).filter(User.email == request.email).first()
+    user = db.query(User).filter(func.lower(User.email) == request.email.lower()).first()
     
     if not user:
         # For security reasons, don't tell the client if the email exists or not
@@ -381,9 +545,10 @@ async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(
     user.reset_password_otp = otp
     user.reset_password_otp_expires = datetime.utcnow() + timedelta(minutes=30)
     db.commit()
+    audit_buffer.record(audit.PASSWORD_RESET_REQUESTED, user.id, user.email)
     
-    # Send OTP to user's email (for now, print to console)
-    print(f"OTP for password reset: {otp}")
+    # Send OTP to user's email (for now, log it in development)
+    _log_issued_code("Password reset OTP issued", user, otp)
     # Uncomment the following line to send email using emailjs
     # send_reset_password_email(user.email, otp)
     
@@ -391,14 +556,14 @@ async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(
         message="If your email is registered, you will receive a password reset link.",
         success=True,
         next_step="check_email",
-        user_id=user.id
+        user_id=str(user.id)
     )
 
 # Reset password
 @router.post("/reset-password", response_model=StepCompletionResponse)
 async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
     """Reset the password using the OTP"""
-    user = db.query(User).filter(User.email == request.email, User.reset_password_otp == request.otp).first()
+    user = db.execute(user_by_reset_otp(request.email, request.otp)).scalars().first()
     
     if not user or user.reset_password_otp_expires < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
@@ -410,10 +575,11 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
     user.reset_password_otp = None  # Clear the OTP after successful reset
     user.reset_password_otp_expires = None
     db.commit()
+    audit_buffer.record(audit.PASSWORD_RESET, user.id, user.email)
     
     return StepCompletionResponse(
         message="Password has been reset successfully. You can now log in with your new password.",
         success=True,
         next_step="login",
-        user_id=user.id
+        user_id=str(user.id)
     )
\ No newline at end of file
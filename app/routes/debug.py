@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from ..core.profiling import memory_tracker, sampling_profiler
+from ..core.security import get_current_admin_user
+
+router = APIRouter(
+    prefix="/admin/debug",
+    tags=["Admin"],
+    responses={401: {"description": "Unauthorized"}, 403: {"description": "Forbidden"}},
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+    include_idle: bool = Query(False, description="Include threads parked in wait/select/sleep"),
+):
+    """
+    Sample every thread's stack for `seconds` while the worker keeps serving
+    traffic, and return collapsed stacks for flamegraph.pl / speedscope.
+    """
+    # Sampling runs on a worker thread so the event loop (and its requests) get profiled too
+    stacks = await run_in_threadpool(sampling_profiler.profile, seconds, interval_ms / 1000, include_idle)
+    if stacks is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    return stacks
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(10, ge=1, le=50)):
+    """Start tracemalloc (if needed) and take the baseline snapshot"""
+    await run_in_threadpool(memory_tracker.start, frames)
+    return {"tracing": True, "frames": frames}
+
+
+@router.get("/memory/snapshot")
+async def memory_snapshot(
+    limit: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset_baseline: bool = Query(False, description="Make this snapshot the new baseline"),
+):
+    """Top allocation sites by growth since the baseline"""
+    diff = await run_in_threadpool(memory_tracker.diff, limit, key_type, reset_baseline)
+    if diff is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory tracing is not running; POST /admin/debug/memory/start first"
+        )
+    return diff
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop the baseline (tracing costs memory and CPU)"""
+    memory_tracker.stop()
+    return {"tracing": False}
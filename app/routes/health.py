@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 import platform
 import time
 from ..core.config import settings
-from ..core.database import get_db
+from ..core.database import get_db, replica_router
 
 router = APIRouter(
     prefix="/health",
@@ -14,6 +15,9 @@ router = APIRouter(
 async def health_check(db: Session = Depends(get_db)):
     """
     Health check endpoint to verify that the API is running
+
+    `database_connected` is the primary; replica health (from the router's
+    periodic checks) is reported under `database_routing`.
     """
     start_time = time.time()
     
@@ -21,7 +25,7 @@ async def health_check(db: Session = Depends(get_db)):
     db_healthy = True
     try:
         # Just execute a simple query that doesn't fetch data
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
     except Exception:
         db_healthy = False
     
@@ -33,6 +37,7 @@ async def health_check(db: Session = Depends(get_db)):
         "app_name": settings.APP_NAME,
         "environment": settings.ENVIRONMENT,
         "database_connected": db_healthy,
+        "database_routing": replica_router.stats(),
         "system_info": {
             "python_version": platform.python_version(),
             "platform": platform.platform()
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+import asyncio
+
+from ..schemas.places import (
+    NearbyPlaces, Place, PlaceSuggestion, PlaceSuggestions,
+    Region, ReverseGeocodeBatch, ReverseGeocodeResults, TripPlan, TripPlanRequest,
+)
+from ..services import autocomplete
+from ..services.geocoding import region_index
+from ..services.places import place_index
+from ..services.trips import plan_trip
+
+router = APIRouter(
+    prefix="/places",
+    tags=["Places"],
+)
+
+
+@router.get("/nearby", response_model=NearbyPlaces)
+async def nearby_places(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    category: Optional[str] = Query(None, description="e.g. hospital, pharmacy, cafe"),
+    k: int = Query(5, ge=1, le=100),
+    radius_km: Optional[float] = Query(None, gt=0, description="Only places within this distance"),
+):
+    """
+    Nearest points of interest from the in-memory spatial index.
+
+    Served entirely from memory (a k-d tree over the dataset loaded at
+    startup), so it involves no database or AI call.
+    """
+    if not place_index.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Place index not loaded")
+    results = place_index.nearby(lat, lon, category=category, k=k, radius_km=radius_km)
+    return NearbyPlaces(items=[Place(**place) for place in results])
+
+
+@router.get("/autocomplete", response_model=PlaceSuggestions)
+async def autocomplete_places(
+    q: str = Query(..., min_length=1, max_length=100, description="What has been typed so far"),
+    k: int = Query(10, ge=1, le=autocomplete.MAX_K),
+    category: Optional[str] = None,
+):
+    """
+    Type-ahead over place names, most popular first.
+
+    Matches the start of any word of a name, ignoring case and accents
+    ("cafe so" finds "Café Soma"). Served from an in-memory (memory-mapped)
+    sorted key array, cheap enough to call on every keystroke.
+    """
+    index = autocomplete.autocomplete_index
+    if index is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Autocomplete index not loaded")
+    return PlaceSuggestions(items=[PlaceSuggestion(**place) for place in index.complete(q, k=k, category=category)])
+
+
+@router.get("/reverse", response_model=Optional[Region])
+async def reverse_geocode(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+):
+    """City/district for a coordinate from the offline region index (null if none matches)"""
+    if not region_index.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Region index not loaded")
+    return region_index.reverse(lat, lon)
+
+
+@router.post("/reverse/batch", response_model=ReverseGeocodeResults)
+async def reverse_geocode_batch(batch: ReverseGeocodeBatch):
+    """
+    Resolve up to 10,000 coordinates in one call.
+
+    Points are tested against the grid-bucketed region polygons in
+    vectorized chunks, off the event loop.
+    """
+    if not region_index.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Region index not loaded")
+    lats = [point.latitude for point in batch.points]
+    lons = [point.longitude for point in batch.points]
+    return ReverseGeocodeResults(items=await asyncio.to_thread(region_index.reverse_many, lats, lons))
+
+
+@router.post("/trip", response_model=TripPlan)
+async def plan_trip_route(request: TripPlanRequest):
+    """
+    Order multi-stop trip stops to keep the total distance short.
+
+    Builds the stop-to-stop haversine distance matrix in one vectorized pass,
+    then orders the stops with nearest-neighbour followed by 2-opt. The first
+    stop stays first. A few hundred stops take tens of milliseconds.
+    """
+    lats = [stop.latitude for stop in request.stops]
+    lons = [stop.longitude for stop in request.stops]
+    plan = await asyncio.to_thread(plan_trip, lats, lons, request.round_trip)
+    return TripPlan(stops=[request.stops[index] for index in plan["order"]], **plan)
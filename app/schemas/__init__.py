@@ -1,2 +1,2 @@
 from .user import UserCreate, UserResponse, UserUpdate, UserInDB, UserResponseData, ResendVerification, EmailCheck, EmailExists
-from .auth import Token, TokenData, LoginResponse, InitialSignupRequest, InitialSignupResponse, VerificationRequest, VerificationResponse
\ No newline at end of file
+from .auth import Token, TokenData, RefreshTokenRequest, SyncResponse, LoginResponse, InitialSignupRequest, InitialSignupResponse, VerificationRequest, VerificationResponse
\ No newline at end of file
@@ -0,0 +1,55 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class AdminUserItem(BaseModel):
+    """User row as shown in the admin listing"""
+    id: str
+    username: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    profile_completed: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+class AdminUserPage(BaseModel):
+    """One keyset page of users"""
+    items: List[AdminUserItem]
+    next_cursor: Optional[str] = None
+    estimated_total: Optional[int] = None
+
+class UserImportReject(BaseModel):
+    """A row that was not imported"""
+    line: int
+    email: Optional[str] = None
+    error: str
+
+class UserImportResult(BaseModel):
+    """Outcome of a bulk user import"""
+    inserted: int
+    rejected: int
+    rejects: List[UserImportReject]
+    rejects_truncated: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
+
+class AuditEventItem(BaseModel):
+    """One auth audit event"""
+    id: str
+    occurred_at: datetime
+    event_type: str
+    user_id: Optional[str] = None
+    identifier: Optional[str] = None
+    ip: Optional[str] = None
+    request_id: Optional[str] = None
+    detail: Optional[str] = None
+
+class AuditEventPage(BaseModel):
+    """One keyset page of audit events, newest first"""
+    items: List[AuditEventItem]
+    next_cursor: Optional[str] = None
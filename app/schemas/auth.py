@@ -10,6 +10,17 @@ class TokenData(BaseModel):
     access_token: str
     token_type: str = "bearer"
     username: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class SyncResponse(BaseModel):
+    version: int  # Pass back as `since` on the next sync
+    changed: bool
+    user: Optional[Dict[str, Any]] = None  # Only present if the user row changed since `since`
+    profile: Optional[Dict[str, Any]] = None  # Only present if the profile row changed since `since`
 
 class LoginResponse(BaseModel):
     message: str
@@ -1,5 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.places import TripStop
 
 class UserInput(BaseModel):
     role: str
-    message: str
\ No newline at end of file
+    message: str
+    # Optional device location; lets "nearest X" questions be answered from the place index
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    # Optional stops to visit (first = start); the trip is ordered locally without an AI call
+    stops: Optional[List[TripStop]] = Field(None, min_length=2, max_length=1000)
+    round_trip: bool = False
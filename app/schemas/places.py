@@ -0,0 +1,62 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class Place(BaseModel):
+    """A point of interest with its distance from the query point"""
+    name: str
+    category: str
+    latitude: float
+    longitude: float
+    distance_km: float
+
+class NearbyPlaces(BaseModel):
+    """Places nearest first"""
+    items: List[Place]
+
+class PlaceSuggestion(BaseModel):
+    """An autocomplete match"""
+    name: str
+    category: str
+    latitude: float
+    longitude: float
+
+class PlaceSuggestions(BaseModel):
+    """Autocomplete matches, most popular first"""
+    items: List[PlaceSuggestion]
+
+class Region(BaseModel):
+    """The city/district containing (or, for centroid matches, nearest to) a point"""
+    name: str
+    level: Optional[str] = None
+    hierarchy: List[str]  # Smallest containing region first
+    match: str  # "polygon" or "centroid"
+    distance_km: Optional[float] = None
+
+class Coordinate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class ReverseGeocodeBatch(BaseModel):
+    points: List[Coordinate] = Field(..., min_length=1, max_length=10000)
+
+class ReverseGeocodeResults(BaseModel):
+    """One entry per requested point, in order; null where no region matches"""
+    items: List[Optional[Region]]
+
+class TripStop(BaseModel):
+    name: Optional[str] = None
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class TripPlanRequest(BaseModel):
+    """Stops to visit; the first one is where the trip starts"""
+    stops: List[TripStop] = Field(..., min_length=2, max_length=1000)
+    round_trip: bool = False  # Return to the first stop at the end
+
+class TripPlan(BaseModel):
+    order: List[int]  # Indices into the requested stops, in visiting order
+    stops: List[TripStop]  # The stops in visiting order
+    legs_km: List[float]
+    total_km: float
+    round_trip: bool
+    elapsed_ms: float
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logging import client_ip_var, request_id_var
+from app.models.audit import AuthAuditEvent, month_partition_ddl
+
+logger = logging.getLogger(__name__)
+
+# Event types written by app/routes/auth.py
+LOGIN_SUCCEEDED = "login_succeeded"
+LOGIN_FAILED = "login_failed"
+LOGIN_THROTTLED = "login_throttled"
+SIGNUP = "signup"
+EMAIL_VERIFIED = "email_verified"
+PASSWORD_RESET_REQUESTED = "password_reset_requested"
+PASSWORD_RESET = "password_reset"
+LOGOUT = "logout"
+
+
+class AuditBuffer:
+    """
+    In-process queue of auth audit events written in bulk.
+
+    Handlers only append to a bounded deque; a background task inserts
+    everything queued in one executemany every `flush_interval` seconds, or as
+    soon as `flush_size` events are waiting. When the queue is full (database
+    down or too slow) new events are dropped and counted rather than slowing
+    down logins.
+
+    With `partition_months_ahead`, the same task re-runs ensure_partitions
+    every `partition_check_interval` seconds, so a long-lived worker keeps
+    creating months ahead of the clock instead of spilling into the default
+    partition.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        flush_size: int,
+        max_size: int,
+        partition_months_ahead: Optional[int] = None,
+        partition_check_interval: float = 3600.0,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self.partition_months_ahead = partition_months_ahead
+        self.partition_check_interval = partition_check_interval
+        self._next_partition_check = 0.0
+        self._pending: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.written_total = 0
+        self.dropped_total = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        event_type: str,
+        user_id=None,
+        identifier: Optional[str] = None,
+        detail: Optional[str] = None,
+    ):
+        """Queue one event; request id and client IP come from the request context"""
+        event = {
+            "id": uuid.uuid4(),
+            "occurred_at": datetime.utcnow(),
+            "event_type": event_type,
+            "user_id": user_id if user_id is None or isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id)),
+            "identifier": identifier[:100] if identifier else None,
+            "ip": client_ip_var.get(),
+            "request_id": request_id_var.get(),
+            "detail": detail[:255] if detail else None,
+        }
+        with self._lock:
+            if len(self._pending) >= self.max_size:
+                self.dropped_total += 1
+                return
+            self._pending.append(event)
+            size = len(self._pending)
+
+        if size >= self.flush_size and self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written_total": self.written_total,
+            "dropped_total": self.dropped_total,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def flush(self) -> int:
+        """Insert everything queued. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch: List[Dict] = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(AuthAuditEvent.__table__), batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to write {len(batch)} audit events: {str(e)}")
+                self._requeue(batch)
+                return 0
+
+            self.written_total += len(batch)
+            return len(batch)
+
+    def _requeue(self, batch: List[Dict]):
+        """Put a failed batch back in front, dropping what no longer fits"""
+        with self._lock:
+            room = max(0, self.max_size - len(self._pending))
+            self.dropped_total += max(0, len(batch) - room)
+            if room:
+                self._pending.extendleft(reversed(batch[:room]))
+
+    def maintain_partitions(self):
+        """Create upcoming partitions if the check is due; a failed attempt is retried on the next flush"""
+        if self.partition_months_ahead is None:
+            return
+        now = time.monotonic()
+        if now < self._next_partition_check:
+            return
+        if ensure_partitions(self.partition_months_ahead):
+            self._next_partition_check = now + self.partition_check_interval
+
+    async def _run(self):
+        await asyncio.to_thread(self.maintain_partitions)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await asyncio.to_thread(self.maintain_partitions)
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        """Start the periodic flush task on the running event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic task and flush whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+def partition_months(today: date, months_ahead: int) -> List[date]:
+    """First day of this month and of each of the next `months_ahead`"""
+    first = today.replace(day=1)
+    return [
+        date(first.year + (first.month - 1 + offset) // 12, (first.month - 1 + offset) % 12 + 1, 1)
+        for offset in range(months_ahead + 1)
+    ]
+
+
+def ensure_partitions(months_ahead: int) -> bool:
+    """
+    Create the monthly partitions for this month and the next `months_ahead`.
+
+    Run periodically by the audit buffer so events land in their own month
+    instead of the default partition (a month's partition can't be created
+    once the default holds rows for it). No-op outside PostgreSQL. Returns
+    False if the partitions could not be created.
+    """
+    if engine.dialect.name != "postgresql":
+        return True
+    try:
+        with engine.begin() as connection:
+            # UTC, like the occurred_at timestamps that pick the partition
+            for month in partition_months(datetime.utcnow().date(), months_ahead):
+                connection.execute(text(month_partition_ddl(month)))
+    except Exception as e:
+        logger.error(f"Could not create audit partitions: {str(e)}")
+        return False
+    return True
+
+
+audit_buffer = AuditBuffer(
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    flush_size=settings.AUDIT_FLUSH_SIZE,
+    max_size=settings.AUDIT_BUFFER_MAX_SIZE,
+    partition_months_ahead=settings.AUDIT_PARTITION_MONTHS_AHEAD,
+    partition_check_interval=settings.AUDIT_PARTITION_CHECK_INTERVAL_SECONDS,
+)
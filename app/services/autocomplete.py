@@ -0,0 +1,233 @@
+"""
+Place-name autocomplete over a sorted array of folded name keys.
+
+Every place contributes one key per word suffix of its folded name ("bir
+hospital" and "hospital"), so typing any word of a name finds it. Keys are
+UTF-8 bytes in a fixed-width NumPy array sorted once at build time; a prefix
+is two binary searches (np.searchsorted) giving the matching key range, and
+the range is ranked by popularity.
+
+The index is a handful of .npy files that are opened with mmap, so every
+uvicorn worker on a host shares one copy through the page cache. Build them
+from the place dataset with:
+
+    python -m app.services.autocomplete --places data/places.csv --out data/autocomplete
+"""
+import argparse
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.places import load_places
+
+logger = logging.getLogger(__name__)
+
+# Keys are truncated to this many UTF-8 bytes; longer prefixes are checked against the full name
+KEY_BYTES = 32
+# Short prefixes match huge ranges, so their ranking is computed once per worker
+CACHED_PREFIX_LENGTH = 2
+# LRU bound on cached rankings (prefixes x categories); least recently used ones are evicted
+CACHE_MAX_ENTRIES = 4096
+MAX_K = 50
+
+INDEX_FILES = ["keys", "key_place", "key_popularity", "name_bytes", "name_offsets", "category", "lat", "lon"]
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form: 'Café  Soma!' -> 'cafe soma'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", stripped.casefold()).split())
+
+
+def _key_bytes(text: str) -> bytes:
+    """UTF-8 truncated to KEY_BYTES without splitting a character"""
+    return text.encode("utf-8")[:KEY_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+
+def build_arrays(places: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Index arrays from the column arrays returned by app.services.places.load_places"""
+    keys, key_place = [], []
+    for place_id, name in enumerate(places["name"]):
+        words = fold(name).split()
+        for start in range(len(words)):
+            keys.append(_key_bytes(" ".join(words[start:])))
+            key_place.append(place_id)
+
+    keys = np.array(keys, dtype=f"S{KEY_BYTES}")
+    key_place = np.array(key_place, dtype=np.int32)
+    order = np.argsort(keys, kind="stable")
+    keys, key_place = keys[order], key_place[order]
+
+    encoded = [str(name).encode("utf-8") for name in places["name"]]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    name_offsets[1:] = np.cumsum([len(name) for name in encoded])
+    categories = [fold(str(category)) for category in places["category"]]
+    return {
+        "keys": keys,
+        "key_place": key_place,
+        "key_popularity": places["popularity"].astype(np.float32)[key_place],
+        "name_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "name_offsets": name_offsets,
+        "category": np.array(categories, dtype=f"S{max([len(c.encode()) for c in categories] + [1])}"),
+        "lat": places["lat"].astype(np.float64),
+        "lon": places["lon"].astype(np.float64),
+    }
+
+
+def save_arrays(arrays: Dict[str, np.ndarray], directory: str):
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    for name in INDEX_FILES:
+        np.save(path / f"{name}.npy", arrays[name])
+
+
+class PrefixIndex:
+    """Top-k autocomplete over arrays from build_arrays (in memory or memory-mapped)"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], mmapped: bool = False):
+        self.arrays = arrays
+        self.mmapped = mmapped
+        self._cache: "OrderedDict[tuple, List[int]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Only these (and no category) are cached, so arbitrary category strings can't grow the cache
+        self._categories = set(np.unique(np.asarray(arrays["category"])).tolist())
+
+    @classmethod
+    def load(cls, directory: str) -> "PrefixIndex":
+        path = Path(directory)
+        return cls({name: np.load(path / f"{name}.npy", mmap_mode="r") for name in INDEX_FILES}, mmapped=True)
+
+    def __len__(self) -> int:
+        return len(self.arrays["lat"])
+
+    def name(self, place_id: int) -> str:
+        offsets = self.arrays["name_offsets"]
+        return bytes(self.arrays["name_bytes"][offsets[place_id]:offsets[place_id + 1]]).decode("utf-8")
+
+    def _rank(self, prefix: str, category: Optional[bytes], limit: int) -> List[int]:
+        """Place ids matching the folded prefix, most popular first, deduplicated"""
+        keys = self.arrays["keys"]
+        encoded = prefix.encode("utf-8")
+        probe = encoded[:KEY_BYTES]
+        # 0xff never occurs in UTF-8, so probe + 0xff sorts after every key starting with probe
+        lo = int(np.searchsorted(keys, probe, side="left"))
+        hi = int(np.searchsorted(keys, probe + b"\xff", side="left"))
+        if lo >= hi:
+            return []
+
+        place_ids = np.asarray(self.arrays["key_place"][lo:hi])
+        popularity = np.asarray(self.arrays["key_popularity"][lo:hi])
+        if category is not None:
+            mask = np.asarray(self.arrays["category"])[place_ids] == category
+            place_ids, popularity = place_ids[mask], popularity[mask]
+
+        # Rank a few times `limit` candidates first (a place can match through several keys)
+        candidates = min(len(place_ids), limit * 4)
+        while True:
+            if candidates < len(place_ids):
+                top = np.argpartition(-popularity, candidates - 1)[:candidates]
+                top = top[np.argsort(-popularity[top], kind="stable")]
+            else:
+                top = np.argsort(-popularity, kind="stable")
+            result, seen = [], set()
+            for place_id in place_ids[top].tolist():
+                # Keys are truncated, so a long prefix must be re-checked against a word start of the name
+                if len(encoded) > KEY_BYTES and f" {prefix}" not in f" {fold(self.name(place_id))}":
+                    continue
+                if place_id not in seen:
+                    seen.add(place_id)
+                    result.append(place_id)
+                    if len(result) == limit:
+                        return result
+            if candidates >= len(place_ids):
+                return result
+            candidates = len(place_ids)
+
+    def complete(self, query: str, k: int = 10, category: Optional[str] = None) -> List[dict]:
+        prefix = fold(query)
+        if not prefix:
+            return []
+        category_key = fold(category).encode("utf-8") if category else None
+        if category_key is not None and category_key not in self._categories:
+            return []
+
+        if len(prefix) <= CACHED_PREFIX_LENGTH:
+            cache_key = (prefix, category_key)
+            with self._cache_lock:
+                ranked = self._cache.get(cache_key)
+                if ranked is not None:
+                    self._cache.move_to_end(cache_key)
+            if ranked is None:
+                ranked = self._rank(prefix, category_key, MAX_K)
+                with self._cache_lock:
+                    self._cache[cache_key] = ranked
+                    while len(self._cache) > CACHE_MAX_ENTRIES:
+                        self._cache.popitem(last=False)
+            ranked = ranked[:k]
+        else:
+            ranked = self._rank(prefix, category_key, k)
+
+        return [
+            {
+                "name": self.name(place_id),
+                "category": bytes(self.arrays["category"][place_id]).decode("utf-8"),
+                "latitude": float(self.arrays["lat"][place_id]),
+                "longitude": float(self.arrays["lon"][place_id]),
+            }
+            for place_id in ranked
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "places": len(self),
+            "keys": len(self.arrays["keys"]),
+            "mmapped": self.mmapped,
+            "bytes": int(sum(array.nbytes for array in self.arrays.values())),
+            "cached_prefixes": len(self._cache),
+        }
+
+
+autocomplete_index: Optional[PrefixIndex] = None
+
+
+def load_autocomplete_index():
+    """
+    Memory-map AUTOCOMPLETE_INDEX_DIR if it holds a built index, else build
+    one in memory from PLACES_DATASET_PATH. Failures leave autocomplete off.
+    """
+    global autocomplete_index
+    directory = settings.AUTOCOMPLETE_INDEX_DIR
+    try:
+        if directory and (Path(directory) / "keys.npy").exists():
+            autocomplete_index = PrefixIndex.load(directory)
+        elif settings.PLACES_DATASET_PATH:
+            autocomplete_index = PrefixIndex(build_arrays(load_places(settings.PLACES_DATASET_PATH)))
+        else:
+            return
+        logger.info("Autocomplete index loaded", extra=autocomplete_index.stats())
+    except Exception:
+        logger.exception("Could not load the autocomplete index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--places", required=True, help="CSV or GeoJSON place dataset")
+    parser.add_argument("--out", required=True, help="Directory for the .npy files (AUTOCOMPLETE_INDEX_DIR)")
+    args = parser.parse_args()
+
+    arrays = build_arrays(load_places(args.places))
+    save_arrays(arrays, args.out)
+    size = sum(array.nbytes for array in arrays.values())
+    print(f"Indexed {len(arrays['lat'])} places as {len(arrays['keys'])} keys ({size / 1024:.0f} KiB) in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
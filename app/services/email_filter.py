@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.user import User
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+
+class RegisteredEmailFilter:
+    """
+    In-memory Bloom filter of registered emails (lower-cased).
+
+    A miss means the email is not registered, so /auth/check-email can answer
+    without a query; a hit is only "probably registered" and is confirmed
+    against the database. Users are never deleted through the API, so a
+    plain Bloom filter (no deletions) is enough; it is rebuilt when it fills up.
+
+    The filter is per process: signups on this worker are added immediately,
+    those on other workers are picked up by a refresh every
+    `refresh_interval` seconds (users created since the last sync, with an
+    overlap for transactions still committing). Until then a miss for such an
+    email is stale and check-email may call it available; signup itself is
+    still guarded by the unique index.
+    """
+
+    # Stream this many emails per round trip while building
+    BUILD_BATCH_SIZE = 10000
+    # Re-read users created this long before the last sync; created_at is the
+    # writer's transaction start, which may commit well after it
+    REFRESH_OVERLAP = timedelta(minutes=5)
+
+    def __init__(self, error_rate: float, refresh_interval: float, min_capacity: int = 10000):
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.min_capacity = min_capacity
+        self._bloom: Optional[BloomFilter] = None
+        self._synced_through: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._added_during_build: Set[str] = set()
+        self.definite_negatives = 0
+        self.probable_hits = 0
+        self.false_positives = 0
+        self.last_build_seconds: Optional[float] = None
+        self.refreshed_emails = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def build(self):
+        """Stream every email from users into a fresh filter, then swap it in"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            self._added_during_build = set()
+
+        try:
+            start = time.perf_counter()
+            with engine.connect() as connection:
+                synced_through = connection.execute(select(func.now())).scalar()
+                user_count = connection.execute(select(func.count()).select_from(User)).scalar() or 0
+                # Headroom so signups don't push the false positive rate up right away
+                bloom = BloomFilter(max(self.min_capacity, user_count * 2), self.error_rate)
+                result = connection.execution_options(
+                    stream_results=True, yield_per=self.BUILD_BATCH_SIZE
+                ).execute(select(func.lower(User.email)))
+                for email in result.scalars():
+                    bloom.add(email)
+
+            with self._lock:
+                for email in self._added_during_build:
+                    bloom.add(email)
+                self._bloom = bloom
+                self._synced_through = synced_through
+            self.last_build_seconds = round(time.perf_counter() - start, 3)
+            logger.info(
+                "Email filter built",
+                extra={"emails": len(bloom), "memory_bytes": bloom.memory_bytes, "seconds": self.last_build_seconds},
+            )
+        except Exception:
+            logger.exception("Email filter build failed; check-email falls back to the database")
+        finally:
+            with self._lock:
+                self._building = False
+                self._added_during_build = set()
+
+    def refresh(self):
+        """Add users created since the last sync, e.g. signups handled by other workers"""
+        bloom, synced_through = self._bloom, self._synced_through
+        if bloom is None or synced_through is None or self._building:
+            return
+        try:
+            with engine.connect() as connection:
+                now = connection.execute(select(func.now())).scalar()
+                result = connection.execution_options(
+                    stream_results=True, yield_per=self.BUILD_BATCH_SIZE
+                ).execute(select(func.lower(User.email)).where(User.created_at >= synced_through - self.REFRESH_OVERLAP))
+                added = 0
+                for email in result.scalars():
+                    # The overlap re-reads known emails; adding them again would only inflate the count
+                    if email not in bloom:
+                        self.add(email)
+                        added += 1
+            with self._lock:
+                if self._bloom is bloom:
+                    self._synced_through = now
+            self.refreshed_emails += added
+        except Exception:
+            logger.exception("Email filter refresh failed")
+
+    async def _run(self):
+        await asyncio.to_thread(self.build)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if self._bloom is None:
+                await asyncio.to_thread(self.build)
+            else:
+                await asyncio.to_thread(self.refresh)
+
+    def start(self):
+        """Build the filter, then keep it in sync, on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def add(self, email: str):
+        """Register a new email (signup, import)"""
+        email = email.lower()
+        with self._lock:
+            if self._building:
+                self._added_during_build.add(email)
+            if self._bloom is not None:
+                self._bloom.add(email)
+                needs_rebuild = len(self._bloom) > self._bloom.capacity
+            else:
+                needs_rebuild = False
+        if needs_rebuild:
+            threading.Thread(target=self.build, name="email-filter-rebuild", daemon=True).start()
+
+    def might_contain(self, email: str) -> Optional[bool]:
+        """False = definitely not registered, True = probably registered, None = filter not built"""
+        bloom = self._bloom
+        if bloom is None:
+            return None
+        if email.lower() in bloom:
+            self.probable_hits += 1
+            return True
+        self.definite_negatives += 1
+        return False
+
+    def record_false_positive(self):
+        """A probable hit that the database showed to be free"""
+        self.false_positives += 1
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        # Observed rate among emails that turned out to be free
+        free_checks = self.definite_negatives + self.false_positives
+        return {
+            "ready": bloom is not None,
+            "emails": len(bloom) if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "memory_bytes": bloom.memory_bytes if bloom else 0,
+            "hash_functions": bloom.num_hashes if bloom else 0,
+            "estimated_false_positive_rate": round(bloom.estimated_false_positive_rate(), 6) if bloom else None,
+            "observed_false_positive_rate": round(self.false_positives / free_checks, 6) if free_checks else None,
+            "definite_negatives": self.definite_negatives,
+            "probable_hits": self.probable_hits,
+            "false_positives": self.false_positives,
+            "last_build_seconds": self.last_build_seconds,
+            "refresh_interval_seconds": self.refresh_interval,
+            "refreshed_emails": self.refreshed_emails,
+        }
+
+
+email_filter = RegisteredEmailFilter(
+    error_rate=settings.EMAIL_FILTER_ERROR_RATE,
+    refresh_interval=settings.EMAIL_FILTER_REFRESH_SECONDS,
+)
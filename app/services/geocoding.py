@@ -0,0 +1,267 @@
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.spatial import KDTree, chord_to_km, km_to_chord, to_unit_vectors
+
+logger = logging.getLogger(__name__)
+
+# Points resolved per vectorized pass; bounds the (point, polygon) candidate arrays
+BATCH_CHUNK = 1024
+# (point, edge) combinations per ray-casting pass; bounds the edge arrays, whatever the polygon sizes
+EDGE_CHUNK = 1 << 20
+
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for each pair, without a Python loop"""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + (np.arange(total) - offsets)
+
+
+class RegionIndex:
+    """
+    Offline reverse geocoder over region polygons and/or centroids.
+
+    Polygon parts are bucketed into a uniform lat/lon grid by bounding box
+    (CSR layout: sorted cell ids -> part ids). A lookup maps points to their
+    cells, gathers the candidate parts, and runs an even-odd ray-casting test
+    against every edge of every candidate in one NumPy pass. When several
+    regions contain a point (district inside city) the smallest one is the
+    answer and the rest form its hierarchy. Points in no polygon fall back to
+    the nearest region centroid within `max_centroid_km`.
+    """
+
+    def __init__(self, cell_degrees: float = 0.25, max_centroid_km: float = 25.0):
+        self.cell_degrees = cell_degrees
+        self.max_centroid_km = max_centroid_km
+        self.regions: List[dict] = []
+        self.part_count = 0
+        self.lookups_total = 0
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.regions)
+
+    def load(self, path: str):
+        with open(path, encoding="utf-8") as source:
+            self.build(json.load(source).get("features", []))
+        logger.info("Region index loaded", extra={"regions": len(self.regions), "polygon_parts": self.part_count})
+
+    def build(self, features: List[dict]):
+        """Index GeoJSON features: Polygon/MultiPolygon regions and Point centroids"""
+        regions, part_region, part_area, bboxes = [], [], [], []
+        edge_starts, edges = [], []
+        centroid_region, centroid_lat, centroid_lon = [], [], []
+        edge_total = 0
+
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            properties = feature.get("properties") or {}
+            if not properties.get("name"):
+                continue
+            kind = geometry.get("type")
+            if kind == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif kind == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            elif kind == "Point":
+                polygons = []
+            else:
+                continue
+
+            region_id = len(regions)
+            regions.append({
+                "name": properties["name"],
+                "level": properties.get("level") or properties.get("type"),
+            })
+            if kind == "Point":
+                centroid_region.append(region_id)
+                centroid_lon.append(geometry["coordinates"][0])
+                centroid_lat.append(geometry["coordinates"][1])
+                continue
+
+            for rings in polygons:
+                ring_arrays = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings if len(ring) >= 3]
+                if not ring_arrays:
+                    continue
+                exterior = ring_arrays[0]
+                # Every ring (exterior and holes) contributes edges; even-odd handles the holes
+                part_edges = np.concatenate([
+                    np.column_stack((ring, np.roll(ring, -1, axis=0))) for ring in ring_arrays
+                ])
+                edge_starts.append(edge_total)
+                edges.append(part_edges)
+                edge_total += len(part_edges)
+                part_region.append(region_id)
+                x, y = exterior[:, 0], exterior[:, 1]
+                part_area.append(abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2)
+                bboxes.append((x.min(), y.min(), x.max(), y.max()))
+                # Centroid fallback also covers polygon regions (points just outside a border)
+                centroid_region.append(region_id)
+                centroid_lon.append(x.mean())
+                centroid_lat.append(y.mean())
+
+        self.part_count = len(part_region)
+        self.part_region = np.array(part_region, dtype=np.int64)
+        self.part_area = np.array(part_area, dtype=np.float64)
+        self.bbox = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.edge_start = np.array(edge_starts + [edge_total], dtype=np.int64)
+        self.edges = np.concatenate(edges) if edges else np.empty((0, 4))
+        self._build_grid()
+
+        self.centroid_region = np.array(centroid_region, dtype=np.int64)
+        self.centroid_tree = KDTree(to_unit_vectors(centroid_lat, centroid_lon)) if centroid_region else None
+        # Assigned last: `ready` flips only once every array is in place
+        self.regions = regions
+
+    def _cell_ids(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        columns = int(np.ceil(360 / self.cell_degrees))
+        row = np.floor((lats + 90) / self.cell_degrees).astype(np.int64)
+        column = np.floor((lons + 180) / self.cell_degrees).astype(np.int64)
+        return row * columns + np.clip(column, 0, columns - 1)
+
+    def _build_grid(self):
+        columns = int(np.ceil(360 / self.cell_degrees))
+        cells, parts = [], []
+        for part, (min_lon, min_lat, max_lon, max_lat) in enumerate(self.bbox):
+            rows = np.arange(int((min_lat + 90) // self.cell_degrees), int((max_lat + 90) // self.cell_degrees) + 1)
+            cols = np.arange(int((min_lon + 180) // self.cell_degrees), int((max_lon + 180) // self.cell_degrees) + 1)
+            part_cells = (rows[:, None] * columns + np.clip(cols, 0, columns - 1)[None, :]).ravel()
+            cells.append(part_cells)
+            parts.append(np.full(len(part_cells), part, dtype=np.int64))
+
+        cells = np.concatenate(cells) if cells else np.empty(0, dtype=np.int64)
+        parts = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        cells, parts = cells[order], parts[order]
+        self.cell_keys, first = np.unique(cells, return_index=True)
+        self.cell_offsets = np.append(first, len(cells)).astype(np.int64)
+        self.cell_parts = parts
+
+    def _containing_parts(self, lats: np.ndarray, lons: np.ndarray):
+        """(point index, part index) for every polygon part containing a point"""
+        if not self.part_count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        cells = self._cell_ids(lats, lons)
+        position = np.searchsorted(self.cell_keys, cells)
+        position = np.minimum(position, len(self.cell_keys) - 1)
+        hit = self.cell_keys[position] == cells
+        points = np.flatnonzero(hit)
+        starts = self.cell_offsets[position[hit]]
+        counts = self.cell_offsets[position[hit] + 1] - starts
+        pair_point = np.repeat(points, counts)
+        pair_part = self.cell_parts[_ranges(starts, counts)]
+
+        # Bounding-box rejection before touching edges
+        box = self.bbox[pair_part]
+        px, py = lons[pair_point], lats[pair_point]
+        inside_box = (px >= box[:, 0]) & (px <= box[:, 2]) & (py >= box[:, 1]) & (py <= box[:, 3])
+        pair_point, pair_part = pair_point[inside_box], pair_part[inside_box]
+        if not len(pair_part):
+            return pair_point, pair_part
+
+        # Slices of pairs whose edges add up to at most EDGE_CHUNK (a bigger part gets a slice of its own)
+        edge_counts = self.edge_start[pair_part + 1] - self.edge_start[pair_part]
+        edge_end = np.cumsum(edge_counts)
+        inside = np.empty(len(pair_part), dtype=bool)
+        start = 0
+        while start < len(pair_part):
+            end = int(np.searchsorted(edge_end, edge_end[start] - edge_counts[start] + EDGE_CHUNK, side="right"))
+            end = max(end, start + 1)
+            inside[start:end] = self._ray_cast(lats[pair_point[start:end]], lons[pair_point[start:end]], pair_part[start:end])
+            start = end
+        return pair_point[inside], pair_part[inside]
+
+    def _ray_cast(self, lats: np.ndarray, lons: np.ndarray, parts: np.ndarray) -> np.ndarray:
+        """Whether each point lies in its part: even-odd ray casting over all (pair, edge) combinations at once"""
+        edge_counts = self.edge_start[parts + 1] - self.edge_start[parts]
+        edge_pair = np.repeat(np.arange(len(parts)), edge_counts)
+        x1, y1, x2, y2 = self.edges[_ranges(self.edge_start[parts], edge_counts)].T
+        px, py = lons[edge_pair], lats[edge_pair]
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        crossings = np.bincount(edge_pair, weights=straddles & (px < crossing_x), minlength=len(parts))
+        return crossings % 2 == 1
+
+    def _describe(self, region_ids: List[int], distance_km: Optional[float] = None) -> dict:
+        region = self.regions[region_ids[0]]
+        result = {
+            "name": region["name"],
+            "level": region["level"],
+            "hierarchy": [self.regions[region_id]["name"] for region_id in region_ids],
+            "match": "polygon" if distance_km is None else "centroid",
+        }
+        if distance_km is not None:
+            result["distance_km"] = round(distance_km, 3)
+        return result
+
+    def reverse_many(self, lats, lons) -> List[Optional[dict]]:
+        """Resolve many points; None where nothing matches"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.lookups_total += len(lats)
+        results: List[Optional[dict]] = [None] * len(lats)
+
+        for chunk_start in range(0, len(lats), BATCH_CHUNK):
+            chunk = slice(chunk_start, chunk_start + BATCH_CHUNK)
+            points, parts = self._containing_parts(lats[chunk], lons[chunk])
+            # Smallest containing region first for each point
+            order = np.lexsort((self.part_area[parts], points))
+            matches: Dict[int, List[int]] = {}
+            for point, part in zip(points[order].tolist(), parts[order].tolist()):
+                region_ids = matches.setdefault(chunk_start + point, [])
+                region_id = int(self.part_region[part])
+                if region_id not in region_ids:
+                    region_ids.append(region_id)
+            for point, region_ids in matches.items():
+                results[point] = self._describe(region_ids)
+
+        misses = [point for point, result in enumerate(results) if result is None]
+        if self.centroid_tree is not None and misses:
+            # One batched nearest-centroid query for every point no polygon contains
+            distances_sq, indices = self.centroid_tree.nearest(
+                to_unit_vectors(lats[misses], lons[misses]), km_to_chord(self.max_centroid_km) ** 2
+            )
+            distances_km = chord_to_km(np.sqrt(distances_sq[indices >= 0]))
+            for point, index, distance_km in zip(
+                np.asarray(misses)[indices >= 0].tolist(), indices[indices >= 0].tolist(), distances_km.tolist()
+            ):
+                results[point] = self._describe([int(self.centroid_region[index])], distance_km)
+        return results
+
+    def reverse(self, lat: float, lon: float) -> Optional[dict]:
+        return self.reverse_many([lat], [lon])[0]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "regions": len(self.regions),
+            "polygon_parts": self.part_count,
+            "edges": len(self.edges) if self.ready else 0,
+            "grid_cells": len(self.cell_keys) if self.ready else 0,
+            "lookups_total": self.lookups_total,
+        }
+
+
+region_index = RegionIndex(
+    cell_degrees=settings.REVERSE_GEOCODE_CELL_DEGREES,
+    max_centroid_km=settings.REVERSE_GEOCODE_MAX_CENTROID_KM,
+)
+
+
+def load_region_index():
+    """Load REGIONS_DATASET_PATH if configured; failures leave reverse geocoding off"""
+    if not settings.REGIONS_DATASET_PATH:
+        return
+    try:
+        region_index.load(settings.REGIONS_DATASET_PATH)
+    except Exception:
+        logger.exception(f"Could not load regions from {settings.REGIONS_DATASET_PATH}")
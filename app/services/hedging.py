@@ -0,0 +1,84 @@
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class HedgePolicy:
+    """
+    When to send a second (hedged) chatbot request, and how often we may.
+
+    The hedge delay is the p95 of recently observed time-to-first-token,
+    never below `min_delay`; until `min_samples` are seen there is no delay
+    and so no hedging. The budget is a token bucket: every request adds
+    `budget_percent / 100` of a token (up to `burst`) and every hedge spends
+    one, so hedges stay near budget_percent of traffic even when the
+    upstream is slow for everyone.
+    """
+
+    def __init__(self, enabled: bool, budget_percent: float, min_delay: float, min_samples: int, burst: float = 5.0):
+        self.enabled = enabled
+        self.budget_fraction = budget_percent / 100
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=500)
+        self._tokens = burst
+        self.requests_total = 0
+        self.hedged_total = 0
+        self.hedge_wins = 0
+        self.denied_by_budget = 0
+
+    def observe_ttft(self, seconds: float):
+        with self._lock:
+            self._ttft.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait for a first token before hedging; None = don't hedge this request"""
+        with self._lock:
+            self.requests_total += 1
+            self._tokens = min(self.burst, self._tokens + self.budget_fraction)
+            if not self.enabled or len(self._ttft) < self.min_samples:
+                return None
+            samples = list(self._ttft)
+        return max(self.min_delay, float(np.percentile(samples, 95)))
+
+    def try_hedge(self) -> bool:
+        """Spend one budget token for a hedge, if there is one"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.hedged_total += 1
+                return True
+            self.denied_by_budget += 1
+            return False
+
+    def record_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = list(self._ttft)
+            return {
+                "enabled": self.enabled,
+                "ttft_p50_ms": round(float(np.percentile(samples, 50)) * 1000, 1) if samples else None,
+                "ttft_p95_ms": round(float(np.percentile(samples, 95)) * 1000, 1) if samples else None,
+                "requests_total": self.requests_total,
+                "hedged_total": self.hedged_total,
+                "hedge_wins": self.hedge_wins,
+                "denied_by_budget": self.denied_by_budget,
+                "budget_tokens": round(self._tokens, 2),
+            }
+
+
+hedge_policy = HedgePolicy(
+    enabled=settings.GROQ_HEDGING_ENABLED,
+    budget_percent=settings.GROQ_HEDGE_BUDGET_PERCENT,
+    min_delay=settings.GROQ_HEDGE_MIN_DELAY_MS / 1000,
+    min_samples=settings.GROQ_HEDGE_MIN_SAMPLES,
+)
@@ -0,0 +1,200 @@
+"""
+Local intent classification for chatbot messages.
+
+Cheap regex rules catch greetings, thanks, nearest-place questions and
+clearly off-topic requests; an optional bag-of-words model (multinomial
+naive Bayes stored as a few NumPy arrays) handles what the rules don't. Only
+messages classified as navigation -- or that nothing recognises -- go to the
+model. Train the optional model from a CSV of `text,label` rows with:
+
+    python -m app.services.intents --train data/intents.csv --out data/intents.npz
+
+Labels the endpoint acts on are greeting, thanks, off_topic, nearest and navigation.
+"""
+import argparse
+import csv
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.chat_helpers import NEAREST_PATTERN
+
+logger = logging.getLogger(__name__)
+
+GREETING = "greeting"
+THANKS = "thanks"
+OFF_TOPIC = "off_topic"
+NEAREST = "nearest"
+NAVIGATION = "navigation"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Whole message is a greeting/thanks plus at most a name or two words ("hi tripo", "thanks so much") and punctuation
+GREETING_PATTERN = re.compile(
+    r"^\s*(hi+|hello+|hey+|hiya|yo|namaste|good (morning|afternoon|evening))\b([\s,]+\w+){0,2}[\s,.!]*$", re.IGNORECASE
+)
+THANKS_PATTERN = re.compile(
+    r"^\s*(thanks?( you)?|thank u|thx|ty|cheers|great,? thanks?)\b([\s,]+\w+){0,2}[\s,.!]*$", re.IGNORECASE
+)
+NAVIGATION_PATTERN = re.compile(
+    r"\b(route|direction|directions|way to|get to|go to|how far|distance|map|where is|where's|located|location|"
+    r"travel|trip|itinerary|visit|bus|taxi|walk|walking|drive|driving|road|street|airport|station|hotel|"
+    r"restaurant|hospital|pharmacy|atm|park|museum|city|district|nearby|near)\b",
+    re.IGNORECASE,
+)
+# Only terms with no plausible travel reading: "Java" is an island, and translating
+# phrases or naming a country's capital are travel questions, so those go to the model
+OFF_TOPIC_PATTERN = re.compile(
+    r"\b(write (me )?(a|an|some) (poem|essay|story|song|code|program|script)|python|javascript|sql|"
+    r"programming|homework|recipe|joke|stock price|bitcoin|crypto|horoscope|solve|equation|"
+    r"who won|lyrics)\b",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BagOfWordsModel:
+    """Linear bag-of-words classifier: score = bias + sum of per-token weight rows"""
+
+    def __init__(self, vocabulary: np.ndarray, weights: np.ndarray, bias: np.ndarray, labels: np.ndarray):
+        self.token_ids = {token: index for index, token in enumerate(vocabulary.tolist())}
+        self.weights = weights
+        self.bias = bias
+        self.labels = labels.tolist()
+
+    @classmethod
+    def load(cls, path: str) -> "BagOfWordsModel":
+        arrays = np.load(path, allow_pickle=False)
+        return cls(arrays["vocabulary"], arrays["weights"], arrays["bias"], arrays["labels"])
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[str], alpha: float = 1.0) -> "BagOfWordsModel":
+        """Multinomial naive Bayes with Laplace smoothing, stored as log-probability weights"""
+        label_names = sorted(set(labels))
+        vocabulary = sorted({token for text in texts for token in tokenize(text)})
+        token_ids = {token: index for index, token in enumerate(vocabulary)}
+        counts = np.full((len(vocabulary), len(label_names)), alpha)
+        priors = np.zeros(len(label_names))
+        for text, label in zip(texts, labels):
+            column = label_names.index(label)
+            priors[column] += 1
+            for token in tokenize(text):
+                counts[token_ids[token], column] += 1
+        weights = np.log(counts / counts.sum(axis=0))
+        return cls(np.array(vocabulary), weights, np.log(priors / priors.sum()), np.array(label_names))
+
+    def save(self, path: str):
+        vocabulary = sorted(self.token_ids, key=self.token_ids.get)
+        np.savez(path, vocabulary=np.array(vocabulary), weights=self.weights, bias=self.bias, labels=np.array(self.labels))
+
+    def predict(self, text: str) -> Optional[tuple]:
+        """(label, probability) or None when no token is in the vocabulary"""
+        ids = [self.token_ids[token] for token in tokenize(text) if token in self.token_ids]
+        if not ids:
+            return None
+        scores = self.bias + self.weights[ids].sum(axis=0)
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        return self.labels[best], float(probabilities[best])
+
+
+class IntentRouter:
+    """
+    Decides which handler answers a chat message and counts the decisions.
+
+    `classify` applies the rules, then the optional model when its confidence
+    reaches `threshold`; anything else is navigation, so unrecognised
+    questions still reach the model. `record` counts the handler that
+    actually answered (a nearest question without a location still goes to
+    the model).
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.model: Optional[BagOfWordsModel] = None
+        self._lock = threading.Lock()
+        self._intents: Counter = Counter()
+        self._routes: Counter = Counter()
+        self.model_decisions = 0
+
+    def load_model(self, path: str):
+        self.model = BagOfWordsModel.load(path)
+        logger.info("Intent model loaded", extra={"labels": self.model.labels, "vocabulary": len(self.model.token_ids)})
+
+    def classify(self, message: str) -> str:
+        intent = self._classify(message)
+        with self._lock:
+            self._intents[intent] += 1
+        return intent
+
+    def _classify(self, message: str) -> str:
+        # A question wins over small talk around it ("hey, where is Kathmandu?")
+        if NEAREST_PATTERN.search(message):
+            return NEAREST
+        if NAVIGATION_PATTERN.search(message):
+            return NAVIGATION
+        if GREETING_PATTERN.match(message):
+            return GREETING
+        if THANKS_PATTERN.match(message):
+            return THANKS
+        if OFF_TOPIC_PATTERN.search(message):
+            return OFF_TOPIC
+        if self.model is not None:
+            prediction = self.model.predict(message)
+            if prediction and prediction[1] >= self.threshold:
+                with self._lock:
+                    self.model_decisions += 1
+                return prediction[0]
+        return NAVIGATION
+
+    def record(self, route: str):
+        with self._lock:
+            self._routes[route] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "model_loaded": self.model is not None,
+                "model_decisions": self.model_decisions,
+                "intents": dict(self._intents),
+                "routes": dict(self._routes),
+            }
+
+
+intent_router = IntentRouter(threshold=settings.INTENT_MODEL_THRESHOLD)
+
+
+def load_intent_model():
+    """Load INTENT_MODEL_PATH if configured; without it only the rules run"""
+    if not settings.INTENT_MODEL_PATH:
+        return
+    try:
+        intent_router.load_model(settings.INTENT_MODEL_PATH)
+    except Exception:
+        logger.exception(f"Could not load the intent model from {settings.INTENT_MODEL_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", required=True, help="CSV with text,label columns")
+    parser.add_argument("--out", required=True, help="Output .npz (INTENT_MODEL_PATH)")
+    args = parser.parse_args()
+
+    with open(args.train, encoding="utf-8-sig", newline="") as source:
+        rows = [(row["text"], row["label"].strip()) for row in csv.DictReader(source) if row.get("text") and row.get("label")]
+    model = BagOfWordsModel.train([text for text, _ in rows], [label for _, label in rows])
+    model.save(args.out)
+    print(f"Trained on {len(rows)} examples, {len(model.token_ids)} tokens, labels {model.labels} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text, update
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Write-behind buffer for users.last_login.
+
+    Login only records the timestamp in memory; a background task writes all
+    pending timestamps in one bulk UPDATE every `flush_interval` seconds (the
+    max staleness) or as soon as `max_size` users are pending.
+    """
+
+    # Rows per UPDATE ... FROM (VALUES ...) statement, keeps bind params bounded
+    CHUNK_SIZE = 1000
+
+    def __init__(self, flush_interval: float, max_size: int):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending: Dict[uuid.UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.flushed_total = 0
+        self.failed_flushes = 0
+
+    def record(self, user_id, timestamp: Optional[datetime] = None):
+        """Remember a successful login; never touches the database"""
+        timestamp = timestamp or datetime.utcnow()
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or current < timestamp:
+                self._pending[user_id] = timestamp
+            size = len(self._pending)
+
+        if size >= self.max_size and self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending_count(),
+            "flushed_total": self.flushed_total,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def flush(self) -> int:
+        """Write all pending timestamps to the database. Returns rows sent."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            items = list(batch.items())
+            try:
+                with engine.begin() as connection:
+                    for start in range(0, len(items), self.CHUNK_SIZE):
+                        self._write_chunk(connection, items[start:start + self.CHUNK_SIZE])
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush {len(items)} last_login updates: {str(e)}")
+                self._requeue(batch)
+                return 0
+
+            self.flushed_total += len(items)
+            logger.debug("Flushed %d last_login updates", len(items))
+            return len(items)
+
+    def _write_chunk(self, connection, items: List[Tuple[uuid.UUID, datetime]]):
+        if connection.dialect.name == "postgresql":
+            values = ", ".join(
+                f"(CAST(:id_{i} AS uuid), CAST(:ts_{i} AS timestamp))" for i in range(len(items))
+            )
+            params = {}
+            for i, (user_id, timestamp) in enumerate(items):
+                params[f"id_{i}"] = str(user_id)
+                params[f"ts_{i}"] = timestamp
+            connection.execute(
+                text(
+                    "UPDATE users AS u SET last_login = v.last_login "
+                    f"FROM (VALUES {values}) AS v(id, last_login) "
+                    "WHERE u.id = v.id "
+                    "AND (u.last_login IS NULL OR u.last_login < v.last_login)"
+                ),
+                params,
+            )
+            return
+
+        # Other dialects (e.g. SQLite in local runs): one executemany round trip.
+        # updated_at is pinned so the onupdate hook doesn't treat a login as a profile change.
+        users = User.__table__
+        connection.execute(
+            update(users)
+            .where(users.c.id == bindparam("user_id"))
+            .values(last_login=bindparam("last_login"), updated_at=users.c.updated_at),
+            [{"user_id": user_id, "last_login": timestamp} for user_id, timestamp in items],
+        )
+
+    def _requeue(self, batch: Dict[uuid.UUID, datetime]):
+        """Put a failed batch back without overwriting newer logins"""
+        with self._lock:
+            for key, timestamp in batch.items():
+                current = self._pending.get(key)
+                if current is None or current < timestamp:
+                    self._pending[key] = timestamp
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        """Start the periodic flush task on the running event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic task and flush whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+last_login_buffer = LastLoginBuffer(
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+    max_size=settings.LAST_LOGIN_BUFFER_MAX_SIZE,
+)
@@ -0,0 +1,168 @@
+import logging
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIMPLE = "simple"
+COMPLEX = "complex"
+
+# Requests asking for plans, comparisons or explanations need the bigger models and longer answers
+COMPLEX_PATTERN = re.compile(
+    r"\b(plan|itinerary|compare|comparison|versus|vs|step by step|steps|between|and then|multiple|several|"
+    r"days?|budget|recommend|alternatives?|why|explain|best way|avoid)\b",
+    re.IGNORECASE,
+)
+# Rough tokens per character of English output; used when the API reports no usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_complexity(message: str) -> float:
+    """0..1 score from message length, planning/comparison wording and the number of questions"""
+    words = len(message.split())
+    cues = len(COMPLEX_PATTERN.findall(message))
+    questions = message.count("?")
+    return round(
+        0.5 * min(words / 60, 1.0)
+        + 0.4 * min(cues / 3, 1.0)
+        + 0.1 * (1.0 if questions > 1 else 0.0),
+        3,
+    )
+
+
+@dataclass
+class RouteDecision:
+    model: str
+    max_tokens: int
+    complexity: float
+    bucket: str
+
+
+class ModelRouter:
+    """
+    Picks the Groq model and max_tokens for each chat request.
+
+    `models` is ordered lightest to heaviest. Simple prompts go to the
+    lighter half, complex ones (complexity >= `threshold`) to the heavier
+    half; within the pool the model with the lowest EWMA latency wins. A
+    model that hasn't been measured for `explore_seconds` is tried again so a
+    recovered model can win traffic back. max_tokens is twice the EWMA answer length
+    seen for the prompt's bucket, within [floor, cap]; an answer cut off at
+    the limit doubles the estimate.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        threshold: float,
+        alpha: float,
+        explore_seconds: float,
+        tokens_floor: int,
+        tokens_cap: int,
+        failure_penalty_seconds: float,
+    ):
+        self.models = models
+        self.threshold = threshold
+        self.alpha = alpha
+        self.explore_seconds = explore_seconds
+        self.tokens_floor = tokens_floor
+        self.tokens_cap = tokens_cap
+        self.failure_penalty_seconds = failure_penalty_seconds
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Optional[float]] = {model: None for model in models}
+        # Never observed = always due for exploration (the monotonic clock may start near zero)
+        self._last_observed: Dict[str, float] = {model: float("-inf") for model in models}
+        self._requests: Dict[str, int] = {model: 0 for model in models}
+        self._failures: Dict[str, int] = {model: 0 for model in models}
+        self._answer_tokens: Dict[str, float] = {SIMPLE: tokens_floor / 2, COMPLEX: tokens_floor}
+        self.truncated_total = 0
+
+    def _pool(self, bucket: str) -> List[str]:
+        """Lighter half for simple prompts, heavier half for complex ones (the middle model is in both)"""
+        if bucket == COMPLEX:
+            return self.models[len(self.models) // 2:]
+        return self.models[:math.ceil(len(self.models) / 2)]
+
+    def choose(self, message: str, exclude: Optional[str] = None) -> RouteDecision:
+        """Model and max_tokens for `message`; `exclude` skips a model that just failed"""
+        complexity = estimate_complexity(message)
+        bucket = COMPLEX if complexity >= self.threshold else SIMPLE
+        # A failed model is skipped, falling back to the other pool if it was the only one
+        candidates = (
+            [model for model in self._pool(bucket) if model != exclude]
+            or [model for model in self.models if model != exclude]
+            or self.models
+        )
+        now = time.monotonic()
+        with self._lock:
+            stale = [model for model in candidates if now - self._last_observed[model] > self.explore_seconds]
+            if stale:
+                model = stale[0]
+                # Count the probe as an observation so concurrent requests don't all explore the same model
+                self._last_observed[model] = now
+            else:
+                model = min(candidates, key=lambda name: self._latency[name] or 0.0)
+            self._requests[model] += 1
+            expected = self._answer_tokens[bucket]
+        max_tokens = int(min(self.tokens_cap, max(self.tokens_floor, math.ceil(expected * 2))))
+        return RouteDecision(model=model, max_tokens=max_tokens, complexity=complexity, bucket=bucket)
+
+    def _update_latency(self, model: str, seconds: float):
+        previous = self._latency.get(model)
+        self._latency[model] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+        self._last_observed[model] = time.monotonic()
+
+    def observe_latency(self, decision: RouteDecision, seconds: float):
+        """Latency only, e.g. for a hedged request that lost and was cancelled"""
+        with self._lock:
+            self._update_latency(decision.model, seconds)
+
+    def observe(self, decision: RouteDecision, seconds: float, answer: str, truncated: bool = False):
+        """Feed back a completed request: its latency and how long the answer was"""
+        tokens = max(1, len(answer) // CHARS_PER_TOKEN)
+        with self._lock:
+            self._update_latency(decision.model, seconds)
+            current = self._answer_tokens[decision.bucket]
+            if truncated:
+                self.truncated_total += 1
+                self._answer_tokens[decision.bucket] = min(self.tokens_cap, max(current, decision.max_tokens) * 2)
+            else:
+                self._answer_tokens[decision.bucket] = current + self.alpha * (tokens - current)
+
+    def observe_failure(self, decision: RouteDecision):
+        """Errors and rate limits count as a slow request so traffic shifts elsewhere"""
+        with self._lock:
+            self._failures[decision.model] += 1
+            self._update_latency(decision.model, self.failure_penalty_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": {
+                    model: {
+                        "ewma_latency_ms": round(self._latency[model] * 1000, 1) if self._latency[model] is not None else None,
+                        "requests": self._requests[model],
+                        "failures": self._failures[model],
+                    }
+                    for model in self.models
+                },
+                "expected_answer_tokens": {bucket: round(tokens, 1) for bucket, tokens in self._answer_tokens.items()},
+                "truncated_total": self.truncated_total,
+            }
+
+
+model_router = ModelRouter(
+    models=settings.GROQ_MODELS,
+    threshold=settings.GROQ_COMPLEXITY_THRESHOLD,
+    alpha=settings.GROQ_LATENCY_EWMA_ALPHA,
+    explore_seconds=settings.GROQ_EXPLORE_SECONDS,
+    tokens_floor=settings.GROQ_MIN_MAX_TOKENS,
+    tokens_cap=settings.GROQ_MAX_TOKENS,
+    failure_penalty_seconds=settings.GROQ_TIMEOUT_SECONDS,
+)
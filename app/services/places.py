@@ -0,0 +1,175 @@
+import csv
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.spatial import KDTree, chord_to_km, km_to_chord, to_unit_vectors
+
+logger = logging.getLogger(__name__)
+
+
+def load_places(path: str) -> Dict[str, np.ndarray]:
+    """
+    Read a points-of-interest file into column arrays.
+
+    CSV needs a header with name, category, lat (or latitude) and lon (or
+    lng/longitude); popularity is optional. GeoJSON must be a
+    FeatureCollection of Point features with name/category/popularity
+    properties. Rows without a name or valid coordinates are skipped.
+    """
+    names, categories, lats, lons, popularity = [], [], [], [], []
+
+    def add(name, category, lat, lon, score):
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            return
+        if not name or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            return
+        names.append(str(name).strip())
+        categories.append(str(category or "").strip().lower())
+        lats.append(lat)
+        lons.append(lon)
+        try:
+            popularity.append(float(score or 0))
+        except ValueError:
+            popularity.append(0.0)
+
+    file_path = Path(path)
+    if file_path.suffix.lower() in (".geojson", ".json"):
+        with open(file_path, encoding="utf-8") as source:
+            collection = json.load(source)
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            properties = feature.get("properties") or {}
+            lon, lat = geometry.get("coordinates", [None, None])[:2]
+            add(properties.get("name"), properties.get("category"), lat, lon, properties.get("popularity"))
+    else:
+        with open(file_path, encoding="utf-8-sig", newline="") as source:
+            for row in csv.DictReader(source):
+                add(
+                    row.get("name"),
+                    row.get("category"),
+                    row.get("lat") or row.get("latitude"),
+                    row.get("lon") or row.get("lng") or row.get("longitude"),
+                    row.get("popularity"),
+                )
+
+    return {
+        "name": np.array(names, dtype=object),
+        "category": np.array(categories, dtype=object),
+        "lat": np.array(lats, dtype=np.float64),
+        "lon": np.array(lons, dtype=np.float64),
+        "popularity": np.array(popularity, dtype=np.float64),
+    }
+
+
+class PlaceIndex:
+    """
+    In-memory nearest-place lookups over the POI dataset.
+
+    One k-d tree covers all places and one more is built per category, so a
+    category query never has to skip over non-matching points.
+    """
+
+    def __init__(self):
+        self.places: Optional[Dict[str, np.ndarray]] = None
+        self._tree: Optional[KDTree] = None
+        self._category_trees: Dict[str, KDTree] = {}
+        self._category_members: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.queries_total = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._tree is not None
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(self._category_trees)
+
+    def load(self, path: str):
+        """Build the index from a CSV/GeoJSON file and swap it in"""
+        places = load_places(path)
+        vectors = to_unit_vectors(places["lat"], places["lon"])
+        category_members = {
+            category: np.flatnonzero(places["category"] == category)
+            for category in np.unique(places["category"]) if category
+        }
+        category_trees = {
+            category: KDTree(vectors[members]) for category, members in category_members.items()
+        }
+        tree = KDTree(vectors)
+        with self._lock:
+            self.places = places
+            self._tree = tree
+            self._category_trees = category_trees
+            self._category_members = category_members
+        logger.info("Place index loaded", extra={"places": len(tree), "categories": len(category_trees)})
+
+    def nearby(
+        self,
+        lat: float,
+        lon: float,
+        category: Optional[str] = None,
+        k: int = 5,
+        radius_km: Optional[float] = None,
+    ) -> List[dict]:
+        """The k places closest to (lat, lon), nearest first, optionally within radius_km"""
+        self.queries_total += 1
+        places, tree, members = self.places, self._tree, None
+        if tree is None:
+            return []
+        if category:
+            category = category.strip().lower()
+            tree = self._category_trees.get(category)
+            members = self._category_members.get(category)
+            if tree is None:
+                return []
+
+        max_distance_sq = km_to_chord(radius_km) ** 2 if radius_km else np.inf
+        distances_sq, indices = tree.query(to_unit_vectors([lat], [lon])[0], k, max_distance_sq)
+        if members is not None:
+            indices = members[indices]
+        distances_km = chord_to_km(np.sqrt(distances_sq))
+        return [
+            {
+                "name": places["name"][index],
+                "category": places["category"][index],
+                "latitude": float(places["lat"][index]),
+                "longitude": float(places["lon"][index]),
+                "distance_km": round(float(distance), 3),
+            }
+            for index, distance in zip(indices.tolist(), distances_km.tolist())
+        ]
+
+    def stats(self) -> dict:
+        tree = self._tree
+        return {
+            "ready": tree is not None,
+            "places": len(tree) if tree else 0,
+            "categories": len(self._category_trees),
+            "memory_bytes": (tree.memory_bytes + sum(t.memory_bytes for t in self._category_trees.values())) if tree else 0,
+            "queries_total": self.queries_total,
+        }
+
+
+place_index = PlaceIndex()
+
+
+def load_place_index():
+    """Load PLACES_DATASET_PATH if configured; failures leave the index empty"""
+    if not settings.PLACES_DATASET_PATH:
+        logger.info("PLACES_DATASET_PATH not set; place lookups are disabled")
+        return
+    try:
+        place_index.load(settings.PLACES_DATASET_PATH)
+    except Exception:
+        logger.exception(f"Could not load places from {settings.PLACES_DATASET_PATH}")
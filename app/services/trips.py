@@ -0,0 +1,115 @@
+import logging
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.services import autocomplete
+from app.utils.spatial import haversine_km
+
+logger = logging.getLogger(__name__)
+
+# 2-opt stops after this many full passes even if it is still improving
+MAX_TWO_OPT_PASSES = 50
+# Ignore improvements smaller than this (km) so floating point noise can't loop forever
+IMPROVEMENT_EPSILON = 1e-9
+
+
+def distance_matrix(lats, lons) -> np.ndarray:
+    """N x N great-circle distances in km, in one broadcast haversine pass"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    return haversine_km(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+
+
+def nearest_neighbour_order(matrix: np.ndarray, start: int = 0) -> np.ndarray:
+    """Greedy tour: from `start`, always go to the closest unvisited stop"""
+    count = len(matrix)
+    order = np.empty(count, dtype=np.int64)
+    visited = np.zeros(count, dtype=bool)
+    order[0], visited[start] = start, True
+    for position in range(1, count):
+        distances = np.where(visited, np.inf, matrix[order[position - 1]])
+        order[position] = np.argmin(distances)
+        visited[order[position]] = True
+    return order
+
+
+def two_opt(order: np.ndarray, matrix: np.ndarray, round_trip: bool = False) -> np.ndarray:
+    """
+    Improve a tour by reversing segments while that shortens it.
+
+    For each edge (a, b) every candidate second edge (c, d) is scored in one
+    vectorized step; the best improving reversal is applied. The first stop
+    never moves. For open trips the last stop has no outgoing edge, so
+    reversing up to the end only swaps (a, b) for (a, c).
+    """
+    order = order.copy()
+    count = len(order)
+    if count < 4:
+        return order
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(count - 2):
+            a, b = order[i], order[i + 1]
+            c = order[i + 2:]
+            if round_trip:
+                d = np.append(order[i + 3:], order[0])
+                tail = matrix[b, d] - matrix[c, d]
+            else:
+                d = order[i + 3:]
+                tail = np.append(matrix[b, d] - matrix[c[:-1], d], 0.0)
+            delta = matrix[a, c] - matrix[a, b] + tail
+            best = int(np.argmin(delta))
+            if delta[best] < -IMPROVEMENT_EPSILON:
+                j = i + 2 + best
+                order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order
+
+
+def plan_trip(lats, lons, round_trip: bool = False) -> dict:
+    """
+    Order stops to keep the total distance short, starting at the first stop.
+
+    Returns the visiting order (indices into the input), the leg distances and
+    the total in km, and how long planning took.
+    """
+    started = time.perf_counter()
+    matrix = distance_matrix(lats, lons)
+    order = two_opt(nearest_neighbour_order(matrix), matrix, round_trip=round_trip)
+    path = np.append(order, order[0]) if round_trip else order
+    legs = matrix[path[:-1], path[1:]]
+    return {
+        "order": order.tolist(),
+        "legs_km": np.round(legs, 3).tolist(),
+        "total_km": round(float(legs.sum()), 3),
+        "round_trip": round_trip,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def plan_named_trip(names: List[str], round_trip: bool = False) -> Optional[dict]:
+    """
+    Chatbot tool: resolve place names through the autocomplete index and plan a trip.
+
+    Returns None when the index isn't loaded; names that don't resolve are
+    reported under "unresolved" and left out of the plan.
+    """
+    index = autocomplete.autocomplete_index
+    if index is None:
+        return None
+    stops, unresolved = [], []
+    for name in names:
+        matches = index.complete(name, k=1)
+        if matches:
+            stops.append(matches[0])
+        else:
+            unresolved.append(name)
+    plan = {"stops": stops, "unresolved": unresolved}
+    if len(stops) >= 2:
+        result = plan_trip([stop["latitude"] for stop in stops], [stop["longitude"] for stop in stops], round_trip)
+        plan.update(result, stops=[stops[index] for index in result["order"]])
+    return plan
@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.user import User, UserProfile
+
+# Exportable columns. Credentials and OTPs are deliberately not exportable.
+EXPORT_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+    "email": User.email,
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "phone": User.phone,
+    "role": User.role,
+    "is_active": User.is_active,
+    "is_verified": User.is_verified,
+    "profile_completed": User.profile_completed,
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+    "last_login": User.last_login,
+    "profile_image": UserProfile.profile_image,
+    "profile_created_at": UserProfile.created_at,
+    "profile_updated_at": UserProfile.updated_at,
+}
+
+# Rows fetched from the server-side cursor per round trip; bounds memory
+EXPORT_BATCH_SIZE = 1000
+
+
+def resolve_columns(columns: Optional[str]) -> List[str]:
+    """Parse a comma-separated column list. Raises ValueError on unknown names."""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_COLUMNS]
+    if unknown or not names:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return names
+
+
+def build_export_query(columns: List[str], updated_since: Optional[datetime] = None):
+    """users LEFT JOIN user_profiles, optionally limited to rows changed after the watermark"""
+    statement = (
+        select(*[EXPORT_COLUMNS[name].label(name) for name in columns])
+        .select_from(User)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+    )
+    if updated_since is not None:
+        statement = statement.where(or_(
+            func.coalesce(User.updated_at, User.created_at) > updated_since,
+            UserProfile.updated_at > updated_since,
+        ))
+    return statement.order_by(User.created_at, User.id)
+
+
+def open_export() -> Tuple[Connection, datetime]:
+    """
+    Connection for one export, and the watermark to hand out with it.
+
+    The watermark and the rows come from the same transaction, REPEATABLE
+    READ on PostgreSQL so every batch sees the snapshot taken with the
+    watermark. created_at/updated_at hold the writer's transaction start, so
+    a row committed just after the snapshot can carry an earlier timestamp;
+    the watermark is moved back by EXPORT_WATERMARK_MARGIN_SECONDS so the next
+    incremental export still includes it. Rows near the boundary can appear
+    in two exports, so consumers upsert by id. Pass the connection to
+    stream_export, which closes it.
+    """
+    connection = engine.connect()
+    try:
+        if connection.dialect.name == "postgresql":
+            connection = connection.execution_options(isolation_level="REPEATABLE READ")
+        # First statement of the transaction: on PostgreSQL this also fixes the snapshot
+        snapshot_time = connection.execute(select(func.now())).scalar()
+    except Exception:
+        connection.close()
+        raise
+    return connection, snapshot_time - timedelta(seconds=settings.EXPORT_WATERMARK_MARGIN_SECONDS)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def stream_export(connection: Connection, statement, columns: List[str], export_format: str) -> Iterator[str]:
+    """
+    Yield the export as NDJSON lines or CSV text, one chunk per cursor batch.
+
+    Reads on the connection from open_export with stream_results, so the
+    driver keeps a server-side cursor open and only EXPORT_BATCH_SIZE rows
+    are in memory. Closes the connection when done.
+    """
+    with connection:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        result = connection.execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_SIZE
+        ).execute(statement)
+
+        for rows in result.partitions():
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                    for row in rows
+                )
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({name: _json_value(value) for name, value in zip(columns, row)}) + "\n"
+                    for row in rows
+                )
@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.schemas.user import InitialSignup
+from app.services.email_filter import email_filter
+from app.utils.pagination import LIKE_ESCAPE, like_prefix
+
+logger = logging.getLogger(__name__)
+
+# Columns written per imported user; created_at comes from the server default
+IMPORT_COLUMNS = [
+    "id", "username", "email", "hashed_password", "first_name", "last_name",
+    "is_active", "is_verified", "profile_completed", "role",
+]
+
+# Rejects listed in the response; the rejected count is always exact
+MAX_REPORTED_REJECTS = 1000
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    """bcrypt is CPU bound and holds the GIL long enough that threads don't help"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # Spawned, not forked: a fork copies locks other threads hold (logging, the DB pool) and can deadlock
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.IMPORT_HASH_WORKERS or None, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+
+def iter_rows(stream: io.TextIOBase, import_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) from a CSV (with header) or NDJSON stream"""
+    if import_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key}, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+class UserImporter:
+    """
+    Bulk user import: validate with the signup rules, hash in a process pool,
+    then load each batch with COPY on Postgres or a batched INSERT elsewhere.
+    """
+
+    def __init__(self, mark_verified: bool = False, batch_size: int = 1000):
+        self.mark_verified = mark_verified
+        self.batch_size = batch_size
+        self.inserted = 0
+        self.rejected = 0
+        self.rejects: List[dict] = []
+        self._seen_emails: Set[str] = set()
+        self._assigned_usernames: Set[str] = set()
+
+    def reject(self, line: int, email: Optional[str], error: str):
+        self.rejected += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append({"line": line, "email": email, "error": error})
+
+    def run(self, stream: io.TextIOBase, import_format: str) -> dict:
+        start_time = time.perf_counter()
+        batch: List[Tuple[int, InitialSignup]] = []
+
+        for line_number, row, error in iter_rows(stream, import_format):
+            if error:
+                self.reject(line_number, None, error)
+                continue
+            email = row.get("email")
+            if not row.get("password"):
+                # Checked here: the confirmation below would otherwise be missing too and mask this
+                self.reject(line_number, email, "password: Field required")
+                continue
+            try:
+                # Imported rows have no confirmation field; the password confirms itself
+                signup = InitialSignup(**{**row, "confirm_password": row.get("confirm_password") or row["password"]})
+            except ValidationError as e:
+                self.reject(line_number, email, _validation_message(e))
+                continue
+
+            email_key = signup.email.lower()
+            if email_key in self._seen_emails:
+                self.reject(line_number, signup.email, "Duplicate email in import")
+                continue
+            self._seen_emails.add(email_key)
+
+            batch.append((line_number, signup))
+            if len(batch) >= self.batch_size:
+                self._load_batch(batch)
+                batch = []
+
+        if batch:
+            self._load_batch(batch)
+
+        elapsed = time.perf_counter() - start_time
+        return {
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "rejects": self.rejects,
+            "rejects_truncated": self.rejected > len(self.rejects),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.inserted / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _load_batch(self, batch: List[Tuple[int, InitialSignup]]):
+        with engine.connect() as connection:
+            existing = set(connection.execute(
+                select(func.lower(User.email)).where(
+                    func.lower(User.email).in_([signup.email.lower() for _, signup in batch])
+                )
+            ).scalars())
+
+        accepted = []
+        for line_number, signup in batch:
+            if signup.email.lower() in existing:
+                self.reject(line_number, signup.email, "Email already registered")
+            else:
+                accepted.append((line_number, signup))
+        if not accepted:
+            return
+
+        usernames = self._assign_usernames([signup.email.split("@")[0] for _, signup in accepted])
+        hashes = list(_get_hash_pool().map(
+            get_password_hash, [signup.password for _, signup in accepted], chunksize=16
+        ))
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "username": username,
+                "email": signup.email,
+                "hashed_password": hashed_password,
+                "first_name": signup.first_name,
+                "last_name": signup.last_name,
+                "is_active": self.mark_verified,
+                "is_verified": self.mark_verified,
+                "profile_completed": False,
+                "role": "user",
+            }
+            for (_, signup), username, hashed_password in zip(accepted, usernames, hashes)
+        ]
+
+        # COPY goes through the raw DBAPI cursor, so its errors aren't wrapped by SQLAlchemy
+        conflict_errors = (IntegrityError, engine.dialect.loaded_dbapi.IntegrityError)
+        try:
+            with engine.begin() as connection:
+                self._write_rows(connection, rows)
+            self.inserted += len(rows)
+            for row in rows:
+                email_filter.add(row["email"])
+        except conflict_errors:
+            # A concurrent signup took an email/username; retry row by row to isolate it
+            logger.warning("Bulk import batch hit a unique conflict, retrying row by row")
+            for (line_number, signup), row in zip(accepted, rows):
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(User.__table__), [row])
+                    self.inserted += 1
+                    email_filter.add(row["email"])
+                except IntegrityError:
+                    self.reject(line_number, signup.email, "Email or username already registered")
+
+    def _write_rows(self, connection, rows: List[Dict]):
+        if connection.dialect.name == "postgresql":
+            cursor = connection.connection.dbapi_connection.cursor()
+            try:
+                if hasattr(cursor, "copy_expert"):
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for row in rows:
+                        writer.writerow([
+                            ("t" if row[name] else "f") if isinstance(row[name], bool)
+                            else ("" if row[name] is None else row[name])
+                            for name in IMPORT_COLUMNS
+                        ])
+                    buffer.seek(0)
+                    cursor.copy_expert(
+                        f"COPY users ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+                    )
+                    return
+            finally:
+                cursor.close()
+
+        # SQLite (tests) and drivers without COPY support: one executemany per batch
+        connection.execute(insert(User.__table__), rows)
+
+    def _assign_usernames(self, bases: List[str]) -> List[str]:
+        """Same scheme as initial_signup (email local part + counter), resolved per batch"""
+        bases = [base[:40] for base in bases]
+        with engine.connect() as connection:
+            taken = set(connection.execute(
+                select(User.username).where(User.username.in_(set(bases)))
+            ).scalars())
+            # Only bases that collide need the counter suffixes already in use
+            for base in {base for base in bases if base in taken}:
+                taken.update(connection.execute(
+                    select(User.username).where(User.username.like(like_prefix(base), escape=LIKE_ESCAPE))
+                ).scalars())
+
+        usernames = []
+        for base in bases:
+            username, counter = base, 0
+            while username in taken or username in self._assigned_usernames:
+                counter += 1
+                username = f"{base}{counter}"
+            self._assigned_usernames.add(username)
+            usernames.append(username)
+        return usernames
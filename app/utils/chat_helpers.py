@@ -0,0 +1,91 @@
+import re
+from typing import Iterable, List, Optional
+
+OFF_TOPIC_REPLY = "I specialize in location assistance. For other queries, please contact Tripo support. 🗺️"
+GREETING_REPLY = "Hi there! 👋 Ask me for directions, nearby places or help ordering the stops of a trip."
+THANKS_REPLY = "You're welcome! Safe travels 🗺️"
+
+NEAREST_PATTERN = re.compile(r"\b(nearest|closest|nearby|near me|close by|around me|around here)\b", re.IGNORECASE)
+
+CATEGORY_EMOJI = {
+    "hospital": "🏥",
+    "clinic": "🏥",
+    "pharmacy": "💊",
+    "cafe": "☕",
+    "restaurant": "🍽️",
+    "hotel": "🏨",
+    "atm": "🏧",
+    "bank": "🏦",
+    "fuel": "⛽",
+    "gas station": "⛽",
+    "parking": "🅿️",
+    "police": "👮",
+    "museum": "🏛️",
+    "park": "🌳",
+    "airport": "✈️",
+}
+
+
+def _singular_forms(word: str) -> List[str]:
+    forms = [word]
+    if word.endswith("ies"):
+        forms.append(word[:-3] + "y")
+    if word.endswith("es"):
+        forms.append(word[:-2])
+    if word.endswith("s"):
+        forms.append(word[:-1])
+    return forms
+
+
+def parse_nearest_query(message: str, categories: Iterable[str]) -> Optional[str]:
+    """
+    Category of a "nearest X" question, if X is a known place category.
+
+    "Where is the nearest hospital?" -> "hospital"; returns None when the
+    message isn't a nearest-place question or names no known category.
+    """
+    if not NEAREST_PATTERN.search(message):
+        return None
+    known = set(categories)
+    words = re.findall(r"[a-z]+", message.lower())
+    # Prefer two-word categories ("gas station") over their parts
+    candidates = [" ".join(words[i:i + 2]) for i in range(len(words) - 1)] + words
+    for candidate in candidates:
+        for form in _singular_forms(candidate):
+            if form in known:
+                return form
+    return None
+
+
+def format_distance(distance_km: float) -> str:
+    if distance_km < 1:
+        return f"{int(round(distance_km * 1000, -1))} m"
+    return f"{distance_km:.1f} km"
+
+
+def format_nearest_answer(category: str, places: List[dict]) -> str:
+    """Two-sentence answer in the assistant's style for place-index results"""
+    emoji = CATEGORY_EMOJI.get(category, "📍")
+    if not places:
+        return f"I couldn't find a {category} near you {emoji}."
+    nearest = places[0]
+    answer = f"The nearest {category} is {nearest['name']}, {format_distance(nearest['distance_km'])} away {emoji}"
+    if len(places) > 1:
+        others = ", ".join(f"{place['name']} ({format_distance(place['distance_km'])})" for place in places[1:3])
+        return f"{answer}. Also close: {others}."
+    return f"{answer}."
+
+
+def format_trip_answer(plan: Optional[dict]) -> str:
+    """One-line itinerary for a trip plan from app.services.trips"""
+    if plan is None:
+        return "I can't look up places right now, please try again shortly 🗺️."
+    stops = plan.get("stops", [])
+    unresolved = plan.get("unresolved", [])
+    missing = f" I couldn't find: {', '.join(unresolved)}." if unresolved else ""
+    if len(stops) < 2:
+        return f"I need at least two places I can find to plan a trip 🗺️.{missing}"
+    route = " → ".join(stop.get("name") or f"({stop['latitude']:.4f}, {stop['longitude']:.4f})" for stop in stops)
+    if plan.get("round_trip"):
+        route = f"{route} → {stops[0].get('name') or 'start'}"
+    return f"Best order: {route}, {format_distance(plan['total_km'])} in total 🗺️.{missing}"
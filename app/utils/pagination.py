@@ -0,0 +1,86 @@
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import literal_column, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Encode a keyset position (created_at, id) as an opaque URL-safe token"""
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a token from encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+LIKE_ESCAPE = "/"
+
+
+def like_prefix(value: str) -> str:
+    """Build a LIKE pattern matching `value` as a literal prefix; use with escape=LIKE_ESCAPE"""
+    escaped = value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"{escaped}%"
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement>, executed with the statement's bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_row_count(db: Session, statement=None, table_name: Optional[str] = None) -> Optional[int]:
+    """
+    Estimate how many rows a query returns from planner statistics, without COUNT(*).
+
+    With only `table_name`, reads pg_class.reltuples; otherwise asks the planner
+    for its row estimate of `statement`. Returns None on non-Postgres databases
+    or when no estimate is available.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+
+    try:
+        if statement is None:
+            reltuples = db.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                {"table_name": table_name},
+            ).scalar()
+            # reltuples is -1 for tables that were never analyzed
+            return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+
+        # Only FROM/WHERE matter for the estimate; a bare literal keeps result processing out of the way
+        statement = (
+            statement.with_only_columns(literal_column("1"), maintain_column_froms=True)
+            .order_by(None)
+            .limit(None)
+        )
+        plan = db.execute(_Explain(statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Row count estimation failed: {str(e)}")
+        return None
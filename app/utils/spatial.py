@@ -0,0 +1,173 @@
+import heapq
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(lat, lon) -> np.ndarray:
+    """
+    Latitude/longitude in degrees -> points on the unit sphere, shape (n, 3).
+
+    Euclidean (chord) distance between these grows monotonically with
+    great-circle distance, so nearest neighbours in 3D are nearest on Earth,
+    with no special cases at the antimeridian or the poles.
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    """Straight-line distance between unit vectors -> great-circle kilometres"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class KDTree:
+    """
+    Static k-d tree over an (n, d) float array.
+
+    Nodes are stored in flat lists; every node owns a contiguous slice of a
+    permutation of the point indices, and leaves of up to `leaf_size` points
+    are scanned with one vectorized distance computation. Queries return
+    squared Euclidean distances to avoid the square roots.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 32):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(self.points))
+        # Per node: slice [start, end), split dimension (-1 for leaves), split value, children
+        self._start, self._end, self._dim, self._value, self._left, self._right = [], [], [], [], [], []
+        if len(self.points):
+            self._build()
+
+    def _add_node(self, start: int, end: int) -> int:
+        self._start.append(start)
+        self._end.append(end)
+        self._dim.append(-1)
+        self._value.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        return len(self._start) - 1
+
+    def _build(self):
+        stack = [self._add_node(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= self.leaf_size:
+                continue
+            indices = self.order[start:end]
+            subset = self.points[indices]
+            dim = int(np.argmax(subset.max(axis=0) - subset.min(axis=0)))
+            mid = (end - start) // 2
+            partition = np.argpartition(subset[:, dim], mid)
+            self.order[start:end] = indices[partition]
+            self._dim[node] = dim
+            self._value[node] = float(self.points[self.order[start + mid], dim])
+            self._left[node] = self._add_node(start, start + mid)
+            self._right[node] = self._add_node(start + mid, end)
+            stack.extend((self._left[node], self._right[node]))
+
+    def query(self, point, k: int = 1, max_distance_sq: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest points to `point` within `max_distance_sq`.
+
+        Returns (squared distances, indices into the original points), nearest first.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        if not len(self.points) or k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        # Max-heap of the best k as (-distance_sq, index)
+        best = []
+        bound = max_distance_sq
+
+        def visit(node: int):
+            nonlocal bound
+            dim = self._dim[node]
+            if dim < 0:
+                indices = self.order[self._start[node]:self._end[node]]
+                distances = ((self.points[indices] - point) ** 2).sum(axis=1)
+                for distance, index in zip(distances[distances <= bound].tolist(), indices[distances <= bound].tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, index))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, index))
+                if len(best) == k:
+                    bound = min(bound, -best[0][0])
+                return
+            diff = point[dim] - self._value[node]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            visit(near)
+            if diff * diff <= bound:
+                visit(far)
+
+        visit(0)
+        best.sort(key=lambda item: -item[0])
+        return (
+            np.array([-distance for distance, _ in best]),
+            np.array([index for _, index in best], dtype=np.int64),
+        )
+
+    def nearest(self, points, max_distance_sq: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The nearest point to each row of `points` within `max_distance_sq`, in one traversal.
+
+        Query points travel down the tree in groups, so each leaf is scanned
+        once for all of them. Returns (squared distances, indices) per row;
+        rows with nothing in range get inf and -1.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, self.points.shape[1])
+        best_sq = np.full(len(points), max_distance_sq, dtype=np.float64)
+        best_index = np.full(len(points), -1, dtype=np.int64)
+
+        def visit(node: int, queries: np.ndarray):
+            dim = self._dim[node]
+            if dim < 0:
+                indices = self.order[self._start[node]:self._end[node]]
+                distances = ((points[queries, None, :] - self.points[indices][None, :, :]) ** 2).sum(axis=2)
+                nearest = distances.argmin(axis=1)
+                nearest_sq = distances[np.arange(len(queries)), nearest]
+                better = nearest_sq <= best_sq[queries]
+                best_sq[queries[better]] = nearest_sq[better]
+                best_index[queries[better]] = indices[nearest[better]]
+                return
+            diff = points[queries, dim] - self._value[node]
+            for side, near, far in (
+                (diff < 0, self._left[node], self._right[node]),
+                (diff >= 0, self._right[node], self._left[node]),
+            ):
+                group = queries[side]
+                if not len(group):
+                    continue
+                visit(near, group)
+                group = group[diff[side] ** 2 <= best_sq[group]]
+                if len(group):
+                    visit(far, group)
+
+        if len(self.points) and len(points):
+            visit(0, np.arange(len(points)))
+        best_sq[best_index < 0] = np.inf
+        return best_sq, best_index
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.points.nbytes + self.order.nbytes + 48 * len(self._start)
@@ -0,0 +1,141 @@
+"""
+Reverse-geocoding throughput: lookups/second for single points and batches.
+
+Builds a synthetic region set over a lat/lon box -- a grid of district
+polygons (jittered, `--vertices` points each) nested inside larger city
+polygons -- or loads a real GeoJSON, then resolves random points through
+app.services.geocoding.RegionIndex one at a time (the GET endpoint) and in
+batches (the POST batch endpoint). On the synthetic set every answer is
+checked against the district the point was generated in.
+
+Usage:
+    python benchmarks/reverse_geocode.py
+    python benchmarks/reverse_geocode.py --districts 5000 --vertices 64 --points 200000
+    python benchmarks/reverse_geocode.py --regions data/regions.geojson
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regions", default=None, help="GeoJSON of region polygons instead of the synthetic set")
+    parser.add_argument("--districts", type=int, default=2500, help="Synthetic district polygons")
+    parser.add_argument("--vertices", type=int, default=32, help="Vertices per synthetic polygon edge run")
+    parser.add_argument("--points", type=int, default=100000, help="Points resolved in batch mode")
+    parser.add_argument("--single", type=int, default=5000, help="Points resolved one call at a time")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Points per batch call")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def box_ring(min_lon, min_lat, max_lon, max_lat, vertices, rng, jitter):
+    """A closed ring along a box's edges; vertices are nudged inward so neighbours never overlap"""
+    side = max(vertices // 4, 1)
+    steps = np.linspace(0, 1, side, endpoint=False)
+    width, height = max_lon - min_lon, max_lat - min_lat
+    ring = np.concatenate([
+        np.column_stack((min_lon + steps * width, np.full(side, min_lat))),
+        np.column_stack((np.full(side, max_lon), min_lat + steps * height)),
+        np.column_stack((max_lon - steps * width, np.full(side, max_lat))),
+        np.column_stack((np.full(side, min_lon), max_lat - steps * height)),
+    ])
+    center = np.array([(min_lon + max_lon) / 2, (min_lat + max_lat) / 2])
+    ring = ring + (center - ring) * rng.uniform(0, jitter, (len(ring), 1))
+    return np.vstack((ring, ring[:1])).tolist()
+
+
+def synthetic_regions(districts: int, vertices: int, rng):
+    """District squares inside 4x4-district cities over a box around Nepal"""
+    side = max(int(math.sqrt(districts)), 1)
+    min_lon, min_lat, size = 80.0, 26.0, 8.0 / side
+    features, bounds = [], []
+    for row in range(side):
+        for column in range(side):
+            box = (min_lon + column * size, min_lat + row * size, min_lon + (column + 1) * size, min_lat + (row + 1) * size)
+            bounds.append(box)
+            features.append({
+                "type": "Feature",
+                "properties": {"name": f"district-{row}-{column}", "level": "district"},
+                "geometry": {"type": "Polygon", "coordinates": [box_ring(*box, vertices, rng, 0.02)]},
+            })
+    for row in range(0, side, 4):
+        for column in range(0, side, 4):
+            box = (
+                min_lon + column * size, min_lat + row * size,
+                min_lon + min(column + 4, side) * size, min_lat + min(row + 4, side) * size,
+            )
+            features.append({
+                "type": "Feature",
+                "properties": {"name": f"city-{row // 4}-{column // 4}", "level": "city"},
+                "geometry": {"type": "Polygon", "coordinates": [box_ring(*box, vertices, rng, 0.0)]},
+            })
+    return features, np.array(bounds)
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.services.geocoding import RegionIndex
+
+    rng = np.random.default_rng(args.seed)
+    index = RegionIndex()
+    started = time.perf_counter()
+    if args.regions:
+        index.load(args.regions)
+        # Sample points inside the overall extent of the polygons
+        min_lon, min_lat = index.bbox[:, 0].min(), index.bbox[:, 1].min()
+        max_lon, max_lat = index.bbox[:, 2].max(), index.bbox[:, 3].max()
+        bounds = None
+    else:
+        features, bounds = synthetic_regions(args.districts, args.vertices, rng)
+        index.build(features)
+        min_lon, min_lat = bounds[:, 0].min(), bounds[:, 1].min()
+        max_lon, max_lat = bounds[:, 2].max(), bounds[:, 3].max()
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = index.stats()
+    print(f"{stats['regions']} regions, {stats['edges']} edges, {stats['grid_cells']} grid cells, built in {build_ms:.0f} ms")
+
+    lats = rng.uniform(min_lat, max_lat, args.points)
+    lons = rng.uniform(min_lon, max_lon, args.points)
+
+    index.reverse_many(lats[:args.batch_size], lons[:args.batch_size])  # Warm up
+    started = time.perf_counter()
+    results = []
+    for start in range(0, args.points, args.batch_size):
+        results.extend(index.reverse_many(lats[start:start + args.batch_size], lons[start:start + args.batch_size]))
+    batch_seconds = time.perf_counter() - started
+
+    single = min(args.single, args.points)
+    started = time.perf_counter()
+    for lat, lon in zip(lats[:single].tolist(), lons[:single].tolist()):
+        index.reverse(lat, lon)
+    single_seconds = time.perf_counter() - started
+
+    resolved = sum(result is not None for result in results)
+    print(f"batch  ({args.batch_size}/call): {args.points / batch_seconds:>12,.0f} lookups/s")
+    print(f"single (1/call):    {single / single_seconds:>12,.0f} lookups/s ({single_seconds / single * 1e6:.0f} us each)")
+    print(f"resolved {resolved}/{args.points} points")
+
+    if bounds is not None:
+        # Districts are nudged inward, so only points well inside their square are checkable
+        side = int(math.sqrt(len(bounds)))
+        size = bounds[0, 2] - bounds[0, 0]
+        column = np.floor((lons - bounds[0, 0]) / size).astype(int)
+        row = np.floor((lats - bounds[0, 1]) / size).astype(int)
+        fx, fy = (lons - bounds[0, 0]) / size - column, (lats - bounds[0, 1]) / size - row
+        interior = (fx > 0.05) & (fx < 0.95) & (fy > 0.05) & (fy < 0.95) & (row < side) & (column < side)
+        wrong = [
+            i for i in np.flatnonzero(interior).tolist()
+            if results[i] is None or results[i]["name"] != f"district-{row[i]}-{column[i]}"
+        ]
+        print(f"checked {int(interior.sum())} interior points: {len(wrong)} wrong")
+
+
+if __name__ == "__main__":
+    main()
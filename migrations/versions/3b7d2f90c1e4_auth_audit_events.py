@@ -0,0 +1,77 @@
+"""Add auth_audit_events, range-partitioned by month on PostgreSQL
+
+Revision ID: 3b7d2f90c1e4
+Revises: e41b6d0c8a57
+Create Date: 2026-10-19 15:21:09.417302
+
+- On PostgreSQL the table is PARTITION BY RANGE (occurred_at) with one
+  partition per month plus a DEFAULT partition. Partitions for the current
+  and next two months are created here; the app creates later months at
+  startup (AUDIT_PARTITION_MONTHS_AHEAD). Retention is a matter of
+  detaching/dropping old monthly partitions.
+- Other dialects get a plain table with the same columns and indexes.
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = '3b7d2f90c1e4'
+down_revision = 'e41b6d0c8a57'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+
+def _month_starts(count: int):
+    today = date.today().replace(day=1)
+    for offset in range(count + 1):
+        yield date(today.year + (today.month - 1 + offset) // 12, (today.month - 1 + offset) % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = Inspector.from_engine(op.get_bind())
+    if "auth_audit_events" in inspector.get_table_names():
+        return
+
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    table_kwargs = {"postgresql_partition_by": "RANGE (occurred_at)"} if is_postgresql else {}
+    op.create_table(
+        'auth_audit_events',
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_type', sa.String(length=32), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('identifier', sa.String(length=100), nullable=True),
+        sa.Column('ip', sa.String(length=45), nullable=True),
+        sa.Column('request_id', sa.String(length=64), nullable=True),
+        sa.Column('detail', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('occurred_at', 'id'),
+        **table_kwargs
+    )
+    # Indexes on a partitioned table are created on every partition
+    op.create_index('ix_auth_audit_events_user_id_occurred_at', 'auth_audit_events', ['user_id', 'occurred_at'])
+    op.create_index('ix_auth_audit_events_event_type_occurred_at', 'auth_audit_events', ['event_type', 'occurred_at'])
+
+    if is_postgresql:
+        op.execute("CREATE TABLE auth_audit_events_default PARTITION OF auth_audit_events DEFAULT")
+        for start in _month_starts(MONTHS_AHEAD):
+            end = date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+            op.execute(
+                f"CREATE TABLE auth_audit_events_{start:%Y_%m} PARTITION OF auth_audit_events "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = Inspector.from_engine(op.get_bind())
+    if "auth_audit_events" in inspector.get_table_names():
+        # Dropping the partitioned parent drops all of its partitions
+        op.drop_table('auth_audit_events')
@@ -0,0 +1,92 @@
+"""Slim users indexes: drop low-selectivity indexes, add targeted ones
+
+Revision ID: 9c1f4e7a2b3d
+Revises: 5452a25e2c06
+Create Date: 2026-10-19 10:12:41.218734
+
+Every signup, login and OTP write used to maintain ~12 B-trees on users.
+Boolean flags, role and the timestamps were indexed although no query
+filters on them alone, and the UUID primary key had a second, redundant
+index. They are replaced with:
+
+- ix_users_email_lower: unique index on lower(email), used by every
+  email lookup (login, check-email, forgot/reset password) and enforcing
+  case-insensitive uniqueness. Creating it fails if the table already
+  holds emails that differ only by case; dedupe those first.
+- ix_users_unverified_created_at: partial index on created_at for
+  unverified accounts only (cleanup / reminder jobs).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = '9c1f4e7a2b3d'
+down_revision = '5452a25e2c06'
+branch_labels = None
+depends_on = None
+
+# Indexes created by the old `index=True` column flags
+DROPPED_INDEXES = {
+    'ix_users_id': ['id'],
+    'ix_users_is_active': ['is_active'],
+    'ix_users_is_verified': ['is_verified'],
+    'ix_users_profile_completed': ['profile_completed'],
+    'ix_users_role': ['role'],
+    'ix_users_created_at': ['created_at'],
+    'ix_users_updated_at': ['updated_at'],
+    'ix_users_last_login': ['last_login'],
+}
+
+
+def _existing_indexes():
+    inspector = Inspector.from_engine(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("users")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing_indexes = _existing_indexes()
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; it avoids
+    # blocking signups/logins while the new indexes build.
+    with op.get_context().autocommit_block():
+        if "ix_users_email_lower" not in existing_indexes:
+            op.create_index(
+                'ix_users_email_lower', 'users', [sa.text('lower(email)')],
+                unique=True, postgresql_concurrently=concurrently
+            )
+        if "ix_users_unverified_created_at" not in existing_indexes:
+            op.create_index(
+                'ix_users_unverified_created_at', 'users', ['created_at'],
+                postgresql_where=sa.text('NOT is_verified'),
+                sqlite_where=sa.text('NOT is_verified'),
+                postgresql_concurrently=concurrently
+            )
+
+    # Case-sensitive unique email index is superseded by ix_users_email_lower
+    if "ix_users_email" in existing_indexes:
+        op.drop_index('ix_users_email', table_name='users')
+
+    for name in DROPPED_INDEXES:
+        if name in existing_indexes:
+            op.drop_index(name, table_name='users')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing_indexes = _existing_indexes()
+
+    for name, columns in DROPPED_INDEXES.items():
+        if name not in existing_indexes:
+            op.create_index(name, 'users', columns, unique=False)
+
+    if "ix_users_email" not in existing_indexes:
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if "ix_users_unverified_created_at" in existing_indexes:
+        op.drop_index('ix_users_unverified_created_at', table_name='users')
+    if "ix_users_email_lower" in existing_indexes:
+        op.drop_index('ix_users_email_lower', table_name='users')
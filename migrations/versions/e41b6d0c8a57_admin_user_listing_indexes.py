@@ -0,0 +1,76 @@
+"""Indexes for the admin user listing: keyset order and prefix search
+
+Revision ID: e41b6d0c8a57
+Revises: 9c1f4e7a2b3d
+Create Date: 2026-10-19 11:03:27.540912
+
+- ix_users_created_at_id backs keyset pagination on (created_at, id).
+- The unique username and lower(email) indexes are rebuilt with the
+  *_pattern_ops operator classes so LIKE 'prefix%' can use them under a
+  non-C collation; equality lookups keep using the same indexes, so the
+  index count stays the same.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'e41b6d0c8a57'
+down_revision = '9c1f4e7a2b3d'
+branch_labels = None
+depends_on = None
+
+
+def _existing_indexes():
+    inspector = Inspector.from_engine(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("users")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing_indexes = _existing_indexes()
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    # Build the replacements first so uniqueness is enforced throughout
+    with op.get_context().autocommit_block():
+        if "ix_users_created_at_id" not in existing_indexes:
+            op.create_index(
+                'ix_users_created_at_id', 'users', ['created_at', 'id'],
+                postgresql_concurrently=concurrently
+            )
+        if "ix_users_username_pattern" not in existing_indexes:
+            op.create_index(
+                'ix_users_username_pattern', 'users', ['username'], unique=True,
+                postgresql_ops={'username': 'varchar_pattern_ops'},
+                postgresql_concurrently=concurrently
+            )
+        if "ix_users_email_lower_pattern" not in existing_indexes:
+            if concurrently:
+                op.execute(
+                    "CREATE UNIQUE INDEX CONCURRENTLY ix_users_email_lower_pattern "
+                    "ON users (lower(email) text_pattern_ops)"
+                )
+            else:
+                op.create_index(
+                    'ix_users_email_lower_pattern', 'users', [sa.text('lower(email)')], unique=True
+                )
+
+    if "ix_users_username" in existing_indexes:
+        op.drop_index('ix_users_username', table_name='users')
+    if "ix_users_email_lower" in existing_indexes:
+        op.drop_index('ix_users_email_lower', table_name='users')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing_indexes = _existing_indexes()
+
+    if "ix_users_username" not in existing_indexes:
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    if "ix_users_email_lower" not in existing_indexes:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+    for name in ['ix_users_email_lower_pattern', 'ix_users_username_pattern', 'ix_users_created_at_id']:
+        if name in existing_indexes:
+            op.drop_index(name, table_name='users')